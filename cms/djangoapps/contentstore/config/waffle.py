@@ -44,3 +44,10 @@ SHOW_REVIEW_RULES_FLAG = CourseWaffleFlag(
     flag_name=u'show_review_rules',
     flag_undefined_default=False
 )
+
+# Generate the thumbnails of uploaded images in a celery task, rather than in the upload request.
+GENERATE_ASSET_THUMBNAILS_ASYNC = CourseWaffleFlag(
+    waffle_namespace=waffle_flags(),
+    flag_name=u'generate_asset_thumbnails_async',
+    flag_undefined_default=False
+)
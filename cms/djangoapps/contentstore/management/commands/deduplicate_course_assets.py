@@ -0,0 +1,32 @@
+"""
+Script for moving the content of all course assets to blobs shared by the assets with the same content,
+and reporting the space reclaimed
+"""
+
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from xmodule.contentstore.django import contentstore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py cms deduplicate_course_assets
+    """
+    help = 'Stores the content of every course asset once per MD5 digest, and reports the space reclaimed'
+
+    def handle(self, *args, **options):
+        content_store = contentstore()
+        if not getattr(content_store, 'content_addressed', False):
+            log.warning(
+                u'The contentstore is not content-addressed, so assets saved from now on will not share their '
+                u'content. Set content_addressed in CONTENTSTORE ADDITIONAL_OPTIONS to save them that way.'
+            )
+
+        moved, reclaimed = content_store.deduplicate_assets()
+        log.info(u'Moved the content of %d assets to shared blobs, reclaiming %d bytes', moved, reclaimed)
@@ -0,0 +1,65 @@
+"""
+Command to generate, in the background, the thumbnails of the images uploaded to courses.
+"""
+
+
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from six import text_type
+
+from contentstore.tasks import enqueue_asset_thumbnails
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Example usage:
+        $ ./manage.py cms generate_asset_thumbnails course-v1:edX+DemoX+Demo_Course
+        $ ./manage.py cms generate_asset_thumbnails --all --missing
+    """
+    help = 'Enqueues tasks to generate the thumbnails of the images of courses, in every size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', metavar='course_id')
+        parser.add_argument('--all', action='store_true', help='Generate the thumbnails of every course.')
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only generate the thumbnails of the images which have no default thumbnail.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ASSET_THUMBNAILS_BATCH_SIZE,
+            help='Number of images whose thumbnails are generated by each task.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            course_keys = [course.id for course in modulestore().get_course_summaries()]
+        elif options['course_ids']:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+            except InvalidKeyError as error:
+                raise CommandError(u'Invalid key specified: {}'.format(text_type(error)))
+        else:
+            raise CommandError('At least one course or --all must be specified.')
+
+        batch_size = options['batch_size']
+        for course_key in course_keys:
+            assets, __ = contentstore().get_all_content_for_course(course_key)
+            asset_keys = [
+                asset['asset_key'] for asset in assets
+                if (asset.get('contentType') or '').startswith('image/')
+                and not (options['missing'] and asset.get('thumbnail_location'))
+            ]
+            for start in range(0, len(asset_keys), batch_size):
+                enqueue_asset_thumbnails(asset_keys[start:start + batch_size])
+            log.info(u'Enqueued the thumbnails of %d images of %s', len(asset_keys), course_key)
@@ -8,6 +8,7 @@ import json
 import os
 import shutil
 import tarfile
+import time
 from datetime import datetime
 from math import ceil
 from tempfile import NamedTemporaryFile, mkdtemp
@@ -20,6 +21,7 @@ from celery_utils.persist_on_failure import LoggedPersistOnFailureTask
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import SuspiciousOperation
 from django.core.files import File
 from django.core.files.base import ContentFile
@@ -27,7 +29,8 @@ from django.test import RequestFactory
 from django.utils.text import get_valid_filename
 from django.utils.translation import ugettext as _
 from djcelery.common import respect_language
-from opaque_keys.edx.keys import CourseKey
+from edx_django_utils.monitoring import set_custom_metric
+from opaque_keys.edx.keys import AssetKey, CourseKey
 from opaque_keys.edx.locator import LibraryLocator, BlockUsageLocator
 from organizations.models import OrganizationCourse
 from path import Path as path
@@ -43,6 +46,7 @@ from contentstore.utils import initialize_permissions, reverse_usage_url
 from contentstore.video_utils import scrape_youtube_thumbnail
 from course_action_state.models import CourseRerunState
 from models.settings.course_metadata import CourseMetadata
+from openedx.core.djangoapps.contentserver.thumbnails import generate_thumbnails
 from openedx.core.djangoapps.embargo.models import CountryAccessRule, RestrictedCourse
 from openedx.core.lib.extract_tar import safetar_extractall
 from student.auth import has_course_author_access
@@ -85,6 +89,7 @@ MIGRATION_LOGS_PREFIX = 'Transcript Migration'
 RETRY_DELAY_SECONDS = 30
 COURSE_LEVEL_TIMEOUT_SECONDS = 1200
 VIDEO_LEVEL_TIMEOUT_SECONDS = 300
+ASSET_THUMBNAILS_QUEUE_DEPTH_CACHE_KEY = 'contentstore.asset_thumbnails.queue_depth'
 
 
 def enqueue_update_thumbnail_tasks(course_videos, videos_per_task, run):
@@ -528,6 +533,48 @@ def _parse_time(time_isoformat):
     ).replace(tzinfo=UTC)
 
 
+def _update_asset_thumbnails_queue_depth(delta):
+    """
+    Add `delta` to the number of assets waiting for their thumbnails, and return it.
+    """
+    try:
+        return cache.incr(ASSET_THUMBNAILS_QUEUE_DEPTH_CACHE_KEY, delta)
+    except ValueError:
+        # The count expired or was evicted, so start over.
+        depth = max(delta, 0)
+        cache.set(ASSET_THUMBNAILS_QUEUE_DEPTH_CACHE_KEY, depth, None)
+        return depth
+
+
+def enqueue_asset_thumbnails(asset_keys):
+    """
+    Generate the thumbnails of the assets with the given keys in the background.
+    """
+    asset_keys = [text_type(asset_key) for asset_key in asset_keys]
+    _update_asset_thumbnails_queue_depth(len(asset_keys))
+    generate_asset_thumbnails.delay(asset_keys, time.time())
+
+
+@task(routing_key=settings.ASSET_THUMBNAILS_JOB_QUEUE)
+def generate_asset_thumbnails(asset_keys, enqueued_at):
+    """
+    Generate the thumbnails of the assets with the given keys, in every size.
+    """
+    set_custom_metric('asset_thumbnails_queue_wait', time.time() - enqueued_at)
+    set_custom_metric('asset_thumbnails_queue_depth', _update_asset_thumbnails_queue_depth(0))
+    store = contentstore()
+    try:
+        for asset_key in asset_keys:
+            try:
+                content = store.find(AssetKey.from_string(asset_key))
+            except NotFoundError:
+                LOGGER.info(u'Asset %s was deleted before its thumbnails were generated', asset_key)
+                continue
+            generate_thumbnails(content)
+    finally:
+        _update_asset_thumbnails_queue_depth(-len(asset_keys))
+
+
 @task(routing_key=settings.UPDATE_SEARCH_INDEX_JOB_QUEUE)
 def update_search_index(course_id, triggered_time_isoformat):
     """ Updates course search index. """
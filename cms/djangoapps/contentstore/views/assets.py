@@ -20,9 +20,12 @@ from pymongo import ASCENDING, DESCENDING
 from six import text_type
 
 from ..utils import reverse_course_url
+from contentstore.config.waffle import GENERATE_ASSET_THUMBNAILS_ASYNC
+from contentstore.tasks import enqueue_asset_thumbnails
 from contentstore.views.exception import AssetNotFoundException, AssetSizeTooLargeException
 from edxmako.shortcuts import render_to_response
 from openedx.core.djangoapps.contentserver.caching import del_cached_content
+from openedx.core.djangoapps.contentserver.thumbnails import delete_thumbnails
 from student.auth import has_course_author_access
 from util.date_utils import get_default_time_display
 from util.json_request import JsonResponse
@@ -379,6 +382,9 @@ def update_course_run_asset(course_key, upload_file):
 
     content, temporary_file_path = _get_file_content_and_path(file_metadata, course_key)
 
+    if GENERATE_ASSET_THUMBNAILS_ASYNC.is_enabled(course_key):
+        return _save_asset_and_enqueue_thumbnails(content)
+
     (thumbnail_content, thumbnail_location) = contentstore().generate_thumbnail(content,
                                                                                 tempfile_path=temporary_file_path)
 
@@ -394,6 +400,27 @@ def update_course_run_asset(course_key, upload_file):
     return content
 
 
+def _save_asset_and_enqueue_thumbnails(content):
+    """
+    Save the uploaded asset, and leave generating its thumbnails to a celery task.
+
+    An image is saved with the location its thumbnail will have, which is generated on the
+    first request for it if the task hasn't generated it yet.  The thumbnails of the asset it
+    replaces are deleted, so that they aren't served in the meantime.
+    """
+    delete_thumbnails(content)
+    if content.content_type is not None and content.content_type.split('/')[0] == 'image':
+        content.thumbnail_location = contentstore().compute_thumbnail_location(content)
+        del_cached_content(content.thumbnail_location)
+
+    contentstore().save(content)
+    del_cached_content(content.location)
+
+    if content.thumbnail_location is not None:
+        enqueue_asset_thumbnails([content.location])
+    return content
+
+
 @require_POST
 @ensure_csrf_cookie
 @login_required
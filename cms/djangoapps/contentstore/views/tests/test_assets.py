@@ -18,9 +18,11 @@ from opaque_keys.edx.locator import CourseLocator
 from PIL import Image
 from pytz import UTC
 
+from contentstore.config.waffle import GENERATE_ASSET_THUMBNAILS_ASYNC
 from contentstore.tests.utils import CourseTestCase
 from contentstore.utils import reverse_course_url
 from contentstore.views import assets
+from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
 from static_replace import replace_static_urls
 from xmodule.assetstore import AssetMetadata
 from xmodule.contentstore.content import StaticContent
@@ -354,6 +356,40 @@ class UploadTestCase(AssetsTestCase):
         resp = self.upload_asset("test_image", asset_type="image")
         self.assertEqual(resp.status_code, 200)
 
+    @override_waffle_flag(GENERATE_ASSET_THUMBNAILS_ASYNC, active=True)
+    @patch('contentstore.views.assets.enqueue_asset_thumbnails')
+    def test_upload_image_thumbnails_async(self, mock_enqueue):
+        resp = self.upload_asset("test_image", asset_type="image")
+        self.assertEqual(resp.status_code, 200)
+        asset_key = self.course.id.make_asset_key('asset', 'test_image.jpg')
+        thumbnail_key = self.course.id.make_asset_key('thumbnail', 'test_image.jpg')
+        self.assertEqual(
+            json.loads(resp.content.decode('utf-8'))['asset']['thumbnail'],
+            StaticContent.serialize_asset_key_with_slash(thumbnail_key)
+        )
+        self.assertEqual(mock_enqueue.call_count, 1)
+        self.assertEqual([six.text_type(key) for key in mock_enqueue.call_args[0][0]], [six.text_type(asset_key)])
+        self.assertIsNone(contentstore().find(thumbnail_key, throw_on_not_found=False))
+
+    @override_waffle_flag(GENERATE_ASSET_THUMBNAILS_ASYNC, active=True)
+    @override_settings(ASSET_THUMBNAIL_SIZES=[(20, 20)])
+    def test_generate_asset_thumbnails(self):
+        self.upload_asset("test_image", asset_type="image")
+        for thumbnail_name in ('test_image.jpg', 'test_image-20x20.jpg'):
+            thumbnail_key = self.course.id.make_asset_key('thumbnail', thumbnail_name)
+            self.assertIsNotNone(contentstore().find(thumbnail_key, throw_on_not_found=False))
+
+    @override_waffle_flag(GENERATE_ASSET_THUMBNAILS_ASYNC, active=True)
+    @override_settings(ASSET_THUMBNAIL_SIZES=[(20, 20)])
+    def test_reupload_deletes_thumbnails(self):
+        self.upload_asset("test_image", asset_type="image")
+        with patch('contentstore.views.assets.enqueue_asset_thumbnails') as mock_enqueue:
+            self.upload_asset("test_image", asset_type="image")
+        self.assertEqual(mock_enqueue.call_count, 1)
+        for thumbnail_name in ('test_image.jpg', 'test_image-20x20.jpg'):
+            thumbnail_key = self.course.id.make_asset_key('thumbnail', thumbnail_name)
+            self.assertIsNone(contentstore().find(thumbnail_key, throw_on_not_found=False))
+
     def test_no_file(self):
         resp = self.client.post(self.url, {"name": "file.txt"}, "application/json")
         self.assertEqual(resp.status_code, 400)
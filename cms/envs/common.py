@@ -388,6 +388,10 @@ GOOGLE_ANALYTICS_ACCOUNT = None
 # Mako templating
 import tempfile
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_cms')
+# Compiled Mako templates are written to and read from MAKO_MODULE_DIR.  Point it at a directory shared by
+# all the workers and fill it with the compile_mako_templates management command at build time, so that no
+# worker compiles templates itself.  With MAKO_PRELOAD_TEMPLATES, every template is loaded at startup.
+MAKO_PRELOAD_TEMPLATES = False
 MAKO_TEMPLATE_DIRS_BASE = [
     PROJECT_ROOT / 'templates',
     COMMON_ROOT / 'templates',
@@ -615,6 +619,7 @@ MIDDLEWARE_CLASSES = [
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'openedx.core.djangoapps.util.middleware.ConfigureSandboxWorkerPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -724,6 +729,22 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# On-disk cache of large course assets, keyed by their content digest, for the contentserver to send them from.
+# It's disabled while ROOT is None.  Assets of at least MIN_ASSET_SIZE bytes are cached, and the least recently
+# used ones are deleted once the cache is larger than MAX_SIZE bytes.  The files are sent by the web server if
+# SENDFILE_HEADER is 'X-Accel-Redirect' (nginx), with SENDFILE_URL_PREFIX as the internal URL of ROOT, or
+# 'X-Sendfile' (Apache, lighttpd), and otherwise by the WSGI server.
+COURSE_ASSETS_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+    'MIN_ASSET_SIZE': 1024 * 1024,
+    'SENDFILE_HEADER': None,
+    'SENDFILE_URL_PREFIX': None,
+}
+
+# Sizes (width, height) of the thumbnails generated for each image uploaded to a course, besides the default one.
+ASSET_THUMBNAIL_SIZES = []
+
 MODULESTORE_BRANCH = 'draft-preferred'
 
 MODULESTORE = {
@@ -819,6 +840,13 @@ CODE_JAIL = {
         # Needs to be non-zero so that jailed code can use it as their temp directory.(1MiB in bytes)
         'FSIZE': 1048576,
     },
+
+    # Pool of pre-warmed sandboxed processes to run jailed code with, see
+    # common/lib/capa/capa/safe_exec/worker_pool.py.
+    'worker_pool': {
+        # Number of workers per process.  0 disables the pool.
+        'size': 0,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1905,6 +1933,11 @@ VIDEO_TRANSCRIPT_MIGRATIONS_JOB_QUEUE = DEFAULT_PRIORITY_QUEUE
 ########## Settings youtube thumbnails scraper tasks ############
 SCRAPE_YOUTUBE_THUMBNAILS_JOB_QUEUE = DEFAULT_PRIORITY_QUEUE
 
+########## Settings asset thumbnails tasks ############
+# Run the workers of this queue with a bounded --concurrency, as decoding large images takes a lot of memory.
+ASSET_THUMBNAILS_JOB_QUEUE = DEFAULT_PRIORITY_QUEUE
+ASSET_THUMBNAILS_BATCH_SIZE = 50
+
 ########## Settings update search index task ############
 UPDATE_SEARCH_INDEX_JOB_QUEUE = DEFAULT_PRIORITY_QUEUE
 
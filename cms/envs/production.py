@@ -154,6 +154,9 @@ MEDIA_URL = ENV_TOKENS.get('MEDIA_URL', MEDIA_URL)
 # for course data
 GITHUB_REPO_ROOT = ENV_TOKENS.get('GITHUB_REPO_ROOT', GITHUB_REPO_ROOT)
 
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 # STATIC_ROOT specifies the directory where static files are
 # collected
 
@@ -424,6 +427,8 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
 )
 
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+COURSE_ASSETS_DISK_CACHE = ENV_TOKENS.get('COURSE_ASSETS_DISK_CACHE', COURSE_ASSETS_DISK_CACHE)
+ASSET_THUMBNAIL_SIZES = ENV_TOKENS.get('ASSET_THUMBNAIL_SIZES', ASSET_THUMBNAIL_SIZES)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 
 ############################### BLOCKSTORE #####################################
@@ -574,6 +579,10 @@ VIDEO_TRANSCRIPT_MIGRATIONS_JOB_QUEUE = ENV_TOKENS.get('VIDEO_TRANSCRIPT_MIGRATI
 ########## Settings youtube thumbnails scraper tasks ############
 SCRAPE_YOUTUBE_THUMBNAILS_JOB_QUEUE = ENV_TOKENS.get('SCRAPE_YOUTUBE_THUMBNAILS_JOB_QUEUE', DEFAULT_PRIORITY_QUEUE)
 
+########## Settings asset thumbnails tasks ############
+ASSET_THUMBNAILS_JOB_QUEUE = ENV_TOKENS.get('ASSET_THUMBNAILS_JOB_QUEUE', DEFAULT_PRIORITY_QUEUE)
+ASSET_THUMBNAILS_BATCH_SIZE = ENV_TOKENS.get('ASSET_THUMBNAILS_BATCH_SIZE', ASSET_THUMBNAILS_BATCH_SIZE)
+
 ########## Settings update search index task ############
 UPDATE_SEARCH_INDEX_JOB_QUEUE = ENV_TOKENS.get('UPDATE_SEARCH_INDEX_JOB_QUEUE', DEFAULT_PRIORITY_QUEUE)
 
@@ -17,13 +17,12 @@ from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
-from edx_django_utils.cache import RequestCache
 from opaque_keys.edx.django.models import CourseKeyField
 from opaque_keys.edx.keys import CourseKey
 from simple_history.models import HistoricalRecords
 
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
-from openedx.core.lib.cache_utils import request_cached
+from openedx.core.lib.cache_utils import bump_cache_generation, process_lru_cached
 
 Mode = namedtuple('Mode',
                   [
@@ -342,7 +341,7 @@ class CourseMode(models.Model):
         return [mode.to_tuple() for mode in found_course_modes]
 
     @classmethod
-    @request_cached(CACHE_NAMESPACE)
+    @process_lru_cached(CACHE_NAMESPACE, timeout=60)
     def modes_for_course(
         cls, course_id=None, include_expired=False, only_selectable=True, course=None, exclude_credit=True
     ):
@@ -815,7 +814,7 @@ class CourseMode(models.Model):
 @receiver(models.signals.post_delete, sender=CourseMode)
 def invalidate_course_mode_cache(sender, **kwargs):   # pylint: disable=unused-argument
     """Invalidate the cache of course modes. """
-    RequestCache(namespace=CourseMode.CACHE_NAMESPACE).clear()
+    bump_cache_generation(CourseMode.CACHE_NAMESPACE)
 
 
 def get_cosmetic_verified_display_price(course):
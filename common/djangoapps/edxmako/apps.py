@@ -5,7 +5,7 @@ Configuration for the edxmako Django application.
 
 from django.apps import AppConfig
 from django.conf import settings
-from . import add_lookup, clear_lookups
+from . import LOOKUP, add_lookup, clear_lookups
 
 
 class EdxMakoConfig(AppConfig):
@@ -17,7 +17,7 @@ class EdxMakoConfig(AppConfig):
 
     def ready(self):
         """
-        Setup mako lookup directories.
+        Setup mako lookup directories, and load all their templates if MAKO_PRELOAD_TEMPLATES is set.
 
         IMPORTANT: This method can be called multiple times during application startup. Any changes to this method
         must be safe for multiple callers during startup phase.
@@ -30,3 +30,5 @@ class EdxMakoConfig(AppConfig):
             clear_lookups(namespace)
             for directory in directories:
                 add_lookup(namespace, directory)
+            if getattr(settings, 'MAKO_PRELOAD_TEMPLATES', False) and namespace in LOOKUP:
+                LOOKUP[namespace].load_all()
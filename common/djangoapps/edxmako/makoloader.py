@@ -1,7 +1,9 @@
 
 
+import hashlib
 import logging
 
+import six
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.template import Engine, engines, TemplateDoesNotExist
@@ -44,8 +46,10 @@ class MakoLoader(object):
         source, file_path = self.load_template_source(template_name, template_dirs)
 
         # In order to allow dynamic template overrides, we need to cache templates based on their absolute paths
-        # rather than relative paths, overriding templates would have same relative paths.
-        module_directory = self.module_directory.rstrip("/") + "/{dir_hash}/".format(dir_hash=hash(file_path))
+        # rather than relative paths, overriding templates would have same relative paths.  The path is hashed with
+        # md5 rather than hash(), which differs between processes, so that every process shares the compiled module.
+        dir_hash = hashlib.md5(six.ensure_binary(file_path)).hexdigest()
+        module_directory = self.module_directory.rstrip("/") + "/{dir_hash}/".format(dir_hash=dir_hash)
 
         if source.startswith("## mako\n"):
             # This is a mako template
@@ -0,0 +1,42 @@
+"""
+Django management command to compile every Mako template into MAKO_MODULE_DIR,
+so that the workers sharing that directory load the compiled modules instead
+of compiling the templates themselves.
+"""
+
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from edxmako import LOOKUP
+
+
+class Command(BaseCommand):
+    """
+    Implementation of the management command
+    """
+
+    help = 'Compiles the Mako templates of every template lookup, themes included, into MAKO_MODULE_DIR.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Fail if any template does not compile.',
+        )
+
+    def handle(self, *args, **options):
+        all_failed = []
+        for namespace, lookup in sorted(LOOKUP.items()):
+            start_time = time.time()
+            loaded, failed = lookup.load_all()
+            self.stdout.write(u'{}: compiled {} templates into {} in {:.1f} s'.format(
+                namespace, loaded, lookup.template_args['module_directory'], time.time() - start_time,
+            ))
+            for uri in failed:
+                self.stderr.write(u'{}: could not compile {}'.format(namespace, uri))
+            all_failed.extend(failed)
+
+        if all_failed and options['strict']:
+            raise CommandError(u'{} templates could not be compiled.'.format(len(all_failed)))
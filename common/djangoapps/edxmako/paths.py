@@ -5,11 +5,14 @@ Set up lookup paths for mako templates.
 
 import contextlib
 import hashlib
+import logging
 import os
-import six
+import time
 
 import pkg_resources
+import six
 from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
 from mako.exceptions import TopLevelLookupException
 from mako.lookup import TemplateLookup
 
@@ -18,6 +21,11 @@ from openedx.core.lib.cache_utils import request_cached
 
 from . import LOOKUP
 
+log = logging.getLogger(__name__)
+
+# Extensions of the Mako templates in the lookup directories, which are compiled ahead of time.
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
 
 class TopLevelTemplateURI(six.text_type):
     """
@@ -105,6 +113,55 @@ class DynamicTemplateLookup(TemplateLookup):
 
         return template
 
+    def template_uris(self):
+        """
+        Return the sorted URIs of all the templates in the lookup directories, themes included.
+        """
+        uris = set()
+        for directory in self.directories:
+            for dirpath, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if os.path.splitext(filename)[1] in TEMPLATE_EXTENSIONS:
+                        relative_path = os.path.relpath(os.path.join(dirpath, filename), directory)
+                        uris.add('/' + relative_path.replace(os.sep, '/'))
+        return sorted(uris)
+
+    def load_all(self):
+        """
+        Load every template in the lookup directories, compiling those which have no up-to-date module in the
+        module directory.
+
+        Returns the number of templates loaded, and the URIs of those which failed to compile.  Not every file
+        with a template extension is a Mako template, so failures are logged rather than raised.
+        """
+        loaded = 0
+        failed = []
+        for uri in self.template_uris():
+            try:
+                # Load the template by its own URI, not the current theme's override of it.
+                super(DynamicTemplateLookup, self).get_template(uri)
+            except Exception:  # pylint: disable=broad-except
+                log.warning(u"Could not compile the Mako template %s", uri, exc_info=True)
+                failed.append(uri)
+            else:
+                loaded += 1
+        return loaded, failed
+
+    def _load(self, filename, uri):
+        """
+        Load a template the first time this process uses it, and report how long that took.
+
+        Mako only compiles the template if the module directory has no up-to-date module for it, so this
+        shows whether the templates were compiled ahead of time.
+        """
+        start_time = time.time()
+        template = super(DynamicTemplateLookup, self)._load(filename, uri)
+        duration = time.time() - start_time
+        monitoring_utils.accumulate('mako_template_loads', 1)
+        monitoring_utils.accumulate('mako_template_load_time', duration)
+        log.info(u"Loaded the Mako template %s in %.1f ms", uri, duration * 1000)
+        return template
+
     def _get_toplevel_template(self, uri):
         """
         Lookup a default/toplevel template, ignoring current theme.
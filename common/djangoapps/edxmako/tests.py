@@ -1,5 +1,8 @@
 
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import ddt
@@ -13,6 +16,7 @@ from edx_django_utils.cache import RequestCache
 from mock import Mock, patch
 
 from edxmako import LOOKUP, add_lookup
+from edxmako.paths import DynamicTemplateLookup
 from edxmako.request_context import get_template_request_context
 from edxmako.shortcuts import is_any_marketing_link_set, is_marketing_link_set, marketing_link, render_to_string
 from student.tests.factories import UserFactory
@@ -85,6 +89,55 @@ class AddLookupTests(TestCase):
         self.assertTrue(dirs[0].endswith('management'))
 
 
+class DynamicTemplateLookupTests(TestCase):
+    """
+    Test compiling all the templates of a `DynamicTemplateLookup`.
+    """
+    def setUp(self):
+        super(DynamicTemplateLookupTests, self).setUp()
+        self.template_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.template_dir)
+        self.module_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.module_dir)
+        os.mkdir(os.path.join(self.template_dir, 'emails'))
+        for name, text in (
+            ('hello.html', u'Hello ${name}'),
+            ('broken.html', u'<%def name="broken('),
+            ('emails/hello.txt', u'<%include file="/hello.html"/>'),
+            ('README.rst', u'Not a template'),
+        ):
+            with open(os.path.join(self.template_dir, name), 'w') as template_file:
+                template_file.write(text)
+
+    def make_lookup(self):
+        """
+        Return a lookup of the template directory.
+        """
+        lookup = DynamicTemplateLookup(module_directory=self.module_dir)
+        lookup.add_directory(self.template_dir)
+        return lookup
+
+    def test_template_uris(self):
+        self.assertEqual(self.make_lookup().template_uris(), ['/broken.html', '/emails/hello.txt', '/hello.html'])
+
+    def test_load_all(self):
+        self.assertEqual(self.make_lookup().load_all(), (2, ['/broken.html']))
+
+        # Another lookup of the same directories loads the compiled modules.
+        with patch('mako.template._compile_module_file') as mock_compile:
+            template = self.make_lookup().get_template('/hello.html')
+        self.assertFalse(mock_compile.called)
+        self.assertEqual(template.render(name=u'world'), u'Hello world')
+
+    @patch('edxmako.paths.monitoring_utils.accumulate')
+    def test_load_reported(self, mock_accumulate):
+        lookup = self.make_lookup()
+        lookup.get_template('/hello.html')
+        lookup.get_template('/hello.html')
+        mock_accumulate.assert_any_call('mako_template_loads', 1)
+        self.assertEqual(mock_accumulate.call_count, 2)
+
+
 class MakoRequestContextTest(TestCase):
     """
     Test MakoMiddleware.
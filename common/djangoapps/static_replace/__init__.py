@@ -8,7 +8,9 @@ from six import text_type
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
+from django.utils.lru_cache import lru_cache
 
+from openedx.core.lib.cache_utils import request_cached
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
@@ -16,6 +18,9 @@ from opaque_keys.edx.locator import AssetLocator
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# Number of paths whose presence in staticfiles_storage each process remembers.
+STATICFILES_LOOKUP_CACHE_SIZE = 4096
+
 
 def _url_replace_regex(prefix):
     """
@@ -33,6 +38,41 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache(maxsize=128)
+def _compiled_url_replace_regex(prefix):
+    """
+    Return the compiled _url_replace_regex of `prefix`.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
+@lru_cache(maxsize=STATICFILES_LOOKUP_CACHE_SIZE)
+def staticfiles_exists(path):
+    """
+    Return whether `path` is in staticfiles_storage, remembering the answer for
+    the life of the process, since static files only change when it's deployed.
+
+    Storages with a collectstatic manifest are answered from the manifest,
+    rather than from the file system or S3.
+    """
+    manifest = getattr(staticfiles_storage, 'hashed_files', None)
+    if isinstance(manifest, dict) and manifest:
+        return path in manifest
+    return staticfiles_storage.exists(path)
+
+
+@request_cached()
+def _get_canonicalized_asset_path(course_id, path):
+    """
+    Return the canonicalized asset path of `path` in the course, once per request.
+    """
+    # Import is placed here to avoid model import at project startup.
+    from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+    base_url = AssetBaseUrlConfig.get_base_url()
+    excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+    return StaticContent.get_canonicalized_asset_path(course_id, path, base_url, excluded_exts)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -97,6 +137,28 @@ def replace_course_urls(text, course_key):
     return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
 
 
+def _is_xblock_resource_url(url):
+    """
+    Return whether `url` links to an XBlock resource, rather than to a static asset.
+    """
+    # Probably wasn't a good idea that /static works for actual static assets and
+    # for magical course asset URLs....
+    starts_with_static_url = url.startswith(six.text_type(settings.STATIC_URL))
+    starts_with_prefix = url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
+
+
+def _static_url_prefix(data_dir):
+    """
+    Return the prefix of static urls that are rewritten, for _url_replace_regex.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
 def process_static_urls(text, replacement_function, data_dir=None):
     """
     Run an arbitrary replacement function on any urls matching the static file
@@ -112,26 +174,13 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(six.text_type(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        # Don't rewrite XBlock resource links.
+        if _is_xblock_resource_url(prefix + rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(_static_url_prefix(data_dir)).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -151,6 +200,75 @@ def make_static_urls_absolute(request, html):
     )
 
 
+def _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path,
+                        static_paths_out, cached=False):
+    """
+    Replace a single matched static url, for replace_static_urls and replace_urls.
+
+    If `cached` is True, lookups in staticfiles_storage are remembered by the
+    process, and asset paths in the course are remembered by the request.
+    """
+    original_uri = "".join([prefix, rest])
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        static_paths_out.append((original_uri, original_uri))
+        return original
+
+    exists = staticfiles_exists if cached else staticfiles_storage.exists
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        static_paths_out.append((original_uri, original_uri))
+        return original
+
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) and course_id:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            if cached:
+                url = _get_canonicalized_asset_path(course_id, rest)
+            else:
+                # Import is placed here to avoid model import at project startup.
+                from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
+                base_url = AssetBaseUrlConfig.get_base_url()
+                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
+                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    static_paths_out.append((original_uri, url))
+    return "".join([quote, url, quote])
+
+
 def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path='', static_paths_out=None):
     """
     Replace /static/$stuff urls either with their correct url as generated by collectstatic,
@@ -174,59 +292,52 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         """
         Replace a single matched url.
         """
-        original_uri = "".join([prefix, rest])
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            static_paths_out.append((original_uri, original_uri))
-            return original
+        return _replace_static_url(
+            original, prefix, quote, rest, data_directory, course_id, static_asset_path, static_paths_out
+        )
 
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            static_paths_out.append((original_uri, original_uri))
-            return original
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
 
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) and course_id:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path=''):
+    """
+    Replace /static/, /course/ and /jump_to_id/ urls in a single pass over `text`, as
+    replace_static_urls, replace_course_urls and replace_jump_to_id_urls would in turn.
 
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                # Import is placed here to avoid model import at project startup.
-                from static_replace.models import AssetBaseUrlConfig, AssetExcludedExtensionsConfig
-                base_url = AssetBaseUrlConfig.get_base_url()
-                excluded_exts = AssetExcludedExtensionsConfig.get_excluded_extensions()
-                url = StaticContent.get_canonicalized_asset_path(course_id, rest, base_url, excluded_exts)
+    Lookups of static urls in staticfiles_storage are remembered by the process, and
+    lookups of them in the course are remembered by the request, since the same assets
+    are usually linked to by many blocks.
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+    text: The source text to do the substitutions in
+    course_id: The course_id in which this rewrite happens
+    jump_to_id_base_url: The base of the handler that redirects /jump_to_id/ urls, as
+        for replace_jump_to_id_urls
+    data_directory: The directory in which course data is stored
+    static_asset_path: Path for static assets, which overrides data_directory and course_id, if nonempty
+    """
+    data_dir = static_asset_path or data_directory
+    course_url_prefix = u'/courses/{}/'.format(text_type(course_id))
+    static_paths_out = []
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
-
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
-
-        static_paths_out.append((original_uri, url))
-        return "".join([quote, url, quote])
+    def replace_url(match):
+        """
+        Replace a single matched url, according to its prefix.
+        """
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+        if prefix == '/course/':
+            return "".join([quote, course_url_prefix, rest, quote])
+        elif prefix == '/jump_to_id/':
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+        elif _is_xblock_resource_url(prefix + rest):
+            return original
+        return _replace_static_url(
+            original, prefix, quote, rest, data_directory, course_id, static_asset_path, static_paths_out,
+            cached=True,
+        )
+
+    regex = _compiled_url_replace_regex(u'/course/|/jump_to_id/|{}'.format(_static_url_prefix(data_dir)))
+    return regex.sub(replace_url, text)
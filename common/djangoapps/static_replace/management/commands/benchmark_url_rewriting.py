@@ -0,0 +1,74 @@
+"""
+Django management command to compare the speed of rewriting the urls of a
+large block of HTML with replace_urls, and with replace_static_urls,
+replace_course_urls and replace_jump_to_id_urls in turn.
+"""
+
+
+import timeit
+
+from django.core.management.base import BaseCommand
+from edx_django_utils.cache import RequestCache
+from opaque_keys.edx.keys import CourseKey
+
+from static_replace import replace_course_urls, replace_jump_to_id_urls, replace_static_urls, replace_urls
+
+JUMP_TO_ID_BASE_URL = '/courses/{course_id}/jump_to_id/'
+
+
+def make_html(links, assets):
+    """
+    Return HTML with `links` links, cycling through static urls of `assets`
+    different assets, /course/ urls and /jump_to_id/ urls.
+    """
+    parts = []
+    for index in range(links):
+        if index % 3 == 0:
+            parts.append(u'<p><img src="/static/image_{}.png" alt="figure"/></p>'.format(index % assets))
+        elif index % 3 == 1:
+            parts.append(u'<p>See <a href="/course/info/{}">the notes</a>.</p>'.format(index))
+        else:
+            parts.append(u'<p>Try <a href="/jump_to_id/problem_{}">the problem</a>.</p>'.format(index))
+    return u'\n'.join(parts)
+
+
+class Command(BaseCommand):
+    """
+    Implementation of the management command
+    """
+
+    help = 'Times rewriting the urls of a large block of HTML in one pass, and in three passes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', help='Course whose assets the static urls are looked up in.')
+        parser.add_argument('--links', type=int, default=1000, help='Number of links in the HTML.')
+        parser.add_argument('--assets', type=int, default=20, help='Number of different assets linked to.')
+        parser.add_argument('--number', type=int, default=10, help='Number of times to rewrite the HTML.')
+
+    def handle(self, *args, **options):
+        course_key = CourseKey.from_string(options['course_id'])
+        jump_to_id_base_url = JUMP_TO_ID_BASE_URL.format(course_id=course_key)
+        html = make_html(options['links'], options['assets'])
+
+        def three_passes():
+            """
+            Rewrite the urls as the LMS did before replace_urls.
+            """
+            RequestCache.clear_all_namespaces()
+            text = replace_static_urls(html, course_id=course_key)
+            text = replace_course_urls(text, course_key)
+            return replace_jump_to_id_urls(text, course_key, jump_to_id_base_url)
+
+        def one_pass():
+            """
+            Rewrite the urls with replace_urls, in a new request each time.
+            """
+            RequestCache.clear_all_namespaces()
+            return replace_urls(html, course_key, jump_to_id_base_url)
+
+        if three_passes() != one_pass():
+            self.stderr.write('The rewritten HTML differs.')
+
+        for name, func in (('three passes', three_passes), ('one pass', one_pass)):
+            seconds = min(timeit.repeat(func, number=options['number'], repeat=3)) / options['number']
+            self.stdout.write(u'{}: {:.2f} ms'.format(name, seconds * 1000))
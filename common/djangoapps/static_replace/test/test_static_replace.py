@@ -10,6 +10,7 @@ import ddt
 import pytest
 from django.test import override_settings
 from django.utils.http import urlencode, urlquote
+from edx_django_utils.cache import RequestCache
 from mock import Mock, patch
 from opaque_keys.edx.keys import CourseKey
 from PIL import Image
@@ -19,7 +20,10 @@ from static_replace import (
     make_static_urls_absolute,
     process_static_urls,
     replace_course_urls,
-    replace_static_urls
+    replace_jump_to_id_urls,
+    replace_static_urls,
+    replace_urls,
+    staticfiles_exists
 )
 from xmodule.assetstore.assetmgr import AssetManager
 from xmodule.contentstore.content import StaticContent
@@ -111,6 +115,79 @@ def test_storage_url_not_exists(mock_storage):
     mock_storage.url.assert_called_once_with('data_dir/file.png')
 
 
+@pytest.fixture
+def clear_url_caches():
+    """
+    Forget the lookups remembered by replace_urls before and after a test.
+    """
+    staticfiles_exists.cache_clear()
+    RequestCache.clear_all_namespaces()
+    yield
+    staticfiles_exists.cache_clear()
+    RequestCache.clear_all_namespaces()
+
+
+@pytest.mark.usefixtures('clear_url_caches')
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_replace_urls(mock_storage):
+    """
+    Make sure replace_urls replaces urls like replace_static_urls, replace_course_urls
+    and replace_jump_to_id_urls do in turn, looking each static path up once.
+    """
+    mock_storage.exists.return_value = False
+    mock_storage.url.side_effect = lambda path: '/static/' + path
+
+    # xss-lint: disable=python-wrap-html
+    text = (
+        '<a href="/course/about">x</a><img src="/static/file.png"/><a href=\'/jump_to_id/intro\'>y</a>'
+        '<img src="/static/file.png?raw"/><img src="/static/file.png"/><a href="/static/data_dir/other.png">z</a>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(
+            replace_static_urls(text, None, COURSE_KEY, static_asset_path=DATA_DIRECTORY), COURSE_KEY
+        ),
+        COURSE_KEY,
+        '/jump_to_id_base/'
+    )
+    mock_storage.reset_mock()
+
+    assert replace_urls(text, COURSE_KEY, '/jump_to_id_base/', static_asset_path=DATA_DIRECTORY) == expected
+    assert '"/courses/org/course/run/about"' in expected
+    assert '"/static/data_dir/file.png"' in expected
+    assert "'/jump_to_id_base/intro'" in expected
+    mock_storage.exists.assert_called_once_with('file.png')
+
+
+@pytest.mark.usefixtures('clear_url_caches')
+@patch('static_replace.staticfiles_storage', autospec=True)
+def test_staticfiles_exists_from_manifest(mock_storage):
+    mock_storage.hashed_files = {'file.png': 'file.0123456789ab.png'}
+
+    assert staticfiles_exists('file.png')
+    assert not staticfiles_exists('other.png')
+    assert not mock_storage.exists.called
+
+
+@pytest.mark.usefixtures('clear_url_caches')
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.StaticContent', autospec=True)
+@patch('xmodule.modulestore.django.modulestore', autospec=True)
+@patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
+@patch('static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+def test_replace_urls_mongo_filestore(
+        mock_get_excluded_extensions, mock_get_base_url, mock_modulestore, mock_static_content, mock_storage
+):
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    mock_static_content.get_canonicalized_asset_path.return_value = "c4x://mock_url"
+    mock_get_base_url.return_value = u''
+    mock_get_excluded_extensions.return_value = ['foobar']
+
+    text = STATIC_SOURCE + STATIC_SOURCE
+    assert replace_urls(text, COURSE_KEY, '/jump_to_id/') == '"c4x://mock_url""c4x://mock_url"'
+    mock_static_content.get_canonicalized_asset_path.assert_called_once_with(COURSE_KEY, 'file.png', u'', ['foobar'])
+
+
 @patch('static_replace.StaticContent', autospec=True)
 @patch('xmodule.modulestore.django.modulestore', autospec=True)
 @patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
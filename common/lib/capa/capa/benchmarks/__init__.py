@@ -0,0 +1,22 @@
+"""
+Benchmarks of capa problem processing.
+
+Run them with `python -m capa.benchmarks`.  To check a change for regressions,
+record a baseline before making it with `python -m capa.benchmarks --save`,
+and compare with it afterwards with `python -m capa.benchmarks --compare`.
+
+The times measured depend on the machine running the benchmarks, so the
+baseline, saved in baseline.json, is only meaningful on the machine that
+recorded it and isn't committed.
+"""
+
+
+import timeit
+
+
+def measure(func, number):
+    """
+    Return the best time, in milliseconds, of calling `func` `number` times,
+    over three repetitions.
+    """
+    return min(timeit.repeat(func, number=number, repeat=3)) * 1000
@@ -0,0 +1,90 @@
+"""
+Run the capa benchmarks and print their results as JSON.
+
+With --save, the results are saved as the baseline in baseline.json.  With
+--compare, they're compared with that baseline, and the command fails if any
+of them is more than --threshold times slower than it.  The baseline is only
+meaningful on the machine that saved it, see capa.benchmarks.
+"""
+
+
+import argparse
+import io
+import json
+import logging
+import os.path
+import sys
+
+from capa.benchmarks import formula, responses, strings
+
+BENCHMARKS = {
+    'formula': formula.run,
+    'responses': responses.run,
+    'strings': strings.run,
+}
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a list of the names of the results more than `threshold` times
+    slower than their baseline, with the ratio of each.
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        if isinstance(value, dict):
+            regressions.extend(
+                ('{}.{}'.format(name, subname), ratio)
+                for subname, ratio in compare(value, baseline.get(name, {}), threshold)
+            )
+        elif baseline.get(name) and value / baseline[name] > threshold:
+            regressions.append((name, value / baseline[name]))
+    return regressions
+
+
+def main():
+    """
+    Run the benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Run the capa benchmarks.")
+    parser.add_argument('benchmarks', nargs='*', help="Benchmarks to run, of {}; all by default.".format(
+        ", ".join(sorted(BENCHMARKS))
+    ))
+    parser.add_argument('--save', action='store_true', help="Save the results as the baseline.")
+    parser.add_argument('--compare', action='store_true', help="Compare the results with the baseline.")
+    parser.add_argument('--threshold', type=float, default=1.5, help="Slowdown over the baseline to fail at.")
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: {}".format(name))
+    if args.compare and not os.path.exists(BASELINE_FILE):
+        parser.error("no baseline to compare with, save one with --save first")
+
+    # Problem code runs outside of codejail, which it warns about each time.
+    logging.disable(logging.WARNING)
+
+    names = args.benchmarks or sorted(BENCHMARKS)
+    results = {name: BENCHMARKS[name]() for name in names}
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with io.open(BASELINE_FILE, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            sys.stderr.write("{} is {:.2f} times slower than the baseline\n".format(name, ratio))
+        if regressions:
+            sys.exit(1)
+
+    if args.save:
+        baseline.update(results)
+        with io.open(BASELINE_FILE, 'w', encoding='utf-8') as baseline_file:
+            baseline_file.write(json.dumps(baseline, indent=2, sort_keys=True) + u'\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of evaluating FormulaResponse answers at their sample points.
+
+Each case is a pair of equivalent instructor and learner formulas from typical
+physics and calculus problems, evaluated at the sample points of a
+FormulaResponse in three ways:
+
+ - calc: with calc.evaluator at each sample point, parsing both formulas
+   every time, as FormulaResponse used to.
+ - compiled: with the compiled formulas at each sample point.
+ - vectorized: with the compiled formulas at all sample points at once.
+"""
+
+
+import random2 as random
+from calc import evaluator as calc_evaluator
+
+from capa import compiled_formula
+from capa.benchmarks import measure
+
+# Map of case names to (instructor formula, learner formula, samples) as in
+# the attributes of <formularesponse>.
+CASES = {
+    'kinematics': ('v_0*t + g*t^2/2', 'v_0*t + 0.5*g*t^2', 'v_0,g,t@1,9,1:10,10,5#20'),
+    'pendulum': ('2*pi*sqrt(L/g)', '2*pi*(L/g)^0.5', 'L,g@0.1,9:2,10#20'),
+    'derivative': ('3*x^2*cos(x^3) + exp(x)', 'exp(x) + 3*cos(x^3)*x^2', 'x@-2:2#20'),
+    'integral': ('-cos(x) + x^3/3 + ln(x)', 'x^3/3 - cos(x) + ln(x)', 'x@0.5:5#20'),
+    'circuit': ('R_1 || R_2 + R_3', '1/(1/R_1 + 1/R_2) + R_3', 'R_1,R_2,R_3@1,1,1:100,100,100#20'),
+}
+
+# Number of times to check each case.
+NUMBER = 20
+
+
+def _samples(samples):
+    """
+    Return the sample points of the given <formularesponse> samples, as
+    FormulaResponse.randomize_variables does.
+    """
+    variables = samples.split('@')[0].split(',')
+    numsamples = int(samples.split('@')[1].split('#')[1])
+    ranges = [[float(x) for x in part.split(',')] for part in samples.split('@')[1].split('#')[0].split(':')]
+    return [
+        {var: random.uniform(low, high) for var, low, high in zip(variables, ranges[0], ranges[1])}
+        for _ in range(numsamples)
+    ]
+
+
+def run():
+    """
+    Return the time, in milliseconds, of checking each case in each way.
+    """
+    random.seed(0)
+    results = {}
+    for name, (expected, given, samples) in sorted(CASES.items()):
+        var_dict_list = _samples(samples)
+
+        def check_calc():
+            for var_dict in var_dict_list:
+                calc_evaluator(var_dict, {}, given)
+                calc_evaluator(var_dict, {}, expected)
+
+        def check_compiled():
+            for var_dict in var_dict_list:
+                compiled_formula.evaluator(var_dict, {}, given)
+                compiled_formula.evaluator(var_dict, {}, expected)
+
+        def check_vectorized():
+            compiled_formula.compile_formula(given).evaluate_samples(var_dict_list, {})
+            compiled_formula.compile_formula(expected).evaluate_samples(var_dict_list, {})
+
+        results[name] = {
+            way: round(measure(check, NUMBER) / NUMBER, 3)
+            for way, check in (('calc', check_calc), ('compiled', check_compiled), ('vectorized', check_vectorized))
+        }
+    return results
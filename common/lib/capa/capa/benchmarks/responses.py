@@ -0,0 +1,176 @@
+"""
+Benchmark of parsing, rendering and grading each type of capa response.
+
+Each case is a problem with a single type of response, mostly from the
+courses in common/test/data, and a list of submissions to it, the first of
+which is correct.  For each case, this measures:
+
+ - parse: building the LoncapaProblem, without the process cache of
+   parsed problems.
+ - parse_cached: building the LoncapaProblem from that cache.
+ - get_html: rendering the problem with the real input templates.
+ - grade_1, grade_10, grade_1000: grading that many submissions, cycling
+   through the submissions of the case.
+
+Code in problems is executed in this process rather than in codejail, so
+that the time measured is that of capa itself.
+"""
+
+
+import io
+import os.path
+
+from capa import capa_problem
+from capa.benchmarks import measure
+from capa.capa_problem import LoncapaProblem
+from capa.tests.helpers import capa_render_template, mock_capa_module, test_capa_system
+
+# The directory of the test courses, common/test/data.
+DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, os.pardir, 'test', 'data')
+
+# There's no problem with a regexp stringresponse or a choicetextresponse in
+# the test courses.
+STRING_REGEXP_XML = u"""
+<problem>
+  <p>Which US state has Lansing as its capital?</p>
+  <stringresponse answer="^(the state of )?michigan$" type="ci regexp">
+    <additional_answer answer="MI"/>
+    <stringequalhint answer="Ohio">Columbus is the capital of Ohio.</stringequalhint>
+    <regexphint answer="^w">Wisconsin's capital is Madison.</regexphint>
+    <textline size="20"/>
+  </stringresponse>
+</problem>
+"""
+
+CHOICE_TEXT_XML = u"""
+<problem>
+  <p>What is the area of a circle of radius 2?</p>
+  <choicetextresponse>
+    <radiotextgroup>
+      <choice correct="true">It's <numtolerance_input answer="12.566" tolerance="0.01"/></choice>
+      <choice correct="false">It can't be computed</choice>
+    </radiotextgroup>
+  </choicetextresponse>
+</problem>
+"""
+
+JSINPUT_ANSWER = u'{{"answer": "{{\\"cylinder\\": {}, \\"cube\\": false}}", "state": "{{}}"}}'
+
+# Map of case names to (problem XML file in DATA_DIR or problem XML, submissions).
+CASES = {
+    'choice': ('manual-testing-complete/problem/a473cecce312487a8339995bde24be53.xml', [
+        {'1_2_1': ['choice_0', 'choice_2']},
+        {'1_2_1': ['choice_1']},
+        {'1_2_1': ['choice_0']},
+    ]),
+    'multiple_choice': ('manual-testing-complete/problem/a5ca9b0f09cc4798bb53e5840e625301.xml', [
+        {'1_2_1': 'choice_1'},
+        {'1_2_1': 'choice_0'},
+    ]),
+    'option': ('manual-testing-complete/problem/427a1515100a4d08b959ba5852a1630d.xml', [
+        {'1_2_1': 'true'},
+        {'1_2_1': 'false'},
+    ]),
+    'numerical': ('manual-testing-complete/problem/9497fab9cc6f4187ba17d23731b614bf.xml', [
+        {'1_2_1': '5'},
+        {'1_2_1': '2 + 3'},
+        {'1_2_1': '4.5'},
+    ]),
+    'string_regexp': (STRING_REGEXP_XML, [
+        {'1_2_1': 'Michigan'},
+        {'1_2_1': 'the state of michigan'},
+        {'1_2_1': 'Ohio'},
+        {'1_2_1': 'Wisconsin'},
+    ]),
+    'formula': ('manual-testing-complete/problem/b6b80c6b383f4c3c80efc32b968368dc.xml', [
+        {'1_2_1': 'm*c^2', '1_3_1': 'R_1*R_2/R_3'},
+        {'1_2_1': 'c^2*m', '1_3_1': 'R_1/R_3*R_2'},
+        {'1_2_1': 'm*c', '1_3_1': 'R_1 + R_2'},
+    ]),
+    'custom': ('manual-testing-complete/problem/35501134637b4c2b8cfe07ba5e6492bb.xml', [
+        {'1_2_1': JSINPUT_ANSWER.format('true')},
+        {'1_2_1': JSINPUT_ANSWER.format('false')},
+    ]),
+    'symbolic': ('simple/problem/L1_Problem_1.xml', [
+        {'1_2_1': '4'},
+        {'1_2_1': '3'},
+    ]),
+    'image': ('manual-testing-complete/problem/8a5a7653bf804a968c17d398cb91aa4e.xml', [
+        {'1_2_1': '[400,150]'},
+        {'1_2_1': '[100,100]'},
+    ]),
+    'choice_text': (CHOICE_TEXT_XML, [
+        {'1_2_1': {'1_2_1_choiceinput_0bc': 'choiceinput_0', '1_2_1_choiceinput_0_numtolerance_input_0': '12.566'}},
+        {'1_2_1': {'1_2_1_choiceinput_0bc': 'choiceinput_0', '1_2_1_choiceinput_0_numtolerance_input_0': '4'}},
+        {'1_2_1': {'1_2_1_choiceinput_1bc': 'choiceinput_1'}},
+    ]),
+}
+
+# Numbers of submissions to grade.
+SUBMISSION_COUNTS = (1, 10, 1000)
+
+# Number of times to parse and render each problem.
+NUMBER = 20
+
+
+def load_problem_xml(source):
+    """
+    Return the problem XML of a case, loading it from DATA_DIR if it's a file.
+    """
+    if source.lstrip().startswith(u'<'):
+        return source
+    with io.open(os.path.join(DATA_DIR, source), encoding='utf-8') as problem_file:
+        return problem_file.read()
+
+
+def new_problem(problem_xml):
+    """
+    Return a new LoncapaProblem for the given XML, rendered with the real
+    templates and executing its code in this process.
+    """
+    capa_system = test_capa_system(render_template=capa_render_template)
+    capa_system.can_execute_unsafe_code = lambda: True
+    return LoncapaProblem(problem_xml, id='1', seed=1, capa_system=capa_system, capa_module=mock_capa_module())
+
+
+def parser(problem_xml):
+    """
+    Return a function building a new problem for the given XML, parsing it
+    again each time rather than copying it from the parsed problem cache.
+    """
+    def parse():
+        capa_problem._parsed_problem_cache.clear()
+        new_problem(problem_xml)
+    return parse
+
+
+def grader(problem_xml, submissions, count):
+    """
+    Return a function grading `count` of the submissions to a new problem.
+    """
+    problem = new_problem(problem_xml)
+    answers = [submissions[index % len(submissions)] for index in range(count)]
+
+    def grade():
+        for student_answers in answers:
+            problem.grade_answers(student_answers)
+    return grade
+
+
+def run():
+    """
+    Return the time, in milliseconds, of parsing, rendering and grading each
+    case.
+    """
+    results = {}
+    for name, (source, submissions) in sorted(CASES.items()):
+        problem_xml = load_problem_xml(source)
+        problem = new_problem(problem_xml)
+        results[name] = {
+            'parse': round(measure(parser(problem_xml), NUMBER) / NUMBER, 3),
+            'parse_cached': round(measure(lambda: new_problem(problem_xml), NUMBER) / NUMBER, 3),
+            'get_html': round(measure(problem.get_html, NUMBER) / NUMBER, 3),
+        }
+        for count in SUBMISSION_COUNTS:
+            results[name]['grade_{}'.format(count)] = round(measure(grader(problem_xml, submissions, count), 1), 3)
+    return results
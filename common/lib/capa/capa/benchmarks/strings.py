@@ -0,0 +1,78 @@
+"""
+Benchmark of matching StringResponse submissions against their answers.
+
+Each case is a list of accepted answers, as in the answer and
+additional_answer attributes of a <stringresponse>, matched with each of a
+list of submissions in two ways:
+
+ - per_submission: joining and compiling the answers for each submission, as
+   StringResponse used to.
+ - matcher: with the StringMatcher of the answers.
+"""
+
+
+import re
+
+from capa import string_matcher
+from capa.benchmarks import measure
+
+# Accepted spellings of US state names and their abbreviations.
+STATES = [
+    u'Alabama', u'Alaska', u'Arizona', u'Arkansas', u'California', u'Colorado', u'Connecticut', u'Delaware',
+    u'Florida', u'Georgia', u'Hawaii', u'Idaho', u'Illinois', u'Indiana', u'Iowa', u'Kansas', u'Kentucky',
+    u'Louisiana', u'Maine', u'Maryland', u'Massachusetts', u'Michigan', u'Minnesota', u'Mississippi',
+    u'Missouri', u'Montana', u'Nebraska', u'Nevada', u'New Hampshire', u'New Jersey', u'New Mexico',
+    u'New York', u'North Carolina', u'North Dakota', u'Ohio', u'Oklahoma', u'Oregon', u'Pennsylvania',
+    u'Rhode Island', u'South Carolina', u'South Dakota', u'Tennessee', u'Texas', u'Utah', u'Vermont',
+    u'Virginia', u'Washington', u'West Virginia', u'Wisconsin', u'Wyoming',
+]
+
+SUBMISSIONS = [u'Michigan', u'michigan', u'the state of Michigan', u'Wyoming', u'Ontario', u'MI']
+
+# Map of case names to (answers, regexp, case insensitivity).  Exact answers
+# aren't compiled, since StringResponse only has to look the submission up in
+# them.
+CASES = {
+    'ci': (STATES, False, True),
+    'regexp': ([u'(the state of )?{}'.format(state) for state in STATES], True, False),
+    'ci_regexp': ([u'(the state of )?{}'.format(state) for state in STATES], True, True),
+}
+
+# Number of times to match the submissions of each case.
+NUMBER = 200
+
+
+def _check_string(expected, given, regexp, case_insensitive):
+    """
+    Return whether `given` matches `expected`, as StringResponse.check_string
+    used to.
+    """
+    if regexp:
+        flags = re.IGNORECASE if case_insensitive else 0
+        return bool(re.search(re.compile('^' + '|'.join(expected) + '$', flags=flags | re.UNICODE), given))
+    if case_insensitive:
+        return given.lower() in [i.lower() for i in expected]
+    return given in expected
+
+
+def run():
+    """
+    Return the time, in milliseconds, of matching the submissions of each case
+    in each way.
+    """
+    results = {}
+    for name, (answers, regexp, case_insensitive) in sorted(CASES.items()):
+
+        def match_per_submission():
+            for given in SUBMISSIONS:
+                _check_string(answers, given, regexp, case_insensitive)
+
+        def match_matcher():
+            for given in SUBMISSIONS:
+                string_matcher.get_matcher(answers, regexp, case_insensitive).matches(given)
+
+        results[name] = {
+            way: round(measure(match, NUMBER) / NUMBER, 4)
+            for way, match in (('per_submission', match_per_submission), ('matcher', match_matcher))
+        }
+    return results
@@ -14,9 +14,11 @@ This is used by capa_module.
 """
 
 
+import hashlib
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -75,6 +77,18 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# Version of the seed-independent preprocessing of problem XML, which is part of
+# the key of the parsed problem cache.  Bump it whenever that preprocessing changes.
+PARSED_PROBLEM_CACHE_VERSION = 1
+
+# Maximum number of parsed problems to cache per process.
+PARSED_PROBLEM_CACHE_SIZE = 512
+
+# Map of (cache version, problem id, problem XML hash) to the parsed problem tree
+# and its a11y data, in least recently used order.
+_parsed_problem_cache = OrderedDict()
+_parsed_problem_cache_lock = threading.Lock()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -183,16 +197,11 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
+        # parse problem XML file into an element tree, with ID's and a11y data assigned
         if isinstance(problem_text, six.text_type):
             # etree chokes on Unicode XML with an encoding declaration
             problem_text = problem_text.encode('utf-8')
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        self.tree, self.problem_data = self._parse_problem(problem_text)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -200,11 +209,9 @@ class LoncapaProblem(object):
         else:
             self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self.problem_data = self._preprocess_problem(self.tree, minimal_init)
+        # Create the dict (self.responders) of Response instances for each question
+        # in the problem. The dict has keys = xml subtree of Response, values = Response instance
+        self._create_responders(self.tree, minimal_init)
 
         if not minimal_init:
             if not self.student_answers:  # True when student_answers is an empty dict
@@ -757,6 +764,47 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse_problem(self, problem_text):
+        """
+        Parse the problem XML into an element tree, handle its includes and assign
+        ID's and a11y data to its responses and inputs.
+
+        None of this depends on the seed or the learner's state, so the result is
+        cached per process, keyed on the problem XML, and each problem gets its own
+        copy of the cached tree.  Problems with includes aren't cached, since the
+        included files can change without the problem XML changing.
+
+        Returns:
+            tuple of the element tree and the dict of a11y data of each input.
+        """
+        cache_key = (PARSED_PROBLEM_CACHE_VERSION, self.problem_id, hashlib.sha1(problem_text).hexdigest())
+        with _parsed_problem_cache_lock:
+            cached = _parsed_problem_cache.pop(cache_key, None)
+            if cached is not None:
+                # Re-insert the entry to mark it as the most recently used.
+                _parsed_problem_cache[cache_key] = cached
+        if cached is not None:
+            tree, problem_data = cached
+            return deepcopy(tree), deepcopy(problem_data)
+
+        self.tree = etree.XML(problem_text)
+
+        self.make_xml_compatible(self.tree)
+
+        # handle any <include file="foo"> tags
+        has_includes = self.tree.find('.//include') is not None
+        self._process_includes()
+
+        problem_data = self._assign_ids(self.tree)
+
+        if not has_includes:
+            with _parsed_problem_cache_lock:
+                _parsed_problem_cache[cache_key] = (deepcopy(self.tree), deepcopy(problem_data))
+                while len(_parsed_problem_cache) > PARSED_PROBLEM_CACHE_SIZE:
+                    _parsed_problem_cache.popitem(last=False)
+
+        return self.tree, problem_data
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -1020,20 +1068,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree, minimal_init):  # private
+    def _assign_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns the a11y data of each entry, keyed by its ID.
         """
         response_id = 1
         problem_data = {}
-        self.responders = {}
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -1041,11 +1085,7 @@ class LoncapaProblem(object):
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in input_tags]),
-                id=responsetype_id
-            )
+            inputfields = self._get_inputfields(tree, response)
 
             # assign one answer_id for each input type
             for entry in inputfields:
@@ -1056,6 +1096,30 @@ class LoncapaProblem(object):
 
             self.response_a11y_data(response, inputfields, responsetype_id, problem_data)
 
+        return problem_data
+
+    def _get_inputfields(self, tree, response):  # private
+        """
+        Returns the entries (textline, schematic, etc.) of the given response.
+        """
+        input_tags = inputtypes.registry.registered_tags()
+        return tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in input_tags]),
+            id=response.get('id')
+        )
+
+    def _create_responders(self, tree, minimal_init):  # private
+        """
+        Create capa Response instances for each responsetype and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+
+        The responses and their entries must already have IDs assigned.
+        """
+        self.responders = {}
+        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+            inputfields = self._get_inputfields(tree, response)
+
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(
@@ -1084,8 +1148,6 @@ class LoncapaProblem(object):
                 solution.attrib['id'] = "%s_solution_%i" % (self.problem_id, solution_id)
                 solution_id += 1
 
-        return problem_data
-
     def response_a11y_data(self, response, inputfields, responsetype_id, problem_data):
         """
         Construct data to be used for a11y.
@@ -0,0 +1,198 @@
+"""
+Compiled math expressions for FormulaResponse and NumericalResponse.
+
+calc.evaluator parses its expression with pyparsing each time it's called,
+which is most of the time spent evaluating it, and FormulaResponse evaluates
+both the instructor's and the learner's expressions at each of its sample
+points.  Here each distinct expression is parsed once per process, into a
+CompiledFormula that evaluates the parse as calc.evaluator would, and that
+can also evaluate it at all sample points at once with numpy arrays.
+"""
+
+
+import operator
+import threading
+from collections import OrderedDict
+from functools import reduce
+
+import numpy
+import six
+from calc import calc
+
+# Maximum number of compiled expressions to cache per process.
+COMPILED_FORMULA_CACHE_SIZE = 2048
+
+# Map of (expression, case sensitivity) to its CompiledFormula, in least
+# recently used order.
+_compiled_formulas = OrderedDict()
+_compiled_formulas_lock = threading.Lock()
+
+
+def _is_operator(token):
+    """
+    Return whether `token`, in a list of evaluated parse results, is an
+    operator or parenthesis rather than a value.
+    """
+    return isinstance(token, six.string_types)
+
+
+# The following evaluation actions are the same as those of calc, except
+# that they accept numpy arrays as values, which aren't numbers.Number.
+
+def _eval_atom(parse_result):
+    """
+    Return the value wrapped by the atom, ignoring parentheses.
+    """
+    return next(k for k in parse_result if not _is_operator(k))
+
+
+def _eval_power(parse_result):
+    """
+    Exponentiate the values, right to left.
+    """
+    values = [k for k in parse_result if not _is_operator(k)]
+    return reduce(lambda a, b: b ** a, reversed(values))
+
+
+def _eval_parallel(parse_result):
+    """
+    Combine the values with the parallel resistors operator.
+    """
+    values = [k for k in parse_result if not _is_operator(k)]
+    if len(values) == 1:
+        return values[0]
+    return 1. / sum(1. / value for value in values)
+
+
+def _eval_sum(parse_result):
+    """
+    Add the values, keeping in mind their sign.
+    """
+    total = 0
+    add = True
+    for token in parse_result:
+        if _is_operator(token):
+            add = token == '+'
+        else:
+            total = total + token if add else total - token
+    return total
+
+
+def _eval_product(parse_result):
+    """
+    Multiply the values, dividing by those following a '/'.
+    """
+    prod = 1
+    multiply = True
+    for token in parse_result:
+        if _is_operator(token):
+            multiply = token == '*'
+        else:
+            prod = prod * token if multiply else operator.truediv(prod, token)
+    return prod
+
+
+class CompiledFormula(object):
+    """
+    A math expression parsed by calc, ready to be evaluated.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        """
+        Parse `math_expr`, raising the same exceptions as calc.evaluator
+        for expressions that can't be parsed.
+        """
+        calc.check_parens(math_expr)
+        self.case_sensitive = case_sensitive
+        self._parse = calc.ParseAugmenter(math_expr, case_sensitive)
+        self._parse.parse_algebra()
+
+    def evaluate(self, variables, unary_functions):
+        """
+        Evaluate the expression, as calc.evaluator does.
+        """
+        all_variables, all_functions = self._get_names(variables, unary_functions)
+        return self._reduce(all_variables, all_functions, {
+            'atom': calc.eval_atom,
+            'power': calc.eval_power,
+            'parallel': calc.eval_parallel,
+            'product': calc.eval_product,
+            'sum': calc.eval_sum,
+        })
+
+    def evaluate_samples(self, samples, unary_functions):
+        """
+        Evaluate the expression at all the given sample points at once, and
+        return the list of its values at each.
+
+        `samples` is a list of dicts of variables to their values, all with
+        the same variables.
+
+        Raises an exception whenever a floating point error occurs at any
+        sample point, or a function doesn't support numpy arrays, in which
+        case the expression should be evaluated at each sample point instead.
+        """
+        names = list(samples[0]) if samples else []
+        variables = {name: numpy.array([sample[name] for sample in samples]) for name in names}
+        all_variables, all_functions = self._get_names(variables, unary_functions)
+        with numpy.errstate(all='raise'):
+            result = self._reduce(all_variables, all_functions, {
+                'atom': _eval_atom,
+                'power': _eval_power,
+                'parallel': _eval_parallel,
+                'product': _eval_product,
+                'sum': _eval_sum,
+            })
+
+        if numpy.ndim(result) == 0:
+            return [result] * len(samples)
+        return numpy.asarray(result).tolist()
+
+    def _get_names(self, variables, unary_functions):
+        """
+        Return the variables and functions available to the expression,
+        raising calc.UndefinedVariable if it uses any others.
+        """
+        all_variables, all_functions = calc.add_defaults(variables, unary_functions, self.case_sensitive)
+        self._parse.check_variables(all_variables, all_functions)
+        return all_variables, all_functions
+
+    def _reduce(self, all_variables, all_functions, actions):
+        """
+        Evaluate the parse with the given actions for its operators.
+        """
+        casify = (lambda x: x) if self.case_sensitive else (lambda x: x.lower())
+        actions = dict(
+            actions,
+            number=calc.eval_number,
+            variable=lambda x: all_variables[casify(x[0])],
+            function=lambda x: all_functions[casify(x[0])](x[1]),
+        )
+        return self._parse.reduce_tree(actions)
+
+
+def compile_formula(math_expr, case_sensitive=False):
+    """
+    Return the CompiledFormula of `math_expr`, compiling it if it isn't cached.
+    """
+    key = (math_expr, case_sensitive)
+    with _compiled_formulas_lock:
+        compiled = _compiled_formulas.pop(key, None)
+        if compiled is not None:
+            _compiled_formulas[key] = compiled
+            return compiled
+
+    compiled = CompiledFormula(math_expr, case_sensitive)
+    with _compiled_formulas_lock:
+        _compiled_formulas[key] = compiled
+        while len(_compiled_formulas) > COMPILED_FORMULA_CACHE_SIZE:
+            _compiled_formulas.popitem(last=False)
+    return compiled
+
+
+def evaluator(variables, unary_functions, math_expr, case_sensitive=False):
+    """
+    Evaluate `math_expr` as calc.evaluator does, compiling it only once.
+    """
+    if math_expr.strip() == "":
+        return float('nan')
+    return compile_formula(math_expr, case_sensitive).evaluate(variables, unary_functions)
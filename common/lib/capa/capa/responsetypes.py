@@ -34,7 +34,7 @@ import numpy
 import requests
 import six
 # specific library imports
-from calc import UndefinedVariable, UnmatchedParenthesis, evaluator
+from calc import UndefinedVariable, UnmatchedParenthesis
 from django.utils.encoding import python_2_unicode_compatible
 from lxml import etree
 from lxml.html.soupparser import fromstring as fromstring_bs  # uses Beautiful Soup!!! FIXME?
@@ -46,6 +46,8 @@ from six.moves import map, range, zip
 
 import capa.safe_exec as safe_exec
 import capa.xqueue_interface as xqueue_interface
+from capa.compiled_formula import compile_formula, evaluator
+from capa.string_matcher import get_matcher
 from openedx.core.djangolib.markup import HTML, Text
 from openedx.core.lib import edx_six
 from openedx.core.lib.grade_utils import round_away_from_zero
@@ -1993,21 +1995,11 @@ class StringResponse(LoncapaResponse):
         if not answer:
             return False
 
-        if regex_mode:
-            flags = 0
-            if ci_mode:
-                flags = re.IGNORECASE
-            try:
-                # We follow the check_string convention/exception, adding ^ and $
-                regex = re.compile('^' + answer + '$', flags=flags | re.UNICODE)
-                return re.search(regex, given)
-            except Exception:  # pylint: disable=broad-except
-                return False
-
-        if ci_mode:
-            return answer.lower() == given.lower()
-        else:
-            return answer == given
+        try:
+            # We follow the check_string convention/exception, adding ^ and $
+            return get_matcher([answer], regex_mode, ci_mode).matches(given)
+        except Exception:  # pylint: disable=broad-except
+            return False
 
     def check_string(self, expected, given):
         """
@@ -2038,24 +2030,21 @@ class StringResponse(LoncapaResponse):
             return self.check_string_backward(expected, given)
         # end of backward compatibility
 
-        if self.regexp:  # regexp match
-            flags = re.IGNORECASE if self.case_insensitive else 0
-            try:
-                regexp = re.compile('^' + '|'.join(expected) + '$', flags=flags | re.UNICODE)
-                result = re.search(regexp, given)
-            except Exception as err:
-                msg = u'[courseware.capa.responsetypes.stringresponse] {error}: {message}'.format(
-                    error=_('error'),
-                    message=text_type(err)
-                )
-                log.error(msg, exc_info=True)
-                raise ResponseError(msg)
-            return bool(result)
-        else:  # string match
-            if self.case_insensitive:
-                return given.lower() in [i.lower() for i in expected]
-            else:
-                return given in expected
+        if not self.regexp and not self.case_insensitive:
+            return given in expected
+
+        # Regular expressions and lowercased answers are compiled once per
+        # process rather than for each submission.
+        try:
+            matcher = get_matcher(expected, self.regexp, self.case_insensitive)
+        except Exception as err:
+            msg = u'[courseware.capa.responsetypes.stringresponse] {error}: {message}'.format(
+                error=_('error'),
+                message=text_type(err)
+            )
+            log.error(msg, exc_info=True)
+            raise ResponseError(msg)
+        return matcher.matches(given)
 
     def check_hint_condition(self, hxml_set, student_answers):
         given = student_answers[self.answer_id].strip()
@@ -3151,6 +3140,19 @@ class FormulaResponse(LoncapaResponse):
                 )
         return out
 
+    def evaluate_samples(self, answer, var_dict_list):
+        """
+        Returns the list of values of the answer for each of the dictionaries
+        of variables, as tupleize_answers does.
+
+        The answer is evaluated at all sample points at once if it can be,
+        otherwise by tupleize_answers, which also reports any errors in it.
+        """
+        try:
+            return compile_formula(answer, self.case_sensitive).evaluate_samples(var_dict_list, {})
+        except Exception:  # pylint: disable=broad-except
+            return self.tupleize_answers(answer, var_dict_list)
+
     def randomize_variables(self, samples):
         """
         Returns a list of dictionaries mapping variables to random values in range,
@@ -3179,8 +3181,8 @@ class FormulaResponse(LoncapaResponse):
         "correct" or "incorrect".
         """
         var_dict_list = self.randomize_variables(samples)
-        student_result = self.tupleize_answers(given, var_dict_list)
-        instructor_result = self.tupleize_answers(expected, var_dict_list)
+        student_result = self.evaluate_samples(given, var_dict_list)
+        instructor_result = self.evaluate_samples(expected, var_dict_list)
 
         correct = all(compare_with_tolerance(student, instructor, self.tolerance)
                       for student, instructor in zip(student_result, instructor_result))
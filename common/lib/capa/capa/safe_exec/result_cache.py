@@ -0,0 +1,179 @@
+"""
+Two-tier cache of the results of executing code with safe_exec.
+
+Results are cached in a least recently used cache in the process, in front of
+a cache shared by all processes, such as memcached.  Executing the code of a
+problem is expensive, while its result only depends on the code, the globals
+and the random seed, and the seeds of most problems are limited to a small
+number of randomization bins.  So the results of popular problems are nearly
+always cached.
+"""
+
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+try:
+    import newrelic.agent
+except ImportError:
+    newrelic = None  # pylint: disable=invalid-name
+
+# Prefix of the keys of results in the shared cache.  Bump its version whenever
+# the format of the cached entries changes.
+SHARED_CACHE_KEY_PREFIX = u'safe_exec_result.v1.'
+
+# Maximum number of results to cache per process.
+PROCESS_CACHE_SIZE = 1024
+
+# Maximum size of a cached result, in bytes of its JSON serialization.  Larger
+# results aren't worth the memory and network they'd take up in the caches.
+MAX_RESULT_SIZE = 64 * 1024
+
+# Maximum number of problems to keep cache statistics for per process.
+STATS_SIZE = 1024
+
+# Map of cache keys to (JSON serialized result, execution time) pairs, in least
+# recently used order.  Results are kept serialized so that every hit decodes
+# its own copy: the results are merged into the globals of the problem of each
+# learner, which must not share any mutable value.
+_process_cache = OrderedDict()
+
+# Map of problem slugs to their cache statistics, in least recently used order.
+_stats = OrderedDict()
+
+_lock = threading.Lock()
+
+
+class SafeExecResultCache(object):
+    """
+    Cache of safe_exec results for a problem, with the .get(key) and
+    .set(key, value) methods safe_exec expects of its cache.
+
+    Along with each result, the time spent to compute it is cached, so that
+    the sandbox time saved by cache hits can be recorded.
+    """
+    def __init__(self, shared_cache, slug=None, timeout=None):
+        """
+        Arguments:
+            shared_cache: the cache shared by all processes, with Django's
+                cache API.
+            slug (str): the problem whose results are cached, for statistics.
+            timeout (int): the timeout of results in the shared cache, or None
+                to use its default timeout.
+        """
+        self.shared_cache = shared_cache
+        self.slug = slug
+        self.timeout = timeout
+        # Map of cache keys that missed to the time of the miss, to compute
+        # the time spent on the results set for them.
+        self._misses = {}
+
+    def get(self, key):
+        """
+        Returns the result cached for the given key, or None.
+        """
+        with _lock:
+            process_entry = _process_cache.pop(key, None)
+            if process_entry is not None:
+                _process_cache[key] = process_entry
+
+        if process_entry is not None:
+            serialized_result, exec_time = process_entry
+            result = json.loads(serialized_result)
+        else:
+            # The shared cache returns a copy of its entry on every get.
+            entry = self.shared_cache.get(SHARED_CACHE_KEY_PREFIX + key)
+            if entry is None:
+                self._misses[key] = time.time()
+                self._record(misses=1)
+                return None
+            result, exec_time = entry
+            _set_process_entry(key, (json.dumps(result), exec_time))
+
+        self._record(hits=1, time_saved=exec_time)
+        return result
+
+    def set(self, key, value):
+        """
+        Caches the given result for the key, unless it's too large.
+        """
+        miss_time = self._misses.pop(key, None)
+        exec_time = time.time() - miss_time if miss_time is not None else 0.0
+
+        serialized_value = json.dumps(value)
+        result_size = len(serialized_value)
+        if result_size > MAX_RESULT_SIZE:
+            log.info(
+                u'Not caching safe_exec result of %d bytes for %s',
+                result_size,
+                self.slug,
+            )
+            self._record(too_large=1)
+            return
+
+        _set_process_entry(key, (serialized_value, exec_time))
+        entry = (value, exec_time)
+        if self.timeout is None:
+            self.shared_cache.set(SHARED_CACHE_KEY_PREFIX + key, entry)
+        else:
+            self.shared_cache.set(SHARED_CACHE_KEY_PREFIX + key, entry, self.timeout)
+
+    def _record(self, **increments):
+        """
+        Adds the given increments to the cache statistics of the problem and
+        reports them as custom metrics of the current transaction.
+        """
+        with _lock:
+            stats = _stats.pop(self.slug, None) or {u'hits': 0, u'misses': 0, u'too_large': 0, u'time_saved': 0.0}
+            for name, increment in increments.items():
+                stats[name] += increment
+            _stats[self.slug] = stats
+            while len(_stats) > STATS_SIZE:
+                _stats.popitem(last=False)
+            stats = dict(stats)
+
+        if newrelic:
+            for name, value in stats.items():
+                newrelic.agent.add_custom_parameter(u'safe_exec.cache_{}'.format(name), value)
+
+
+def _set_process_entry(key, entry):
+    """
+    Adds the given entry to the process cache, evicting the least recently
+    used entries if it's full.
+    """
+    with _lock:
+        _process_cache.pop(key, None)
+        _process_cache[key] = entry
+        while len(_process_cache) > PROCESS_CACHE_SIZE:
+            _process_cache.popitem(last=False)
+
+
+def get_cache_stats():
+    """
+    Returns the cache statistics of the problems whose code was executed in
+    this process, as a dict of problem slugs to dicts with the number of
+    hits, misses and results too large to cache, the hit rate, and the
+    sandbox time saved by hits, in seconds.
+    """
+    with _lock:
+        all_stats = {slug: dict(stats) for slug, stats in _stats.items()}
+
+    for stats in all_stats.values():
+        lookups = stats[u'hits'] + stats[u'misses']
+        stats[u'hit_rate'] = float(stats[u'hits']) / lookups if lookups else 0.0
+    return all_stats
+
+
+def clear_cache():
+    """
+    Clears the process cache and the cache statistics.
+    """
+    with _lock:
+        _process_cache.clear()
+        _stats.clear()
@@ -2,6 +2,7 @@
 
 
 import hashlib
+import json
 
 from codejail.safe_exec import SafeExecException, json_safe
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
@@ -9,7 +10,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 import six
 from six import text_type
 
-from . import lazymod
+from . import lazymod, worker_pool
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -55,6 +56,9 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The modules the workers of the worker pool import when they start.
+WORKER_PRELOAD_MODULES = ["random2", "six"] + [modname for _, modname in ASSUMED_IMPORTS]
+
 
 def update_hash(hasher, obj):
     """
@@ -79,6 +83,21 @@ def update_hash(hasher, obj):
         hasher.update(six.b(repr(obj)))
 
 
+def hash_code_and_globals(code, safe_globals):
+    """
+    Returns a hex digest of `code` and `safe_globals`, as returned by `json_safe`.
+
+    `safe_globals` only contains JSON types with string keys, so sorting its keys
+    while serializing it to JSON canonicalizes it at every level, which is much
+    faster than walking it with `update_hash`.
+
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code).encode('utf-8'))
+    md5er.update(json.dumps(safe_globals, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return md5er.hexdigest()
+
+
 def safe_exec(
     code,
     globals_dict,
@@ -107,7 +126,7 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  See `result_cache.SafeExecResultCache`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -117,11 +136,7 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code).encode('utf-8'))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+        key = "safe_exec.%r.%s" % (random_seed, hash_code_and_globals(code, json_safe(globals_dict)))
         cached = cache.get(key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
@@ -139,7 +154,8 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        pool = worker_pool.get_worker_pool(WORKER_PRELOAD_MODULES)
+        exec_fn = pool.safe_exec if pool is not None else codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
@@ -0,0 +1,201 @@
+"""
+The code run by the sandboxed worker processes of the safe_exec worker pool.
+
+This module isn't imported: worker_pool.py reads its source, adds codejail's
+`json_safe` function, and runs it with the sandboxed Python, just as codejail
+runs the code it wraps around each piece of jailed code.
+
+A worker imports the modules that jailed code commonly uses when it starts,
+then runs one job in a child process forked from it, and exits.  The job
+runs in a child so that the worker can enforce the real time limit of the job
+and reply with its outcome.  Workers run as the same user as the jailed code,
+so a worker never runs a second job, which that code could have tampered with.
+
+Messages are exchanged with the pool over stdin and stdout, each one a JSON
+document preceded by its length as a 4-byte big-endian integer.  The first
+message received configures the worker:
+
+    {"preload": [module names], "rlimits": [[limit, [soft, hard]]], "realtime": seconds}
+
+The worker replies with {"ready": true}, then reads a job, [code, globals],
+and replies to it with {"status": int, "stdout": str, "stderr": str, "timed_out": bool}.
+
+"""
+
+import json
+import os
+import resource
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+
+import six  # pylint: disable=unused-import  # Used by codejail's json_safe.
+
+# Seconds between checks of whether the child running a job has exited.
+POLL_INTERVAL = 0.05
+
+# Seconds to wait for a killed child to exit.
+REAP_TIMEOUT = 5
+
+
+class DevNull(object):
+    """
+    A file-like object that discards its output, so that jailed code can't
+    write to stdout.
+    """
+    def write(self, *args, **kwargs):
+        pass
+
+    def flush(self, *args, **kwargs):
+        pass
+
+
+def read_message(stream):
+    """
+    Return the next message read from `stream`, or None if it's closed.
+    """
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    length, = struct.unpack('>I', header)
+    return json.loads(stream.read(length).decode('utf-8'))
+
+
+def write_message(stream, message):
+    """
+    Write `message` to `stream`.
+    """
+    data = json.dumps(message).encode('utf-8')
+    stream.write(struct.pack('>I', len(data)) + data)
+    stream.flush()
+
+
+def run_child(code, g_dict, rlimits, stdout_fd, stderr_fd):
+    """
+    Run `code` with the globals `g_dict` in a forked child process, writing
+    its resulting globals to `stdout_fd` and any error to `stderr_fd`.
+
+    The child stays in the process group of the worker, which the pool kills
+    once the worker has replied, along with any process the child started.
+    """
+    status = 0
+    output = b''
+    try:
+        # Keep the jailed code away from the pipes to the pool.
+        os.close(0)
+        os.dup2(stderr_fd, 1)
+        os.dup2(stderr_fd, 2)
+        for limit, value in rlimits:
+            resource.setrlimit(limit, tuple(value))
+        sys.stdout = DevNull()
+        exec(code, g_dict)  # pylint: disable=exec-used
+        output = json.dumps(json_safe(g_dict)).encode('utf-8')  # pylint: disable=undefined-variable
+    except BaseException:  # pylint: disable=broad-except
+        status = 1
+        traceback.print_exc()
+        sys.stderr.flush()
+
+    while output:
+        output = output[os.write(stdout_fd, output):]
+    os._exit(status)  # pylint: disable=protected-access
+
+
+def reap_child(pid, timeout=0):
+    """
+    Return the wait status of the child process `pid` once it has exited,
+    waiting `timeout` seconds at most, or None if it's still running.
+    """
+    deadline = time.time() + timeout
+    while True:
+        reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+        if reaped_pid:
+            return status
+        if time.time() >= deadline:
+            return None
+        time.sleep(POLL_INTERVAL)
+
+
+def run_job(code, g_dict, rlimits, realtime):
+    """
+    Run a job in a new child process and return the reply to it.
+    """
+    stdout_read, stdout_write = os.pipe()
+    stderr_read, stderr_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(stdout_read)
+        os.close(stderr_read)
+        run_child(code, g_dict, rlimits, stdout_write, stderr_write)
+    os.close(stdout_write)
+    os.close(stderr_write)
+
+    # Read the output of the child until it has exited and its output is
+    # drained, or until the deadline.  The jailed code can close its pipes
+    # and carry on, so whether the child has exited is checked separately.
+    outputs = {stdout_read: [], stderr_read: []}
+    open_fds = list(outputs)
+    deadline = time.time() + realtime
+    status = None
+    while True:
+        timeout = min(max(deadline - time.time(), 0), POLL_INTERVAL)
+        readable = select.select(open_fds, [], [], timeout)[0]
+        for fd in readable:
+            data = os.read(fd, 65536)
+            if data:
+                outputs[fd].append(data)
+            else:
+                open_fds.remove(fd)
+        if status is None:
+            status = reap_child(pid)
+        if (status is not None and not readable) or time.time() >= deadline:
+            break
+
+    timed_out = status is None
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+        status = reap_child(pid, REAP_TIMEOUT)
+    os.close(stdout_read)
+    os.close(stderr_read)
+
+    if status is None or os.WIFSIGNALED(status):
+        status = -(os.WTERMSIG(status) if status is not None else signal.SIGKILL)
+    else:
+        status = os.WEXITSTATUS(status)
+
+    return {
+        'status': status,
+        'stdout': b''.join(outputs[stdout_read]).decode('utf-8', 'replace'),
+        'stderr': b''.join(outputs[stderr_read]).decode('utf-8', 'replace'),
+        'timed_out': timed_out,
+    }
+
+
+def main():
+    """
+    Run the job read from stdin.
+    """
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+
+    config = read_message(stdin)
+    if config is None:
+        return
+
+    # As in safe_exec's CODE_PROLOG, keep numpy from starting threads, which
+    # also wouldn't survive forking.
+    os.environ["OPENBLAS_NUM_THREADS"] = "1"
+    for modname in config['preload']:
+        try:
+            __import__(modname)
+        except Exception:  # pylint: disable=broad-except
+            pass
+    write_message(stdout, {'ready': True})
+
+    job = read_message(stdin)
+    if job is None:
+        return
+    code, g_dict = job
+    write_message(stdout, run_job(code, g_dict, config['rlimits'], config['realtime']))
@@ -12,10 +12,11 @@ import pytest
 import six
 from codejail.jail_code import is_configured
 from codejail.safe_exec import SafeExecException
+from mock import patch
 from six import text_type, unichr
 from six.moves import range
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import SafeExecResultCache, hash_code_and_globals, result_cache, safe_exec, update_hash
 
 
 class TestSafeExec(unittest.TestCase):
@@ -181,6 +182,107 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test the two-tier cache of safe_exec results."""
+
+    def setUp(self):
+        super(TestSafeExecResultCache, self).setUp()
+        result_cache.clear_cache()
+        self.addCleanup(result_cache.clear_cache)
+        self.shared = {}
+
+    def new_cache(self):
+        """Return a result cache for a problem, over the shared dict."""
+        return SafeExecResultCache(DictCache(self.shared), slug='problem')
+
+    def test_miss_then_hit(self):
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=self.new_cache())
+        self.assertEqual(g['a'], 3)
+        self.assertEqual(len(self.shared), 1)
+        key = list(self.shared.keys())[0]
+        self.assertTrue(key.startswith(result_cache.SHARED_CACHE_KEY_PREFIX))
+
+        # Hits in the process cache don't need the shared cache.
+        self.shared.clear()
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=self.new_cache())
+        self.assertEqual(g['a'], 3)
+
+        stats = result_cache.get_cache_stats()['problem']
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 0.5))
+
+    def test_shared_hit(self):
+        safe_exec("a = int(math.pi)", {}, cache=self.new_cache())
+        key = list(self.shared.keys())[0]
+        self.shared[key] = ((None, {'a': 17}), 2.5)
+
+        # Hits in the shared cache are cached in the process.
+        result_cache.clear_cache()
+        for _ in range(2):
+            g = {}
+            safe_exec("a = int(math.pi)", g, cache=self.new_cache())
+            self.assertEqual(g['a'], 17)
+            self.shared.clear()
+
+        stats = result_cache.get_cache_stats()['problem']
+        self.assertEqual((stats['hits'], stats['misses'], stats['time_saved']), (2, 0, 5.0))
+
+    @patch('capa.safe_exec.result_cache.time.time')
+    def test_time_saved(self, mock_time):
+        mock_time.side_effect = [10.0, 10.25]
+        cache = self.new_cache()
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', (None, {'a': 1}))
+        self.assertEqual(self.shared[result_cache.SHARED_CACHE_KEY_PREFIX + 'key'], ((None, {'a': 1}), 0.25))
+
+        # Results are decoded from JSON on process cache hits.
+        self.assertEqual(cache.get('key'), [None, {'a': 1}])
+        self.assertEqual(result_cache.get_cache_stats()['problem']['time_saved'], 0.25)
+
+    def test_results_not_shared(self):
+        safe_exec("a = [1, 2]", {}, cache=self.new_cache())
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=self.new_cache())
+        g['a'].append(3)
+
+        g = {}
+        safe_exec("a = [1, 2]", g, cache=self.new_cache())
+        self.assertEqual(g['a'], [1, 2])
+
+    @patch('capa.safe_exec.result_cache.MAX_RESULT_SIZE', 100)
+    def test_result_too_large(self):
+        g = {}
+        safe_exec("a = 'a' * 200", g, cache=self.new_cache())
+        self.assertEqual(len(g['a']), 200)
+        self.assertEqual(self.shared, {})
+        self.assertEqual(list(result_cache._process_cache.keys()), [])  # pylint: disable=protected-access
+        self.assertEqual(result_cache.get_cache_stats()['problem']['too_large'], 1)
+
+    @patch('capa.safe_exec.result_cache.PROCESS_CACHE_SIZE', 2)
+    def test_process_cache_eviction(self):
+        cache = self.new_cache()
+        for key in ('a', 'b', 'c'):
+            cache.set(key, (None, {}))
+        self.assertEqual(list(result_cache._process_cache.keys()), ['b', 'c'])  # pylint: disable=protected-access
+
+
+class TestHashCodeAndGlobals(unittest.TestCase):
+    """Test the safe_exec.hash_code_and_globals function to be sure it canonicalizes properly."""
+
+    def test_dict_ordering(self):
+        d1 = {k: [1, {'x': k}] for k in "abcdefghijklmnopqrstuvwxyz"}
+        d2 = {k: [1, {'x': k}] for k in reversed("abcdefghijklmnopqrstuvwxyz")}
+        self.assertNotEqual(list(d1.keys()), list(d2.keys()))
+        self.assertEqual(hash_code_and_globals("a = 1", d1), hash_code_and_globals("a = 1", d2))
+
+    def test_differences(self):
+        h1 = hash_code_and_globals("a = 1", {'a': [1, 2, 3]})
+        self.assertNotEqual(h1, hash_code_and_globals("a = 2", {'a': [1, 2, 3]}))
+        self.assertNotEqual(h1, hash_code_and_globals("a = 1", {'a': [3, 2, 1]}))
+        self.assertNotEqual(h1, hash_code_and_globals("a = 1", {'a': ['1', 2, 3]}))
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,149 @@
+"""Test the pool of sandboxed workers for safe_exec."""
+
+
+import json
+import sys
+import time
+import unittest
+
+from codejail.safe_exec import SafeExecException
+from mock import Mock, patch
+
+from capa.safe_exec import safe_exec
+from capa.safe_exec.worker_pool import (
+    SandboxWorker,
+    SandboxWorkerPool,
+    WorkerError,
+    WorkerTimeout,
+    configure_worker_pool,
+    get_worker_pool
+)
+
+# Run workers with the current Python rather than a sandboxed one.
+CMDLINE_START = [sys.executable, '-E', '-B']
+
+
+class TestSandboxWorker(unittest.TestCase):
+    """Test running jobs in a worker."""
+
+    def start_worker(self, realtime=1):
+        """Start a worker, to be stopped at the end of the test."""
+        worker = SandboxWorker(CMDLINE_START, None, ['json'], [], realtime)
+        self.addCleanup(worker.stop)
+        return worker
+
+    def test_run(self):
+        reply = self.start_worker().run("a = b + 1", {'b': 1})
+        self.assertEqual(reply['status'], 0)
+        self.assertEqual(json.loads(reply['stdout']), {'a': 2, 'b': 1})
+        self.assertFalse(reply['timed_out'])
+
+    def test_exception(self):
+        reply = self.start_worker().run("1/0", {})
+        self.assertEqual(reply['status'], 1)
+        self.assertIn("ZeroDivisionError", reply['stderr'])
+
+    def test_one_job(self):
+        worker = self.start_worker()
+        worker.run("a = 1", {})
+        worker.process.wait()
+        self.assertEqual(worker.process.returncode, 0)
+
+    def test_output_is_ignored(self):
+        reply = self.start_worker().run("import os\nprint('hi')\nos.write(1, b'hi')\na = 1", {})
+        self.assertEqual(json.loads(reply['stdout']), {'a': 1})
+
+    def test_realtime_limit(self):
+        reply = self.start_worker(realtime=0.5).run("while True: pass", {})
+        self.assertNotEqual(reply['status'], 0)
+        self.assertTrue(reply['timed_out'])
+
+    def test_realtime_limit_with_closed_output(self):
+        start = time.time()
+        reply = self.start_worker(realtime=0.5).run("import os, time\nos.closerange(0, 256)\ntime.sleep(60)", {})
+        self.assertNotEqual(reply['status'], 0)
+        self.assertTrue(reply['timed_out'])
+        self.assertLess(time.time() - start, 10)
+
+
+class TestSandboxWorkerPool(unittest.TestCase):
+    """Test running code with a pool of workers."""
+
+    def make_pool(self, size=1, **kwargs):
+        """Make a pool, and wait for its workers to be ready."""
+        pool = SandboxWorkerPool(size, cmdline_start=CMDLINE_START, **kwargs)
+        self.addCleanup(pool.stop)
+        self.wait_for_workers(pool, size)
+        return pool
+
+    def wait_for_workers(self, pool, count):
+        """Wait for `count` workers of `pool` to be ready."""
+        for _ in range(100):
+            if len(pool._idle) >= count:  # pylint: disable=protected-access
+                return
+            time.sleep(.1)
+        self.fail("Workers didn't start")
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_safe_exec(self, mock_codejail_safe_exec):
+        pool = self.make_pool()
+        g = {'b': 1}
+        pool.safe_exec("a = b + 1", g)
+        self.assertEqual(g['a'], 2)
+        self.assertFalse(mock_codejail_safe_exec.called)
+
+    def test_exception(self):
+        pool = self.make_pool()
+        with self.assertRaisesRegexp(SafeExecException, "Couldn't execute jailed code"):
+            pool.safe_exec("1/0", {})
+
+    def test_replace_workers(self):
+        pool = self.make_pool()
+        worker = pool._idle[0]  # pylint: disable=protected-access
+        pool.safe_exec("a = 1", {})
+        self.wait_for_workers(pool, 1)
+        self.assertNotEqual(pool._idle, [worker])  # pylint: disable=protected-access
+        worker.process.wait()
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_timeout(self, mock_codejail_safe_exec):
+        pool = self.make_pool()
+        with self.assertRaisesRegexp(SafeExecException, "Couldn't execute jailed code"):
+            with patch.object(SandboxWorker, 'run', side_effect=WorkerTimeout):
+                pool.safe_exec("a = 1", {})
+        self.assertFalse(mock_codejail_safe_exec.called)
+        self.wait_for_workers(pool, 1)
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_job_timeout(self, mock_codejail_safe_exec):
+        pool = self.make_pool()
+        reply = {'status': -9, 'stdout': '', 'stderr': '', 'timed_out': True}
+        with self.assertRaisesRegexp(SafeExecException, "ran out of time"):
+            with patch.object(SandboxWorker, 'run', return_value=reply):
+                pool.safe_exec("a = 1", {})
+        self.assertFalse(mock_codejail_safe_exec.called)
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_files_use_codejail(self, mock_codejail_safe_exec):
+        pool = self.make_pool()
+        pool.safe_exec("a = 1", {}, extra_files=[('data.txt', b'data')])
+        self.assertTrue(mock_codejail_safe_exec.called)
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_worker_failure_uses_codejail(self, mock_codejail_safe_exec):
+        pool = self.make_pool()
+        with patch.object(SandboxWorker, 'run', side_effect=WorkerError):
+            pool.safe_exec("a = 1", {})
+        self.assertTrue(mock_codejail_safe_exec.called)
+        self.wait_for_workers(pool, 1)
+
+    def test_disabled(self):
+        configure_worker_pool({'size': 0})
+        self.addCleanup(configure_worker_pool, None)
+        self.assertIsNone(get_worker_pool())
+
+    @patch('capa.safe_exec.worker_pool.get_worker_pool')
+    def test_used_by_safe_exec(self, mock_get_worker_pool):
+        mock_get_worker_pool.return_value = Mock()
+        safe_exec("a = 1", {}, slug='problem')
+        self.assertTrue(mock_get_worker_pool.return_value.safe_exec.called)
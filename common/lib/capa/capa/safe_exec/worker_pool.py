@@ -0,0 +1,396 @@
+"""
+A pool of pre-warmed sandboxed worker processes for safe_exec.
+
+Running code with codejail starts a new sandboxed Python for every call,
+which then has to import the modules the code uses, numpy among them.  The
+workers of this pool are sandboxed Pythons started the same way codejail
+starts them, with the same user and resource limits, which import those
+modules ahead of time and then run one job each, in a child process forked
+from them.  See sandbox_worker.py.
+
+Workers are started in the background, and stopped along with every process
+they started once they have run their job, since the jailed code runs as the
+same user as its worker.  Jobs that need files in the sandbox, and jobs for
+which no worker is ready or whose worker fails, are run by codejail as usual.
+Jobs that run out of time fail as they would with codejail.
+
+The pool is configured by the LMS and Studio with the "worker_pool" dict of
+their CODE_JAIL setting, see configure_worker_pool:
+
+    CODE_JAIL = {
+        ...
+        'worker_pool': {
+            # Number of workers per process.  0 disables the pool.
+            'size': 2,
+        },
+    }
+
+The sandbox user runs all the workers of all processes, so the NPROC limit
+must leave room for them.
+
+"""
+
+
+import functools
+import inspect
+import json
+import logging
+import os
+import resource
+import select
+import shutil
+import signal
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# Seconds a worker has to start and import its modules.
+WORKER_START_TIMEOUT = 30
+
+# Seconds a job may run for when codejail has no REALTIME limit, since a
+# worker can't wait for its job forever.
+DEFAULT_JOB_REALTIME = 30
+
+# Seconds a worker has to reply to a job beyond the real time limit of the job,
+# including the time to kill and reap a job that ran out of time.
+WORKER_REPLY_MARGIN = 10
+
+# Read the code of the workers now, as safe_exec does with lazymod.py.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+with open(sandbox_worker_py_file) as f:
+    WORKER_CODE = "".join([f.read(), "\n\n", inspect.getsource(json_safe), "\n\nmain()\n"])
+
+_config = {}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class WorkerError(Exception):
+    """
+    A worker failed to start or to reply to a job.
+    """
+    pass
+
+
+class WorkerTimeout(WorkerError):
+    """
+    A worker didn't reply in time.
+    """
+    pass
+
+
+def _set_worker_limits(rlimits):
+    """
+    Set limits on a worker, to be used first in its process, as codejail does.
+    """
+    os.setsid()
+    for limit, value in rlimits:
+        resource.setrlimit(limit, value)
+
+
+class SandboxWorker(object):
+    """
+    A sandboxed worker process, which runs a single job.
+    """
+    def __init__(self, cmdline_start, user, preload, rlimits, realtime):
+        self.user = user
+        self.realtime = realtime
+
+        # Like codejail, give the worker a home directory the sandbox user can read.
+        self.homedir = tempfile.mkdtemp(prefix='codejail-worker-')
+        os.chmod(self.homedir, 0o775)
+
+        cmd = []
+        if user:
+            cmd.extend(['sudo', '-u', user])
+        cmd.extend(cmdline_start)
+        cmd.extend(['-c', WORKER_CODE])
+
+        # The worker itself is limited in memory and file size, and its job
+        # also in CPU time and processes.
+        worker_rlimits = [
+            (limit, value) for limit, value in rlimits
+            if limit in (resource.RLIMIT_AS, resource.RLIMIT_FSIZE)
+        ]
+        self.process = subprocess.Popen(  # pylint: disable=subprocess-popen-preexec-fn
+            cmd, cwd=self.homedir, env={},
+            preexec_fn=functools.partial(_set_worker_limits, worker_rlimits),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+        try:
+            self._write_message({'preload': preload, 'rlimits': rlimits, 'realtime': realtime})
+            self._read_message(time.time() + WORKER_START_TIMEOUT)
+        except WorkerError:
+            self.stop()
+            raise
+
+    def run(self, code, safe_globals):
+        """
+        Run `code` with the JSON-safe globals `safe_globals` and return the
+        reply of the worker: a dict with its status, stdout and stderr, and
+        whether it ran out of time.
+        """
+        self._write_message([code, safe_globals])
+        return self._read_message(time.time() + self.realtime + WORKER_REPLY_MARGIN)
+
+    def stop(self):
+        """
+        Stop the worker and the processes it started, and remove its home
+        directory.
+        """
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except IOError:
+                pass
+            # Give it a moment to exit.
+            for _ in range(10):
+                if self.process.poll() is not None:
+                    break
+                time.sleep(.05)
+
+        # Kill what's left of the worker's process group as codejail kills its
+        # processes, including processes its job started and left running.
+        if self.user:
+            subprocess.call(["sudo", "pkill", "-9", "-g", str(self.process.pid)])
+        else:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self.process.wait()
+        self.process.stdout.close()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+    def _write_message(self, message):
+        """
+        Write `message` to the worker.
+        """
+        data = json.dumps(message).encode('utf-8')
+        try:
+            self.process.stdin.write(struct.pack('>I', len(data)) + data)
+            self.process.stdin.flush()
+        except (IOError, OSError) as exc:
+            raise WorkerError(u'Error writing to worker: {}'.format(exc))
+
+    def _read_message(self, deadline):
+        """
+        Read a message from the worker, waiting until `deadline` at most.
+        """
+        length, = struct.unpack('>I', self._read(4, deadline))
+        return json.loads(self._read(length, deadline).decode('utf-8'))
+
+    def _read(self, size, deadline):
+        """
+        Read `size` bytes from the worker, waiting until `deadline` at most.
+        """
+        fd = self.process.stdout.fileno()
+        chunks = []
+        while size:
+            if not select.select([fd], [], [], max(deadline - time.time(), 0))[0]:
+                raise WorkerTimeout(u'Timed out reading from worker')
+            chunk = os.read(fd, size)
+            if not chunk:
+                raise WorkerError(u'Worker exited with status {}'.format(self.process.poll()))
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+
+class SandboxWorkerPool(object):
+    """
+    A pool of sandboxed workers that runs code as codejail's safe_exec does.
+    """
+    def __init__(self, size, preload=(), cmdline_start=None, user=None):
+        """
+        Arguments:
+            size (int): the number of workers.
+            preload (list): the names of the modules workers import when they start.
+            cmdline_start (list): the command line starting a sandboxed Python,
+                defaulting to the one codejail is configured with.
+            user (str): the user to run workers as, defaulting to the one
+                codejail is configured with.
+        """
+        self.size = size
+        self.preload = list(preload)
+        if cmdline_start is None:
+            cmdline_start = jail_code.COMMANDS['python']['cmdline_start']
+            user = jail_code.COMMANDS['python']['user']
+        self.cmdline_start = cmdline_start
+        self.user = user
+        self.pid = os.getpid()
+
+        self._idle = []
+        self._active = 0
+        self._lock = threading.Lock()
+        self._start_workers()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute code as codejail's safe_exec does, with a worker if one is
+        ready.  Workers can't provide files to the code, so code that needs
+        them is always executed by codejail.
+        """
+        worker = None if python_path or extra_files else self._checkout()
+        if worker is None:
+            codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
+            return
+
+        try:
+            reply = worker.run(code, json_safe(globals_dict))
+        except WorkerTimeout as exc:
+            # The job may have run out of time rather than the worker, so
+            # running it again with codejail could only take as long.
+            log.warning(u'Sandbox worker timed out running %s: %s', slug, exc)
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(exc))
+        except WorkerError as exc:
+            log.warning(u'Sandbox worker failed running %s, falling back to codejail: %s', slug, exc)
+            reply = None
+        finally:
+            # The job ran as the same user as the worker, and may have left
+            # anything behind in it, so workers run a single job.
+            self._discard(worker)
+
+        if reply is None:
+            codejail_safe_exec(code, globals_dict, slug=slug)
+            return
+        log.debug(u'Executed jailed code %s in worker %s', slug, worker.process.pid)
+        if reply['timed_out']:
+            raise SafeExecException(u"Couldn't execute jailed code: the code ran out of time")
+        if reply['status'] != 0:
+            raise SafeExecException((
+                u"Couldn't execute jailed code: stdout: {stdout!r}, "
+                u"stderr: {stderr!r} with status code: {status}"
+            ).format(**reply))
+        globals_dict.update(json.loads(reply['stdout']))
+
+    def stop(self):
+        """
+        Stop the idle workers of the pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._active -= len(idle)
+        for worker in idle:
+            worker.stop()
+
+    def _checkout(self):
+        """
+        Return an idle worker, or None if none is ready.
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return None
+
+    def _discard(self, worker):
+        """
+        Stop the given worker in the background and start another one.
+        """
+        with self._lock:
+            self._active -= 1
+        thread = threading.Thread(target=worker.stop)
+        thread.daemon = True
+        thread.start()
+        self._start_workers()
+
+    def _start_workers(self):
+        """
+        Start workers in the background until the pool is full.
+        """
+        with self._lock:
+            missing = self.size - self._active
+            self._active += max(missing, 0)
+        for _ in range(missing):
+            thread = threading.Thread(target=self._start_worker)
+            thread.daemon = True
+            thread.start()
+
+    def _start_worker(self):
+        """
+        Start a worker and add it to the idle workers.
+        """
+        try:
+            worker = SandboxWorker(
+                self.cmdline_start,
+                self.user,
+                self.preload,
+                _get_rlimits(),
+                jail_code.LIMITS.get('REALTIME') or DEFAULT_JOB_REALTIME,
+            )
+        except (WorkerError, OSError) as exc:
+            log.warning(u'Sandbox worker failed to start: %s', exc)
+            with self._lock:
+                self._active -= 1
+            return
+
+        with self._lock:
+            self._idle.append(worker)
+
+
+def _get_rlimits():
+    """
+    Return the resource limits of jobs, as codejail computes them for its
+    sandboxed processes, as a list of (limit, (soft, hard)) pairs.
+    """
+    rlimits = []
+    nproc = jail_code.LIMITS.get('NPROC')
+    if nproc:
+        rlimits.append((resource.RLIMIT_NPROC, (nproc, nproc)))
+    cpu = jail_code.LIMITS.get('CPU')
+    if cpu:
+        rlimits.append((resource.RLIMIT_CPU, (cpu, cpu + 1)))
+    vmem = jail_code.LIMITS.get('VMEM')
+    if vmem:
+        rlimits.append((resource.RLIMIT_AS, (vmem, vmem)))
+    fsize = jail_code.LIMITS.get('FSIZE', 0)
+    rlimits.append((resource.RLIMIT_FSIZE, (fsize, fsize)))
+    return rlimits
+
+
+def configure_worker_pool(config):
+    """
+    Configure the worker pool of this process.
+
+    Arguments:
+        config (dict): the "worker_pool" dict of the CODE_JAIL setting, or
+            None to disable the pool.
+    """
+    global _config  # pylint: disable=global-statement
+    _config = dict(config or {})
+
+
+def get_worker_pool(preload=()):
+    """
+    Return the worker pool of this process, or None if it's disabled or
+    codejail isn't configured.
+
+    Arguments:
+        preload (list): the names of the modules workers import when they
+            start, used when the pool is created.
+    """
+    global _pool  # pylint: disable=global-statement
+
+    size = _config.get('size')
+    if not size or not jail_code.is_configured('python'):
+        return None
+
+    with _pool_lock:
+        # Pools don't survive forking, such as the forking of web server workers.
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = SandboxWorkerPool(size, preload=preload)
+        return _pool
@@ -0,0 +1,74 @@
+"""
+Compiled matchers of learner answers for StringResponse.
+
+StringResponse compares each submission with all of its accepted answers,
+joining them into a regular expression or lowercasing them each time.  Here
+each distinct set of accepted answers is compiled once per process, into a
+StringMatcher that only has to look up or search the submission.
+"""
+
+
+import re
+import threading
+from collections import OrderedDict
+
+# Maximum number of matchers to cache per process.
+STRING_MATCHER_CACHE_SIZE = 2048
+
+# Map of (answers, regexp, case insensitivity) to their StringMatcher, in
+# least recently used order.
+_string_matchers = OrderedDict()
+_string_matchers_lock = threading.Lock()
+
+
+class StringMatcher(object):
+    """
+    Matches strings against a list of accepted answers.
+    """
+    def __init__(self, answers, regexp=False, case_insensitive=False):
+        """
+        Compile the answers, raising re.error if `regexp` is true and they
+        aren't a valid regular expression.
+
+        As StringResponse always has, regular expression answers are joined
+        with '|' between a '^' and a '$', so the first is anchored at the start
+        and the last at the end only.
+        """
+        self.regexp = regexp
+        self.case_insensitive = case_insensitive
+        if regexp:
+            flags = re.IGNORECASE if case_insensitive else 0
+            self._pattern = re.compile('^' + '|'.join(answers) + '$', flags=flags | re.UNICODE)
+        elif case_insensitive:
+            self._answers = frozenset(answer.lower() for answer in answers)
+        else:
+            self._answers = frozenset(answers)
+
+    def matches(self, given):
+        """
+        Return whether the string `given` matches any of the answers.
+        """
+        if self.regexp:
+            return self._pattern.search(given) is not None
+        if self.case_insensitive:
+            return given.lower() in self._answers
+        return given in self._answers
+
+
+def get_matcher(answers, regexp=False, case_insensitive=False):
+    """
+    Return the StringMatcher of `answers`, compiling it if it isn't cached.
+    """
+    key = (tuple(answers), regexp, case_insensitive)
+    with _string_matchers_lock:
+        matcher = _string_matchers.pop(key, None)
+        if matcher is not None:
+            _string_matchers[key] = matcher
+            return matcher
+
+    matcher = StringMatcher(answers, regexp, case_insensitive)
+    with _string_matchers_lock:
+        _string_matchers[key] = matcher
+        while len(_string_matchers) > STRING_MATCHER_CACHE_SIZE:
+            _string_matchers.popitem(last=False)
+    return matcher
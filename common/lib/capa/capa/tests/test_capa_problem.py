@@ -3,6 +3,7 @@ Test capa problem.
 """
 
 
+import io
 import textwrap
 import unittest
 
@@ -10,9 +11,10 @@ import ddt
 import six
 from lxml import etree
 from markupsafe import Markup
-from mock import patch
+from mock import MagicMock, patch
 
-from capa.tests.helpers import new_loncapa_problem
+from capa import capa_problem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 from openedx.core.djangolib.markup import HTML
 
 
@@ -740,3 +742,74 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
         # Ensure that the answer is a string so that the dict returned from this
         # function can eventualy be serialized to json without issues.
         self.assertIsInstance(problem.get_question_answers()['1_solution_1'], six.text_type)
+
+
+class CAPAProblemParseCacheTest(unittest.TestCase):
+    """ TestCase for the cache of parsed problem XML """
+
+    xml = textwrap.dedent("""
+        <problem>
+            <p>Which color is the sky?</p>
+            <optionresponse>
+                <optioninput options="('yellow','blue','green')" correct="blue" label="Color"/>
+            </optionresponse>
+            <stringresponse answer="sky">
+                <label>What is above?</label>
+                <description>Lowercase only</description>
+                <textline size="40"/>
+            </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(CAPAProblemParseCacheTest, self).setUp()
+        capa_problem._parsed_problem_cache.clear()
+        self.addCleanup(capa_problem._parsed_problem_cache.clear)
+
+    def test_parsed_once(self):
+        assign_ids = capa_problem.LoncapaProblem._assign_ids
+        with patch.object(capa_problem.LoncapaProblem, '_assign_ids', autospec=True, side_effect=assign_ids) as mock:
+            first = new_loncapa_problem(self.xml, seed=1)
+            second = new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(mock.call_count, 1)
+
+        self.assertEqual(first.problem_data, second.problem_data)
+        self.assertEqual(first.get_html(), second.get_html())
+        self.assertEqual(sorted(first.get_question_answers()), ['1_2_1', '1_3_1'])
+        self.assertEqual(first.get_question_answers(), second.get_question_answers())
+
+    def test_problems_get_own_tree(self):
+        first = new_loncapa_problem(self.xml)
+        second = new_loncapa_problem(self.xml)
+        self.assertIsNot(first.tree, second.tree)
+        first.tree.find('.//optioninput').set('correct', 'green')
+        first.problem_data['1_3_1']['label'] = 'changed'
+
+        third = new_loncapa_problem(self.xml)
+        self.assertEqual(third.tree.find('.//optioninput').get('correct'), 'blue')
+        self.assertEqual(third.problem_data, second.problem_data)
+
+    def test_keyed_on_problem_id(self):
+        first = new_loncapa_problem(self.xml, problem_id='1')
+        second = new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(sorted(first.problem_data), ['1_2_1', '1_3_1'])
+        self.assertEqual(sorted(second.problem_data), ['2_2_1', '2_3_1'])
+
+    def test_includes_not_cached(self):
+        capa_system = test_capa_system()
+        capa_system.filestore = MagicMock()
+        capa_system.filestore.open.return_value = io.BytesIO(b'<p>Included</p>')
+        xml = '<problem><include file="included.xml"/></problem>'
+
+        new_loncapa_problem(xml, capa_system=capa_system)
+        capa_system.filestore.open.return_value = io.BytesIO(b'<p>Changed</p>')
+        problem = new_loncapa_problem(xml, capa_system=capa_system)
+
+        self.assertEqual(problem.tree.find('p').text, 'Changed')
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 0)
+
+    @patch('capa.capa_problem.PARSED_PROBLEM_CACHE_SIZE', 1)
+    def test_bounded(self):
+        new_loncapa_problem(self.xml, problem_id='1')
+        new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(len(capa_problem._parsed_problem_cache), 1)
@@ -0,0 +1,95 @@
+"""
+Tests for compiled math expressions.
+"""
+
+
+import unittest
+
+import ddt
+from calc import UndefinedVariable, UnmatchedParenthesis, evaluator as calc_evaluator
+from mock import patch
+from pyparsing import ParseException
+
+from capa import compiled_formula
+from capa.compiled_formula import compile_formula, evaluator
+
+
+@ddt.ddt
+class CompiledFormulaTest(unittest.TestCase):
+    """
+    Tests for CompiledFormula and the cached evaluator.
+    """
+    SAMPLES = [{'x': 0.5, 'y': 2.0}, {'x': 1.5, 'y': -3.0}, {'x': 2.5, 'y': 4.0}]
+
+    def setUp(self):
+        super(CompiledFormulaTest, self).setUp()
+        compiled_formula._compiled_formulas.clear()  # pylint: disable=protected-access
+
+    @ddt.data(
+        '1 + 2 * 3 - 4 / 8',
+        '2^3^2',
+        '-5 + 4 - 3',
+        '1 || 2',
+        '50%',
+        'sqrt(-4) + 2*i',
+        'sin(pi/6) * e^2',
+        '3.2E-4 * 2',
+        'fact(5)',
+    )
+    def test_same_as_calc(self, math_expr):
+        self.assertEqual(evaluator({}, {}, math_expr), calc_evaluator({}, {}, math_expr))
+
+    def test_empty_expression(self):
+        self.assertNotEqual(evaluator({}, {}, '  '), evaluator({}, {}, '  '))  # NaN
+
+    def test_compiled_once(self):
+        with patch('capa.compiled_formula.calc.ParseAugmenter', wraps=compiled_formula.calc.ParseAugmenter) as parse:
+            self.assertEqual(evaluator({'x': 1}, {}, 'x + 1'), 2)
+            self.assertEqual(evaluator({'x': 2}, {}, 'x + 1'), 3)
+            self.assertEqual(evaluator({'X': 2}, {}, 'X + 1', case_sensitive=True), 3)
+        self.assertEqual(parse.call_count, 2)
+
+    def test_cache_eviction(self):
+        with patch('capa.compiled_formula.COMPILED_FORMULA_CACHE_SIZE', 2):
+            first = compile_formula('1')
+            compile_formula('2')
+            compile_formula('1')
+            compile_formula('3')
+            self.assertIs(compile_formula('1'), first)
+            self.assertEqual(
+                list(compiled_formula._compiled_formulas),  # pylint: disable=protected-access
+                [('3', False), ('1', False)],
+            )
+
+    @ddt.data(
+        ('x +* 1', ParseException),
+        ('(x + 1', UnmatchedParenthesis),
+        ('z + 1', UndefinedVariable),
+    )
+    @ddt.unpack
+    def test_errors(self, math_expr, error):
+        with self.assertRaises(error):
+            evaluator({'x': 1}, {}, math_expr)
+
+    @ddt.data(
+        'x^2 + y',
+        'sin(x) / y - 2',
+        'x || y',
+        '-x*y + 2*pi',
+        'sqrt(x) * (1 + 2*i)',
+        '7',
+    )
+    def test_evaluate_samples(self, math_expr):
+        compiled = compile_formula(math_expr)
+        expected = [compiled.evaluate(sample, {}) for sample in self.SAMPLES]
+        for value, expected_value in zip(compiled.evaluate_samples(self.SAMPLES, {}), expected):
+            self.assertAlmostEqual(value, expected_value)
+
+    @ddt.data(
+        ('1 / (x - x)', FloatingPointError),
+        ('fact(x)', TypeError),
+    )
+    @ddt.unpack
+    def test_evaluate_samples_errors(self, math_expr, error):
+        with self.assertRaises(error):
+            compile_formula(math_expr).evaluate_samples(self.SAMPLES, {})
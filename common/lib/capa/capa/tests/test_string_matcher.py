@@ -0,0 +1,67 @@
+"""
+Tests for compiled matchers of StringResponse answers.
+"""
+
+
+import re
+import unittest
+
+import ddt
+from mock import patch
+
+from capa import string_matcher
+from capa.string_matcher import get_matcher
+
+
+@ddt.ddt
+class StringMatcherTest(unittest.TestCase):
+    """
+    Tests for StringMatcher and the cache of matchers.
+    """
+    def setUp(self):
+        super(StringMatcherTest, self).setUp()
+        string_matcher._string_matchers.clear()  # pylint: disable=protected-access
+
+    @ddt.data(
+        (['Michigan', 'MI'], False, False, 'MI', True),
+        (['Michigan', 'MI'], False, False, 'mi', False),
+        (['Michigan', 'MI'], False, True, 'mIcHiGaN', True),
+        (['Michigan', 'MI'], False, True, 'Ohio', False),
+        (['Mich.*', 'MI'], False, False, 'Michigan', False),
+        (['Mich.*', 'MI'], True, False, 'Michigan', True),
+        (['Mich.*', 'MI'], True, False, 'michigan', False),
+        (['Mich.*', 'MI'], True, True, 'michigan', True),
+        # Only the first regexp is anchored at the start and the last at the end.
+        (['a', 'b'], True, False, 'ax', True),
+        (['a', 'b'], True, False, 'xb', True),
+        (['a', 'b'], True, False, 'xbx', False),
+        ([u'été'], True, True, u'ÉTÉ', True),
+    )
+    @ddt.unpack
+    def test_matches(self, answers, regexp, case_insensitive, given, expected):
+        self.assertEqual(get_matcher(answers, regexp, case_insensitive).matches(given), expected)
+
+    def test_compiled_once(self):
+        answers = ['answer{}'.format(index) for index in range(50)]
+        with patch('capa.string_matcher.re.compile', wraps=re.compile) as compile_regexp:
+            self.assertTrue(get_matcher(answers, regexp=True).matches('answer7'))
+            self.assertFalse(get_matcher(answers, regexp=True).matches('answer'))
+            self.assertIs(get_matcher(list(answers), regexp=True), get_matcher(answers, regexp=True))
+        self.assertEqual(compile_regexp.call_count, 1)
+
+    def test_cache_eviction(self):
+        with patch('capa.string_matcher.STRING_MATCHER_CACHE_SIZE', 2):
+            first = get_matcher(['1'])
+            get_matcher(['2'])
+            get_matcher(['1'])
+            get_matcher(['3'])
+            self.assertIs(get_matcher(['1']), first)
+            self.assertEqual(
+                list(string_matcher._string_matchers),  # pylint: disable=protected-access
+                [(('3',), False, False), (('1',), False, False)],
+            )
+
+    def test_invalid_regexp(self):
+        with self.assertRaises(re.error):
+            get_matcher(['(a'], regexp=True)
+        self.assertEqual(string_matcher._string_matchers, {})  # pylint: disable=protected-access
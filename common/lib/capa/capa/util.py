@@ -10,11 +10,12 @@ from cmath import isinf, isnan
 from decimal import Decimal
 
 import bleach
-from calc import evaluator
 from lxml import etree
 
 from openedx.core.djangolib.markup import HTML
 
+from .compiled_formula import evaluator
+
 #-----------------------------------------------------------------------------
 #
 # Utility functions used in CAPA responsetypes
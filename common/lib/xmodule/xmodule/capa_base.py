@@ -17,6 +17,7 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.encoding import smart_text
 from django.utils.functional import cached_property
+from django.utils.translation import get_language
 from pytz import utc
 from six import text_type
 from xblock.fields import Boolean, Dict, Float, Integer, Scope, String, XMLString
@@ -25,6 +26,7 @@ from xblock.scorable import ScorableXBlockMixin, Score
 from capa.capa_problem import LoncapaProblem, LoncapaSystem
 from capa.inputtypes import Status
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
+from capa.safe_exec import SafeExecResultCache
 from capa.util import convert_files_to_filenames, get_inner_html_from_xpath
 from openedx.core.djangolib.markup import HTML, Text
 from xmodule.exceptions import NotFoundError
@@ -44,6 +46,12 @@ NUM_RANDOMIZATION_BINS = 20
 # Never produce more than this many different seeds, no matter what.
 MAX_RANDOMIZATION_BINS = 1000
 
+# Prefix of the cache keys of the HTML of unsubmitted problems.  Change its
+# version whenever the HTML rendered by LoncapaProblem changes.
+PROBLEM_HTML_CACHE_KEY_PREFIX = u'capa_problem_html.v1.'
+# Seconds to cache the HTML of unsubmitted problems.
+PROBLEM_HTML_CACHE_TIMEOUT = 60 * 60
+
 
 try:
     FEATURES = getattr(settings, 'FEATURES', {})
@@ -325,10 +333,14 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
         if text is None:
             text = self.data
 
+        cache = self.runtime.cache
+        if cache is not None:
+            cache = SafeExecResultCache(cache, slug=text_type(self.location))
+
         capa_system = LoncapaSystem(
             ajax_url=self.ajax_url,
             anonymous_student_id=self.runtime.anonymous_student_id,
-            cache=self.runtime.cache,
+            cache=cache,
             can_execute_unsafe_code=self.runtime.can_execute_unsafe_code,
             get_python_lib_zip=self.runtime.get_python_lib_zip,
             DEBUG=self.runtime.DEBUG,
@@ -716,15 +728,37 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
         encapsulate (bool): if True (the default) embed the html in a problem <div>
         submit_notification (bool): True if the submit notification should be added
         """
-        try:
-            html = self.lcp.get_html()
+        cached = self.get_cached_problem_html()
+        if cached is not None:
+            html = cached['html']
+            demand_hint_possible = cached['demand_hint_possible']
+            should_enable_next_hint = cached['should_enable_next_hint']
+        else:
+            cache_key = self._get_problem_html_cache_key()
+            try:
+                html = self.lcp.get_html()
 
-        # If we cannot construct the problem HTML,
-        # then generate an error message instead.
-        except Exception as err:  # pylint: disable=broad-except
-            html = self.handle_problem_html_error(err)
+            # If we cannot construct the problem HTML,
+            # then generate an error message instead.
+            except Exception as err:  # pylint: disable=broad-except
+                html = self.handle_problem_html_error(err)
+                cache_key = None
+
+            html = self.remove_tags_from_html(html)
 
-        html = self.remove_tags_from_html(html)
+            # If demand hints are available, emit hint button and div.
+            demand_hints = self.lcp.tree.xpath("//problem/demandhint/hint")
+            demand_hint_possible, should_enable_next_hint = self._should_enable_demand_hint(
+                demand_hints=demand_hints
+            )
+
+            if cache_key is not None:
+                self._set_cached_problem_html(cache_key, {
+                    'html': html,
+                    'demand_hint_possible': demand_hint_possible,
+                    'should_enable_next_hint': should_enable_next_hint,
+                    'max_score': self.lcp.get_max_score(),
+                })
 
         # Enable/Disable Submit button if should_enable_submit_button returns True/False.
         submit_button = self.submit_button_name()
@@ -737,10 +771,6 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
             'weight': self.weight,
         }
 
-        # If demand hints are available, emit hint button and div.
-        demand_hints = self.lcp.tree.xpath("//problem/demandhint/hint")
-        demand_hint_possible, should_enable_next_hint = self._should_enable_demand_hint(demand_hints=demand_hints)
-
         answer_notification_type, answer_notification_message = self._get_answer_notification(
             render_notifications=submit_notification)
 
@@ -788,6 +818,66 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
 
         return html
 
+    def get_cached_problem_html(self):
+        """
+        Return the cached HTML of this problem, if the learner hasn't answered
+        it yet, or None if it isn't cached.
+
+        The HTML rendered by LoncapaProblem is the same for all learners with
+        the same seed who haven't answered the problem, and seeds are binned,
+        so it's cached without having to build the LoncapaProblem.  The parts
+        of the problem that depend on the learner, such as its buttons and
+        attempts, are rendered around it by get_problem_html as usual.
+
+        Returns:
+            dict of the 'html' of the problem, whether demand hints are
+            possible and enabled, and its 'max_score', which also sets the
+            score of the problem if it isn't set yet.
+        """
+        cache_key = self._get_problem_html_cache_key()
+        if cache_key is None:
+            return None
+
+        # The HTML is looked up once per key on each module.
+        if getattr(self, '_cached_problem_html', (None, None))[0] != cache_key:
+            self._cached_problem_html = (cache_key, self.runtime.cache.get(cache_key))
+        cached = self._cached_problem_html[1]
+
+        if cached is not None and self.score is None:
+            self.set_score(Score(raw_earned=0, raw_possible=cached['max_score']))
+        return cached
+
+    def _set_cached_problem_html(self, cache_key, cached):
+        """
+        Cache the HTML of this problem as returned by get_cached_problem_html.
+        """
+        self.runtime.cache.set(cache_key, cached, PROBLEM_HTML_CACHE_TIMEOUT)
+        self._cached_problem_html = (cache_key, cached)
+
+    def _get_problem_html_cache_key(self):
+        """
+        Return the cache key of the HTML of this problem, or None if it can't
+        be cached, because the learner has answered the problem or because
+        its scripts can depend on the learner.
+        """
+        if self.runtime.cache is None or 'anonymous_student_id' in self.data:
+            return None
+
+        state = self.lcp.get_state() if 'lcp' in self.__dict__ else self.get_state_for_lcp()
+        if state['done'] or state['correct_map'] or state['student_answers'] or state['has_saved_answers']:
+            return None
+        if state['input_state'] and any(state['input_state'].values()):
+            return None
+
+        key_data = json.dumps([
+            text_type(self.location),
+            self.data,
+            state['seed'],
+            get_language(),
+            self.runtime.STATIC_URL,
+        ])
+        return PROBLEM_HTML_CACHE_KEY_PREFIX + hashlib.md5(key_data.encode('utf-8')).hexdigest()
+
     def _get_answer_notification(self, render_notifications):
         """
         Generate the answer notification type and message from the current problem status.
@@ -902,6 +992,9 @@ class CapaMixin(ScorableXBlockMixin, CapaFields):
         Pressing RESET button makes this function to return False.
         """
         # used by conditional module
+        # The LoncapaProblem is built from the module's state, so don't build it only for this.
+        if 'lcp' not in self.__dict__:
+            return self.done
         return self.lcp.done
 
     def is_attempted(self):
@@ -107,9 +107,11 @@ class ProblemBlock(
         """
         Return the student view.
         """
-        # self.score is initialized in self.lcp but in this method is accessed before self.lcp so just call it first.
+        # self.score is initialized in self.lcp but in this method is accessed before self.lcp so just call it first,
+        # unless the problem HTML is cached, which initializes it too.
         try:
-            self.lcp
+            if self.get_cached_problem_html() is None:
+                self.lcp
         except Exception as err:
             html = self.handle_fatal_lcp_error(err if show_detailed_errors else None)
         else:
@@ -22,6 +22,10 @@ XASSET_LOCATION_TAG = 'c4x'
 XASSET_SRCREF_PREFIX = 'xasset:'
 XASSET_THUMBNAIL_TAIL_NAME = '.jpg'
 STREAM_DATA_CHUNK_SIZE = 1024
+# Size of the reads from asset files on disk: the default size of GridFS chunks.
+ASSET_FILE_CHUNK_SIZE = 255 * 1024
+# Number of threads copying the assets of a course between the contentstore and the disk.
+ASSET_COPY_THREADS = 4
 VERSIONED_ASSETS_PREFIX = '/assets/courseware'
 VERSIONED_ASSETS_PATTERN = r'/assets/courseware/(v[\d]/)?([a-f0-9]{32})'
 
@@ -295,6 +299,12 @@ class StaticContent(object):
     def stream_data(self):
         yield self._data
 
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        yield self._data[first_byte:last_byte + 1]
+
     @staticmethod
     def serialize_asset_key_with_slash(asset_key):
         """
@@ -315,9 +325,17 @@ class StaticContentStream(StaticContent):
                                                   length=length, locked=locked, content_digest=content_digest)
         self._stream = stream
 
+    def _read_size(self):
+        """
+        Returns the number of bytes to read from the stream at a time: the size of its GridFS chunks, so that
+        each read fetches one chunk from Mongo, or STREAM_DATA_CHUNK_SIZE for other streams.
+        """
+        return getattr(self._stream, 'chunk_size', None) or STREAM_DATA_CHUNK_SIZE
+
     def stream_data(self):
+        read_size = self._read_size()
         while True:
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
+            chunk = self._stream.read(read_size)
             if len(chunk) == 0:
                 break
             yield chunk
@@ -325,16 +343,18 @@ class StaticContentStream(StaticContent):
     def stream_data_in_range(self, first_byte, last_byte):
         """
         Stream the data between first_byte and last_byte (included)
+
+        The stream seeks straight to the chunk holding first_byte, and then reads up to the end of each chunk,
+        so that no chunk is fetched more than once.
         """
         self._stream.seek(first_byte)
+        read_size = self._read_size()
         position = first_byte
-        while True:
-            if last_byte < position + STREAM_DATA_CHUNK_SIZE - 1:
-                chunk = self._stream.read(last_byte - position + 1)
-                yield chunk
+        while position <= last_byte:
+            chunk = self._stream.read(min(read_size - position % read_size, last_byte - position + 1))
+            if len(chunk) == 0:
                 break
-            chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
-            position += STREAM_DATA_CHUNK_SIZE
+            position += len(chunk)
             yield chunk
 
     def close(self):
@@ -387,6 +407,27 @@ class ContentStore(object):
         """
         raise NotImplementedError
 
+    @staticmethod
+    def compute_thumbnail_name(content, dimensions=None):
+        """
+        Return the name of the thumbnail of `content` with the given
+        (width, height) `dimensions`.
+        """
+        is_svg = content.content_type == 'image/svg+xml'
+        # use a naming convention to associate originals with the thumbnail
+        return StaticContent.generate_thumbnail_name(
+            content.location.block_id, dimensions=dimensions, extension='.svg' if is_svg else None
+        )
+
+    @staticmethod
+    def compute_thumbnail_location(content, dimensions=None):
+        """
+        Return the AssetKey of the thumbnail of `content` with the given
+        (width, height) `dimensions`, whether or not it has been generated.
+        """
+        thumbnail_name = ContentStore.compute_thumbnail_name(content, dimensions=dimensions)
+        return StaticContent.compute_location(content.location.course_key, thumbnail_name, is_thumbnail=True)
+
     def generate_thumbnail(self, content, tempfile_path=None, dimensions=None):
         """Create a thumbnail for a given image.
 
@@ -403,10 +444,7 @@ class ContentStore(object):
         """
         thumbnail_content = None
         is_svg = content.content_type == 'image/svg+xml'
-        # use a naming convention to associate originals with the thumbnail
-        thumbnail_name = StaticContent.generate_thumbnail_name(
-            content.location.block_id, dimensions=dimensions, extension='.svg' if is_svg else None
-        )
+        thumbnail_name = self.compute_thumbnail_name(content, dimensions=dimensions)
         thumbnail_file_location = StaticContent.compute_location(
             content.location.course_key, thumbnail_name, is_thumbnail=True
         )
@@ -420,7 +458,7 @@ class ContentStore(object):
                 if tempfile_path is None:
                     thumbnail_file = BytesIO(content.data)
                 else:
-                    with open(tempfile_path) as f:
+                    with open(tempfile_path, 'rb') as f:
                         thumbnail_file = BytesIO(f.read())
                 thumbnail_content = StaticContent(thumbnail_file_location, thumbnail_name,
                                                   'image/svg+xml', thumbnail_file)
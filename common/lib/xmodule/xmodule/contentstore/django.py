@@ -3,9 +3,13 @@
 from importlib import import_module
 
 from django.conf import settings
+from django.dispatch import Signal
 
 _CONTENTSTORE = {}
 
+# Sent when an asset is saved or deleted, or its attributes are changed, with its AssetKey as asset_key.
+asset_changed = Signal(providing_args=['asset_key'])
+
 
 def load_function(path):
     """
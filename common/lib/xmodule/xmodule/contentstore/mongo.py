@@ -3,8 +3,16 @@ MongoDB/GridFS-level code for the contentstore.
 """
 
 
+import datetime
+import hashlib
 import json
+import logging
 import os
+import tempfile
+import time
+from collections import OrderedDict
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 import gridfs
 import pymongo
@@ -16,27 +24,43 @@ from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import AssetKey
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
+from xmodule.contentstore.django import asset_changed
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 from xmodule.util.misc import escape_invalid_characters
 
-from .content import ContentStore, StaticContent, StaticContentStream
+from .content import ASSET_COPY_THREADS, ContentStore, StaticContent, StaticContentStream
+
+log = logging.getLogger(__name__)
+
+# Content of at most this many bytes is held in memory while it's hashed, before it's stored as a blob.
+BLOB_SPOOL_MAX_SIZE = 10 * 1024 * 1024
 
 
 class MongoContentStore(ContentStore):
     """
     MongoDB-backed ContentStore.
+
+    Each asset is a GridFS file, whose chunks hold its content, unless it's
+    content-addressed: then its file has no chunks, and its `blob` attribute
+    is the id of a GridFS file in the blobs bucket which holds the content.
+    Blobs are shared by all the assets with the same content, and count the
+    assets which reference them.  Every asset is saved content-addressed if
+    the store is, and both kinds of assets can be read, copied and deleted
+    either way.
     """
     # pylint: disable=unused-argument, bad-continuation
     def __init__(
         self, host, db,
-        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None, **kwargs
+        port=27017, tz_aware=True, user=None, password=None, bucket='fs', collection=None,
+        content_addressed=False, **kwargs
     ):
         """
         Establish the connection with the mongo backend and connect to the collections
 
         :param collection: ignores but provided for consistency w/ other doc_store_config patterns
+        :param content_addressed: whether to save the content of assets in blobs shared by identical assets
         """
         # GridFS will throw an exception if the Database is wrapped in a MongoProxy. So don't wrap it.
         # The appropriate methods below are marked as autoretry_read - those methods will handle
@@ -52,6 +76,11 @@ class MongoContentStore(ContentStore):
         self.fs_files = mongo_db[bucket + ".files"]  # the underlying collection GridFS uses
         self.chunks = mongo_db[bucket + ".chunks"]
 
+        self.content_addressed = content_addressed
+        self.blobs = gridfs.GridFS(mongo_db, bucket + "_blobs")
+        self.blob_files = mongo_db[bucket + "_blobs.files"]
+        self.blob_chunks = mongo_db[bucket + "_blobs.chunks"]
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -77,9 +106,13 @@ class MongoContentStore(ContentStore):
         elif collections:
             self.fs_files.drop()
             self.chunks.drop()
+            self.blob_files.drop()
+            self.blob_chunks.drop()
         else:
             self.fs_files.remove({})
             self.chunks.remove({})
+            self.blob_files.remove({})
+            self.blob_chunks.remove({})
 
         if connections:
             self.close_connections()
@@ -93,38 +126,160 @@ class MongoContentStore(ContentStore):
         self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
 
         thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
-        with self.fs.new_file(_id=content_id, filename=six.text_type(content.location), content_type=content.content_type,
-                              displayname=content.name, content_son=content_son,
-                              thumbnail_location=thumbnail_location,
-                              import_path=content.import_path,
-                              # getattr b/c caching may mean some pickled instances don't have attr
-                              locked=getattr(content, 'locked', False)) as fp:
-
-            # It seems that this code thought that only some specific object would have the `__iter__` attribute
-            # but many more objects have this in python3 and shouldn't be using the chunking logic. For string and
-            # byte streams we write them directly to gridfs and convert them to byetarrys if necessary.
-            if hasattr(content.data, '__iter__') and not isinstance(content.data, (six.binary_type, six.string_types)):
-                for chunk in content.data:
+        attributes = dict(
+            filename=six.text_type(content.location), displayname=content.name, content_son=content_son,
+            thumbnail_location=thumbnail_location,
+            import_path=content.import_path,
+            # getattr b/c caching may mean some pickled instances don't have attr
+            locked=getattr(content, 'locked', False),
+        )
+        if self.content_addressed:
+            blob_id, length, digest, __ = self._store_blob(self._content_chunks(content))
+            self._insert_blob_file(content_id, content.content_type, blob_id, length, digest, **attributes)
+        else:
+            with self.fs.new_file(_id=content_id, content_type=content.content_type, **attributes) as fp:
+                for chunk in self._content_chunks(content):
                     fp.write(chunk)
-            else:
-                # Ideally we could just ensure that we don't get strings in here and only byte streams
-                # but being confident of that wolud be a lot more work than we have time for so we just
-                # handle both cases here.
-                if isinstance(content.data, six.text_type):
-                    fp.write(content.data.encode('utf-8'))
-                else:
-                    fp.write(content.data)
 
+        asset_changed.send(sender=self.__class__, asset_key=content.location)
         return content
 
+    @staticmethod
+    def _content_chunks(content):
+        """
+        Yield the content of the StaticContent `content` as byte strings.
+        """
+        # It seems that this code thought that only some specific object would have the `__iter__` attribute
+        # but many more objects have this in python3 and shouldn't be using the chunking logic. For string and
+        # byte streams we write them directly to gridfs and convert them to byetarrys if necessary.
+        if hasattr(content.data, '__iter__') and not isinstance(content.data, (six.binary_type, six.string_types)):
+            for chunk in content.data:
+                yield chunk
+        else:
+            # Ideally we could just ensure that we don't get strings in here and only byte streams
+            # but being confident of that wolud be a lot more work than we have time for so we just
+            # handle both cases here.
+            if isinstance(content.data, six.text_type):
+                yield content.data.encode('utf-8')
+            else:
+                yield content.data
+
+    def _store_blob(self, chunks):
+        """
+        Store the byte strings in `chunks` as a blob, unless there's already a blob with the same content, and
+        add a reference to that blob.
+
+        Returns the id of the blob, the length and MD5 digest of its content, and whether it's a new blob.
+        """
+        md5 = hashlib.md5()
+        length = 0
+        # The digest is needed before the blob can be looked up, so the content is held in memory, or in a
+        # temporary file once it's large, rather than all read at once.
+        with tempfile.SpooledTemporaryFile(max_size=BLOB_SPOOL_MAX_SIZE) as spool:
+            for chunk in chunks:
+                md5.update(chunk)
+                length += len(chunk)
+                spool.write(chunk)
+            digest = md5.hexdigest()
+
+            # Blobs which are no longer referenced are about to be deleted, so they're never referenced again.
+            blob = self.blob_files.find_one_and_update(
+                {'digest': digest, 'length': length, 'refcount': {'$gt': 0}},
+                {'$inc': {'refcount': 1}},
+                projection={'_id': True},
+            )
+            if blob is not None:
+                return blob['_id'], length, digest, False
+
+            spool.seek(0)
+            blob_id = self.blobs.put(spool, digest=digest, refcount=1)
+        return blob_id, length, digest, True
+
+    def _reference_blob(self, blob_id):
+        """
+        Add a reference to the blob `blob_id`, and return whether it still exists.
+        """
+        result = self.blob_files.update_one({'_id': blob_id, 'refcount': {'$gt': 0}}, {'$inc': {'refcount': 1}})
+        return result.matched_count == 1
+
+    def _reference_file_blob(self, document):
+        """
+        Add a reference to the blob of the content-addressed file of `document`, and return the document of that
+        file as it is now, or None if the file was deleted or isn't content-addressed anymore.  The file may have
+        been replaced since `document` was read, releasing the blob it had then.
+        """
+        while not self._reference_blob(document['blob']):
+            document = self.fs_files.find_one({'_id': document['_id']})
+            if document is None or document.get('blob') is None:
+                return None
+        return document
+
+    def _release_blob(self, blob_id):
+        """
+        Remove a reference to the blob `blob_id`, and delete it if that was the last one.
+        """
+        blob = self.blob_files.find_one_and_update(
+            {'_id': blob_id},
+            {'$inc': {'refcount': -1}},
+            projection={'refcount': True},
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        if blob is not None and blob['refcount'] <= 0:
+            self.blobs.delete(blob_id)
+
+    def _insert_blob_file(self, file_id, content_type, blob_id, length, digest, **attributes):
+        """
+        Insert the GridFS file of a content-addressed asset, whose content is in the blob `blob_id`.
+        """
+        document = dict(
+            attributes,
+            _id=file_id,
+            contentType=content_type,
+            length=length,
+            chunkSize=gridfs.DEFAULT_CHUNK_SIZE,
+            uploadDate=datetime.datetime.utcnow(),
+            md5=digest,
+            blob=blob_id,
+        )
+        try:
+            self.fs_files.insert_one(document)
+        except Exception:
+            self._release_blob(blob_id)
+            raise
+
+    def _delete_file(self, file_id):
+        """
+        Delete the GridFS file `file_id` of an asset, and release its blob if it's content-addressed.
+        """
+        # The file is deleted and read at once, so that its blob is released exactly once.
+        document = self.fs_files.find_one_and_delete({'_id': file_id}, projection={'blob': True})
+        self.chunks.delete_many({'files_id': file_id})
+        if document is not None and document.get('blob') is not None:
+            self._release_blob(document['blob'])
+
+    def _open_content(self, fp):
+        """
+        Return a file-like object reading the content of the asset whose GridFS file is `fp`.
+        """
+        blob_id = getattr(fp, 'blob', None)
+        if blob_id is None:
+            return fp
+        return self.blobs.get(blob_id)
+
     def delete(self, location_or_id):
         """
         Delete an asset.
+
+        asset_changed is only sent if the asset is given by its AssetKey rather than its database id.
         """
+        asset_key = None
         if isinstance(location_or_id, AssetKey):
+            asset_key = location_or_id
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
-        self.fs.delete(location_or_id)
+        self._delete_file(location_or_id)
+        if asset_key is not None:
+            asset_changed.send(sender=self.__class__, asset_key=asset_key)
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -144,7 +299,7 @@ class MongoContentStore(ContentStore):
                         thumbnail_location[4]
                     )
                 return StaticContentStream(
-                    location, fp.displayname, fp.content_type, fp, last_modified_at=fp.uploadDate,
+                    location, fp.displayname, fp.content_type, self._open_content(fp), last_modified_at=fp.uploadDate,
                     thumbnail_location=thumbnail_location,
                     import_path=getattr(fp, 'import_path', None),
                     length=fp.length, locked=getattr(fp, 'locked', False),
@@ -163,7 +318,8 @@ class MongoContentStore(ContentStore):
                             thumbnail_location[4]
                         )
                     return StaticContent(
-                        location, fp.displayname, fp.content_type, fp.read(), last_modified_at=fp.uploadDate,
+                        location, fp.displayname, fp.content_type, self._open_content(fp).read(),
+                        last_modified_at=fp.uploadDate,
                         thumbnail_location=thumbnail_location,
                         import_path=getattr(fp, 'import_path', None),
                         length=fp.length, locked=getattr(fp, 'locked', False),
@@ -176,22 +332,33 @@ class MongoContentStore(ContentStore):
                 return None
 
     def export(self, location, output_directory):
-        content = self.find(location)
-
-        filename = content.name
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
+        """
+        Write the asset at `location` to a file under `output_directory`, a GridFS chunk at a time.
+        """
+        content = self.find(location, as_stream=True)
+        try:
+            filename = content.name
+            if content.import_path is not None:
+                output_directory = output_directory + '/' + os.path.dirname(content.import_path)
 
-        if not os.path.exists(output_directory):
-            os.makedirs(output_directory)
+            if not os.path.exists(output_directory):
+                try:
+                    os.makedirs(output_directory)
+                except OSError:
+                    # Another thread exporting the course created it.
+                    if not os.path.isdir(output_directory):
+                        raise
 
-        # Escape invalid char from filename.
-        export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
 
-        disk_fs = OSFS(output_directory)
+            disk_fs = OSFS(output_directory)
 
-        with disk_fs.open(export_name, 'wb') as asset_file:
-            asset_file.write(content.data)
+            with disk_fs.open(export_name, 'wb') as asset_file:
+                for chunk in content.stream_data():
+                    asset_file.write(chunk)
+        finally:
+            content.close()
 
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
@@ -207,18 +374,49 @@ class MongoContentStore(ContentStore):
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
+        # TODO: On 6/19/14, I had to put a try/except around this
+        # to export a course. The course failed on JSON files in
+        # the /static/ directory placed in it with an import.
+        #
+        # If this hasn't been looked at in a while, remove this comment.
+        #
+        # When debugging course exports, this might be a good place
+        # to look. -- pmitros
+
+        # The assets are copied a chunk at a time by a few threads, so that
+        # large assets aren't held in memory, and small ones don't wait on
+        # each other's round trips to Mongo.  Assets with the same name in the
+        # same directory are written to the same file, so they are copied one
+        # after another, in order, by the same thread.
+        assets_by_path = OrderedDict()
+        for asset in assets:
+            directory = os.path.dirname(asset['import_path']) if asset.get('import_path') else ''
+            assets_by_path.setdefault((directory, asset.get('displayname')), []).append(asset)
+
+        def export_assets(same_path_assets):
+            """
+            Export assets written to the same file, one after another.
+            """
+            for asset in same_path_assets:
+                self.export(asset['asset_key'], output_directory)
+
+        start_time = time.time()
+        pool = ThreadPool(ASSET_COPY_THREADS)
+        try:
+            pool.map(export_assets, list(assets_by_path.values()))
+        finally:
+            pool.close()
+            pool.join()
+        duration = time.time() - start_time
+        total_size = sum(asset.get('length') or 0 for asset in assets)
+        log.info(
+            u'Exported %d assets of %s, %d bytes in %.1f s (%.0f bytes/s)',
+            len(assets), course_key, total_size, duration, total_size / duration if duration else 0,
+        )
+
         for asset in assets:
-            # TODO: On 6/19/14, I had to put a try/except around this
-            # to export a course. The course failed on JSON files in
-            # the /static/ directory placed in it with an import.
-            #
-            # If this hasn't been looked at in a while, remove this comment.
-            #
-            # When debugging course exports, this might be a good place
-            # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
             for attr, value in six.iteritems(asset):
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key', 'blob']:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
 
         with open(assets_policy_file, 'w') as f:
@@ -247,7 +445,7 @@ class MongoContentStore(ContentStore):
             items = self.fs_files.find(query)
             assets_to_delete = assets_to_delete + items.count()
             for asset in items:
-                self.fs.delete(asset[prefix])
+                self._delete_file(self.make_id_son(asset))
 
             self.fs_files.remove(query)
         return assets_to_delete
@@ -383,6 +581,7 @@ class MongoContentStore(ContentStore):
         result = self.fs_files.update({'_id': asset_db_key}, {"$set": attr_dict}, upsert=False)
         if not result.get('updatedExisting', True):
             raise NotFoundError(asset_db_key)
+        asset_changed.send(sender=self.__class__, asset_key=location)
 
     @autoretry_read()
     def get_attrs(self, location):
@@ -405,12 +604,14 @@ class MongoContentStore(ContentStore):
         """
         See :meth:`.ContentStore.copy_all_course_assets`
 
-        This implementation fairly expensively copies all of the data
+        This implementation fairly expensively copies all of the data, except for content-addressed assets,
+        whose copies reference the same blobs.
         """
         source_query = query_for_course(source_course_key)
         # it'd be great to figure out how to do all of this on the db server and not pull the bits over
         for asset in self.fs_files.find(source_query):
             asset_key = self.make_id_son(asset)
+            blob_id = asset.get('blob')
             # don't convert from string until fs access
             source_content = self.fs.get(asset_key)
             if isinstance(asset_key, six.string_types):
@@ -432,10 +633,8 @@ class MongoContentStore(ContentStore):
                     dest_course_key.make_asset_key(asset_key['category'], asset_key['name']).for_branch(None)
                 )
 
-            self.fs.put(
-                source_content.read(),
-                _id=asset_id, filename=asset['filename'], content_type=asset['contentType'],
-                displayname=asset['displayname'], content_son=asset_key,
+            attributes = dict(
+                filename=asset['filename'], displayname=asset['displayname'], content_son=asset_key,
                 # thumbnail is not technically correct but will be functionally correct as the code
                 # only looks at the name which is not course relative.
                 thumbnail_location=asset['thumbnail_location'],
@@ -443,6 +642,62 @@ class MongoContentStore(ContentStore):
                 # getattr b/c caching may mean some pickled instances don't have attr
                 locked=asset.get('locked', False)
             )
+            if blob_id is not None:
+                current_asset = self._reference_file_blob(asset)
+                if current_asset is None:
+                    log.warning(
+                        u"Asset %s was deleted or replaced while being copied to %s, and wasn't copied",
+                        asset['_id'], dest_course_key,
+                    )
+                    continue
+                self._insert_blob_file(
+                    asset_id, current_asset['contentType'], current_asset['blob'], current_asset['length'],
+                    current_asset['md5'], **attributes
+                )
+            elif self.content_addressed:
+                blob_id, length, digest, __ = self._store_blob(
+                    iter(partial(source_content.read, source_content.chunk_size), b'')
+                )
+                self._insert_blob_file(asset_id, asset['contentType'], blob_id, length, digest, **attributes)
+            else:
+                self.fs.put(source_content, _id=asset_id, content_type=asset['contentType'], **attributes)
+
+    def deduplicate_assets(self):
+        """
+        Move the content of every asset which isn't content-addressed yet to a blob, shared with the other
+        assets with the same content.
+
+        Returns the number of assets moved, and the number of bytes of content they no longer duplicate.
+        """
+        moved = 0
+        reclaimed = 0
+        for asset in self.fs_files.find({'blob': {'$exists': False}}, projection={'_id': True}):
+            file_id = self.make_id_son(asset)
+            try:
+                fp = self.fs.get(file_id)
+            except NoFile:
+                continue
+            # Need to replace dict IDs with SON for chunk lookup to work under Python 3
+            if isinstance(fp._id, dict):
+                fp._file['_id'] = file_id
+            # Saving the asset again reuses its file id for the chunks of the new version, so only the chunks
+            # of this version are deleted once it's moved.  They are all written before the file document is.
+            chunk_ids = [chunk['_id'] for chunk in self.chunks.find({'files_id': file_id}, projection={'_id': True})]
+            blob_id, length, __, is_new_blob = self._store_blob(iter(partial(fp.read, fp.chunk_size), b''))
+
+            # The asset may have been deleted or saved again meanwhile.
+            result = self.fs_files.update_one(
+                {'_id': file_id, 'blob': {'$exists': False}, 'uploadDate': fp.upload_date, 'md5': fp.md5},
+                {'$set': {'blob': blob_id}},
+            )
+            if result.modified_count == 0:
+                self._release_blob(blob_id)
+                continue
+            self.chunks.delete_many({'_id': {'$in': chunk_ids}})
+            moved += 1
+            if not is_new_blob:
+                reclaimed += length
+        return moved, reclaimed
 
     def delete_all_course_assets(self, course_key):
         """
@@ -454,7 +709,11 @@ class MongoContentStore(ContentStore):
         matching_assets = self.fs_files.find(course_query)
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
-            self.fs.delete(asset_key)
+            self._delete_file(asset_key)
+            asset_id = asset.get('content_son', asset['_id'])
+            asset_changed.send(
+                sender=self.__class__, asset_key=course_key.make_asset_key(asset_id['category'], asset_id['name'])
+            )
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -503,6 +762,14 @@ class MongoContentStore(ContentStore):
         return dbkey
 
     def ensure_indexes(self):
+        # Index needed by `_store_blob` to find the blob with the same content.
+        create_collection_index(
+            self.blob_files,
+            [
+                ('digest', pymongo.ASCENDING),
+            ],
+            background=True
+        )
         # Index needed thru 'category' by `_get_all_content_for_course` and others. That query also takes a sort
         # which can be `uploadDate`, `displayname`,
         # TODO: uncomment this line once this index in prod is cleaned up. See OPS-2863 for tracking clean up.
@@ -26,6 +26,8 @@ from xmodule.stringify import stringify_children
 from xmodule.util.misc import escape_html_characters
 from xmodule.util.xmodule_django import add_webpack_to_fragment
 from xmodule.x_module import (
+    PUBLIC_VIEW,
+    STUDENT_VIEW,
     HTMLSnippet,
     ResourceTemplates,
     shim_xmodule_js,
@@ -121,6 +123,12 @@ class HtmlBlock(
             return self.data.replace("%%USER_ID%%", self.system.anonymous_student_id)
         return self.data
 
+    def is_view_cacheable(self, view):
+        """
+        Returns whether the output of the view is the same for all users, so that the runtime can cache it.
+        """
+        return view in (STUDENT_VIEW, PUBLIC_VIEW) and "%%USER_ID%%" not in (self.data or "")
+
     def studio_view(self, _context):
         """
         Return the studio view.
@@ -455,6 +463,12 @@ class CourseInfoBlock(CourseInfoFields, HtmlBlock):
 
     template_dir_name = None
 
+    def is_view_cacheable(self, view):
+        """
+        Course updates are shown by date, so they aren't cached.
+        """
+        return self.data != "" and super(CourseInfoBlock, self).is_view_cacheable(view)
+
     def get_html(self):
         """ Returns html required for rendering XModule. """
 
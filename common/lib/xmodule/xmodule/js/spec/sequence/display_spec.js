@@ -121,5 +121,34 @@
                 });
             });
         });
+
+        describe('Lazy units', function() {
+            beforeEach(function() {
+                this.tab = $('<div>').attr('data-lazy-url', '/xblock/unit/view/student_view');
+                spyOn($, 'ajax').and.returnValue($.Deferred().resolve({
+                    html: '<div class="xblock">Unit</div>',
+                    resources: [['css-hash', {mimetype: 'text/css', kind: 'text', data: ''}]]
+                }).promise());
+            });
+
+            it('fetches a unit from the XBlock view handler once', function() {
+                this.sequence.loadLazyUnit(this.tab);
+                this.sequence.loadLazyUnit(this.tab);
+                expect($.ajax.calls.count()).toEqual(1);
+                expect($.ajax.calls.mostRecent().args[0].url).toEqual('/xblock/unit/view/student_view');
+                expect(this.tab.text()).toEqual('<div class="xblock">Unit</div>');
+            });
+
+            it('initializes the blocks of a unit it displays', function() {
+                var self = this;
+                this.sequence.loadLazyUnit(this.tab).done(function() {
+                    self.sequence.displayUnit(self.tab, 1);
+                });
+                expect(this.sequence.content_container.find('.xblock').text()).toEqual('Unit');
+                expect(local.XBlock.initializeBlocks).toHaveBeenCalledWith(
+                    this.sequence.content_container, undefined
+                );
+            });
+        });
     });
 }).call(this);
@@ -1,5 +1,5 @@
 /* eslint-disable no-underscore-dangle */
-/* globals Logger, interpolate */
+/* globals Logger, interpolate, $script */
 
 (function() {
     'use strict';
@@ -227,7 +227,7 @@
         };
 
         Sequence.prototype.render = function(newPosition) {
-            var bookmarked, currentTab, modxFullUrl, sequenceLinks,
+            var bookmarked, currentTab, modxFullUrl,
                 self = this;
             if (this.position !== newPosition) {
                 if (this.position) {
@@ -250,43 +250,145 @@
                 currentTab = this.contents.eq(newPosition - 1);
                 bookmarked = this.el.find('.active .bookmark-icon').hasClass('bookmarked');
 
-                // update the data-attributes with latest contents only for updated problems.
                 this.content_container
-                    .html(currentTab.text())  // xss-lint: disable=javascript-jquery-html
                     .attr('aria-labelledby', currentTab.attr('aria-labelledby'))
                     .data('bookmarked', bookmarked);
-
-
-                if (this.anyUpdatedProblems(newPosition)) {
-                    $.each(this.updatedProblems[newPosition], function(problemId, latestData) {
-                        var latestContent, latestResponse;
-                        latestContent = latestData[0];
-                        latestResponse = latestData[1];
-                        self.content_container
-                            .find("[data-problem-id='" + problemId + "']")
-                            .data('content', latestContent)
-                            .data('problem-score', latestResponse.current_score)
-                            .data('problem-total-possible', latestResponse.total_possible)
-                            .data('attempts-used', latestResponse.attempts_used);
+                this.position = newPosition;
+                if (currentTab.data('lazy-url')) {
+                    this.content_container.empty();
+                    this.loadLazyUnit(currentTab).done(function() {
+                        // The learner may have moved on while the unit was loading.
+                        if (self.position === newPosition) {
+                            self.displayUnit(currentTab, newPosition);
+                        }
                     });
+                } else {
+                    this.displayUnit(currentTab, newPosition);
                 }
-                XBlock.initializeBlocks(this.content_container, this.requestToken);
-
-                // For embedded circuit simulator exercises in 6.002x
-                if (window.hasOwnProperty('update_schematics')) {
-                    window.update_schematics();
-                }
-                this.position = newPosition;
                 this.toggleArrows();
-                this.hookUpContentStateChangeEvent();
                 this.updatePageTitle();
-                sequenceLinks = this.content_container.find('a.seqnav');
-                sequenceLinks.click(this.goto);
 
                 this.sr_container.focus();
             }
         };
 
+        Sequence.prototype.displayUnit = function(tab, position) {
+            var sequenceLinks,
+                self = this;
+
+            this.content_container.html(tab.text());  // xss-lint: disable=javascript-jquery-html
+
+            // update the data-attributes with latest contents only for updated problems.
+            if (this.anyUpdatedProblems(position)) {
+                $.each(this.updatedProblems[position], function(problemId, latestData) {
+                    var latestContent, latestResponse;
+                    latestContent = latestData[0];
+                    latestResponse = latestData[1];
+                    self.content_container
+                        .find("[data-problem-id='" + problemId + "']")
+                        .data('content', latestContent)
+                        .data('problem-score', latestResponse.current_score)
+                        .data('problem-total-possible', latestResponse.total_possible)
+                        .data('attempts-used', latestResponse.attempts_used);
+                });
+            }
+            // Lazily loaded units were rendered with a request of their own, so
+            // their blocks are initialized whatever their request token.
+            XBlock.initializeBlocks(this.content_container, tab.data('lazy-url') ? undefined : this.requestToken);
+
+            // For embedded circuit simulator exercises in 6.002x
+            if (window.hasOwnProperty('update_schematics')) {
+                window.update_schematics();
+            }
+            this.hookUpContentStateChangeEvent();
+            sequenceLinks = this.content_container.find('a.seqnav');
+            sequenceLinks.click(this.goto);
+        };
+
+        Sequence.prototype.loadLazyUnit = function(tab) {
+            // Units that were not rendered with the sequence are fetched on demand
+            // from the XBlock view handler, along with the resources they need,
+            // and then kept in their tab like the other units.
+            var self = this,
+                loaded = tab.data('lazy-unit');
+            if (!loaded) {
+                loaded = $.ajax({
+                    url: tab.data('lazy-url'),
+                    type: 'GET',
+                    dataType: 'json'
+                }).then(function(response) {
+                    return self.addXBlockFragmentResources(response.resources).then(function() {
+                        tab.text(response.html);
+                    });
+                }).fail(function() {
+                    tab.removeData('lazy-unit');
+                });
+                tab.data('lazy-unit', loaded);
+            }
+            return loaded;
+        };
+
+        Sequence.prototype.addXBlockFragmentResources = function(resources) {
+            // Load the resources of a fragment returned by the XBlock view handler
+            // one after another, skipping those already loaded in the page.
+            var self = this,
+                deferred = $.Deferred(),
+                applyResource;
+            window.loadedXBlockResources = window.loadedXBlockResources || [];
+            applyResource = function(index) {
+                var hash;
+                if (index >= resources.length) {
+                    deferred.resolve();
+                    return;
+                }
+                hash = resources[index][0];
+                if (_.indexOf(window.loadedXBlockResources, hash) >= 0) {
+                    applyResource(index + 1);
+                    return;
+                }
+                window.loadedXBlockResources.push(hash);
+                self.loadResource(resources[index][1]).done(function() {
+                    applyResource(index + 1);
+                }).fail(function() {
+                    deferred.reject();
+                });
+            };
+            applyResource(0);
+            return deferred.promise();
+        };
+
+        Sequence.prototype.loadResource = function(resource) {
+            // We give XBlock fragments free-reign to add javascript and CSS to
+            // to the page, so XSS escaping doesn't matter much in this context
+            var $head = $('head'),
+                loaded;
+            if (resource.mimetype === 'text/css') {
+                if (resource.kind === 'text') {
+                    // xss-lint: disable=javascript-jquery-append,javascript-concat-html
+                    $head.append("<style type='text/css'>" + resource.data + '</style>');
+                } else if (resource.kind === 'url') {
+                    // xss-lint: disable=javascript-jquery-append,javascript-concat-html
+                    $head.append("<link rel='stylesheet' href='" + resource.data + "' type='text/css'>");
+                }
+            } else if (resource.mimetype === 'application/javascript') {
+                if (resource.kind === 'text') {
+                    // xss-lint: disable=javascript-jquery-append,javascript-concat-html
+                    $head.append('<script>' + resource.data + '</script>');
+                } else if (resource.kind === 'url') {
+                    loaded = $.Deferred();
+                    $script(resource.data, resource.data, function() {
+                        loaded.resolve();
+                    });
+                    return loaded.promise();
+                }
+            } else if (resource.mimetype === 'text/html' && resource.placement === 'head') {
+                // xss-lint: disable=javascript-jquery-append
+                $head.append(resource.data);
+            }
+            // Return an already resolved promise for synchronous updates
+            return $.Deferred().resolve().promise();
+        };
+
         Sequence.prototype.goto = function(event) {
             var alertTemplate, alertText, isBottomNav, newPosition, widgetPlacement;
             event.preventDefault();
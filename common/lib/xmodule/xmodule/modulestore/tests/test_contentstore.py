@@ -3,6 +3,8 @@
 """
 
 
+import itertools
+import json
 import logging
 import mimetypes
 import shutil
@@ -12,6 +14,7 @@ from uuid import uuid4
 
 import ddt
 import path
+from mock import Mock, patch
 from opaque_keys.edx.keys import AssetKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
@@ -53,13 +56,13 @@ class TestContentstore(unittest.TestCase):
             del CourseLocator.deprecated
         return super(TestContentstore, cls).tearDownClass()
 
-    def set_up_assets(self, deprecated):
+    def set_up_assets(self, deprecated, content_addressed=False):
         """
         Setup contentstore w/ proper overriding of deprecated.
         """
         # since MongoModuleStore and MongoContentStore are basically assumed to be together, create this class
         # as well
-        self.contentstore = MongoContentStore(HOST, DB, port=PORT)
+        self.contentstore = MongoContentStore(HOST, DB, port=PORT, content_addressed=content_addressed)
         self.addCleanup(self.contentstore._drop_database)  # pylint: disable=protected-access
 
         AssetLocator.deprecated = deprecated
@@ -126,12 +129,13 @@ class TestContentstore(unittest.TestCase):
             "Found unknown asset {}".format(unknown_asset)
         )
 
-    @ddt.data(True, False)
-    def test_export_for_course(self, deprecated):
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_export_for_course(self, deprecated, content_addressed):
         """
         Test export
         """
-        self.set_up_assets(deprecated)
+        self.set_up_assets(deprecated, content_addressed=content_addressed)
         root_dir = path.Path(mkdtemp())
         try:
             self.contentstore.export_all_for_course(
@@ -145,6 +149,35 @@ class TestContentstore(unittest.TestCase):
                 if filename not in self.course1_files:
                     filepath = path.Path(root_dir / filename)
                     self.assertFalse(filepath.isfile(), "{} is unexpected exported a file".format(filepath))
+            with open(root_dir / "policy.json") as policy_file:
+                policy = json.load(policy_file)
+            self.assertEqual(sorted(policy), sorted(self.course1_files))
+            for attributes in policy.values():
+                self.assertNotIn('blob', attributes)
+        finally:
+            shutil.rmtree(root_dir)
+
+    def test_export_assets_with_same_name(self):
+        """
+        Test that assets exported to the same file are written one after another, the last one winning
+        """
+        self.set_up_assets(False)
+        for filename in ['picture1.jpg', 'picture2.jpg', 'picture3.jpg']:
+            asset_key = self.course1_key.make_asset_key('asset', 'same_' + filename)
+            self.save_asset(filename, asset_key, 'same.jpg', False)
+        assets, __ = self.contentstore.get_all_content_for_course(self.course1_key)
+        last_asset = [asset for asset in assets if asset['displayname'] == 'same.jpg'][-1]
+
+        root_dir = path.Path(mkdtemp())
+        try:
+            self.contentstore.export_all_for_course(
+                self.course1_key, root_dir,
+                path.Path(root_dir / "policy.json"),
+            )
+            self.assertEqual(
+                path.Path(root_dir / 'same.jpg').bytes(),
+                self.contentstore.find(last_asset['asset_key']).data,
+            )
         finally:
             shutil.rmtree(root_dir)
 
@@ -211,3 +244,125 @@ class TestContentstore(unittest.TestCase):
         # ensure it didn't remove any from other course
         __, count = self.contentstore.get_all_content_for_course(self.course2_key)
         self.assertEqual(count, len(self.course2_files))
+
+    def get_blob_refcounts(self):
+        """
+        Return the reference count of each blob, by digest.
+        """
+        return {blob['digest']: blob['refcount'] for blob in self.contentstore.blob_files.find()}
+
+    def assert_content_equal(self, asset_key, filename):
+        """
+        Assert that the asset `asset_key` has the content of the static file `filename`.
+        """
+        with open("{}/static/{}".format(DATA_DIR, filename), "rb") as f:
+            data = f.read()
+        self.assertEqual(self.contentstore.find(asset_key).data, data)
+        self.assertEqual(b''.join(self.contentstore.find(asset_key, as_stream=True).stream_data()), data)
+
+    @ddt.data(True, False)
+    def test_content_addressed(self, deprecated):
+        """
+        Assets with the same content share a blob, which is deleted with the last of them.
+        """
+        self.set_up_assets(deprecated, content_addressed=True)
+        self.assertEqual(self.contentstore.chunks.count(), 0)
+        # picture1.jpg is in both courses.
+        self.assertEqual(sorted(self.get_blob_refcounts().values()), [1, 1, 1, 1, 2])
+        for course_key, files in ((self.course1_key, self.course1_files), (self.course2_key, self.course2_files)):
+            for filename in files:
+                self.assert_content_equal(course_key.make_asset_key('asset', filename), filename)
+
+        self.contentstore.delete(self.course1_key.make_asset_key('asset', 'picture1.jpg'))
+        self.assertEqual(sorted(self.get_blob_refcounts().values()), [1, 1, 1, 1, 1])
+        self.contentstore.delete_all_course_assets(self.course2_key)
+        self.assertEqual(sorted(self.get_blob_refcounts().values()), [1, 1])
+
+    @ddt.data(True, False)
+    def test_copy_content_addressed_assets(self, deprecated):
+        """
+        Copying content-addressed assets only copies their records.
+        """
+        self.set_up_assets(deprecated, content_addressed=True)
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        self.contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assertEqual(sorted(self.get_blob_refcounts().values()), [1, 1, 2, 2, 3])
+        for filename in self.course1_files:
+            self.assert_content_equal(dest_course.make_asset_key('asset', filename), filename)
+
+    def test_copy_content_addressed_assets_changed_meanwhile(self):
+        """
+        Content-addressed assets whose blob is released while they're being copied are copied with the blob
+        they have then, and those deleted meanwhile aren't copied.
+        """
+        self.set_up_assets(False, content_addressed=True)
+        contentstore = self.contentstore
+
+        def get_blob(asset_key):
+            """
+            Return the id of the blob of the asset `asset_key`.
+            """
+            return contentstore.fs_files.find_one({'_id': contentstore.asset_db_key(asset_key)[0]})['blob']
+
+        released_key = self.course1_key.make_asset_key('asset', 'picture2.jpg')
+        deleted_key = self.course1_key.make_asset_key('asset', 'contains.sh')
+        released_blob, deleted_blob = get_blob(released_key), get_blob(deleted_key)
+        reference_blob = contentstore._reference_blob  # pylint: disable=protected-access
+        seen_blobs = set()
+
+        def change_then_reference_blob(blob_id):
+            """
+            Fail to reference the blob of the released asset the first time, and delete the deleted asset
+            before referencing its blob.
+            """
+            first_time = blob_id not in seen_blobs
+            seen_blobs.add(blob_id)
+            if blob_id == released_blob and first_time:
+                return False
+            if blob_id == deleted_blob:
+                contentstore.delete(deleted_key)
+            return reference_blob(blob_id)
+
+        dest_course = CourseLocator('test', 'destination', 'copy')
+        with patch.object(contentstore, '_reference_blob', side_effect=change_then_reference_blob):
+            contentstore.copy_all_course_assets(self.course1_key, dest_course)
+        self.assert_content_equal(dest_course.make_asset_key('asset', 'picture2.jpg'), 'picture2.jpg')
+        self.assert_content_equal(dest_course.make_asset_key('asset', 'picture1.jpg'), 'picture1.jpg')
+        deleted_copy_key = dest_course.make_asset_key('asset', 'contains.sh')
+        self.assertIsNone(contentstore.find(deleted_copy_key, throw_on_not_found=False))
+
+    @ddt.data(True, False)
+    def test_deduplicate_assets(self, deprecated):
+        """
+        Assets which aren't content-addressed can be moved to shared blobs.
+        """
+        self.set_up_assets(deprecated)
+        moved, reclaimed = self.contentstore.deduplicate_assets()
+        self.assertEqual(moved, len(self.course1_files) + len(self.course2_files))
+        picture1 = self.contentstore.find(self.course1_key.make_asset_key('asset', 'picture1.jpg'))
+        self.assertEqual(reclaimed, picture1.length)
+        self.assertEqual(self.contentstore.chunks.count(), 0)
+        self.assertEqual(self.contentstore.deduplicate_assets(), (0, 0))
+        for filename in self.course2_files:
+            self.assert_content_equal(self.course2_key.make_asset_key('asset', filename), filename)
+
+    def test_deduplicate_asset_saved_meanwhile(self):
+        """
+        An asset saved again while its content is moved to a blob keeps its new content.
+        """
+        self.set_up_assets(False)
+        asset_key = self.course1_key.make_asset_key('asset', 'contains.sh')
+        fs_files = self.contentstore.fs_files
+
+        def update_one(query, update):
+            """
+            Save the asset again once its file has been moved to a blob.
+            """
+            result = fs_files.update_one(query, update)
+            if result.modified_count and query['_id']['name'] == asset_key.block_id:
+                self.save_asset('door_2.ogg', asset_key, 'contains.sh', False)
+            return result
+
+        with patch.object(self.contentstore, 'fs_files', Mock(wraps=fs_files, update_one=update_one)):
+            self.contentstore.deduplicate_assets()
+        self.assert_content_equal(asset_key, 'door_2.ogg')
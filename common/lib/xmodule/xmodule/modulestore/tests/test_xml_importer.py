@@ -392,3 +392,7 @@ class StaticContentImporterTest(unittest.TestCase):
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.generate_thumbnail.assert_called_once()
+            # The thumbnail is made from the file, rather than from its content in memory.
+            self.assertEqual(
+                self.mocked_content_store.generate_thumbnail.call_args[1]['tempfile_path'], full_file_path
+            )
@@ -28,7 +28,10 @@ import logging
 import mimetypes
 import os
 import re
+import time
 from abc import abstractmethod
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 import six
 import xblock
@@ -41,7 +44,7 @@ from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
 from xblock.runtime import DictKeyValueStore, KvsFieldData
 
 from xmodule.assetstore import AssetMetadata
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import ASSET_COPY_THREADS, ASSET_FILE_CHUNK_SIZE, StaticContent
 from xmodule.errortracker import make_error_tracker
 from xmodule.library_tools import LibraryToolsService
 from xmodule.modulestore import ModuleStoreEnum
@@ -99,11 +102,14 @@ class StaticContentImporter:
         mimetypes.add_type('application/octet-stream', '.sjson')
         mimetypes.add_type('application/octet-stream', '.srt')
         self.mimetypes_list = list(mimetypes.types_map.values())
+        # The sizes of the files imported by import_static_content_directory, from the threads importing them.
+        self.imported_sizes = []
 
     def import_static_content_directory(self, content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR, verbose=False):
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -117,20 +123,38 @@ class StaticContentImporter:
                 if verbose:
                     log.debug('importing static content %s...', file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
-
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+                file_paths.append(file_path)
 
+        # The files are copied a chunk at a time by a few threads, so that
+        # large files aren't held in memory, and small ones don't wait on
+        # each other's round trips to Mongo.
+        self.imported_sizes = []
+        start_time = time.time()
+        pool = ThreadPool(ASSET_COPY_THREADS)
+        try:
+            results = pool.map(partial(self.import_static_file, base_dir=static_dir), file_paths)
+        finally:
+            pool.close()
+            pool.join()
+        duration = time.time() - start_time
+        total_size = sum(self.imported_sizes)
+
+        for imported_file_attrs in results:
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+
+        log.info(
+            u'Imported %d static files of %s, %d bytes in %.1f s (%.0f bytes/s)',
+            len(remap_dict), self.target_id, total_size, duration, total_size / duration if duration else 0,
+        )
         return remap_dict
 
     def import_static_file(self, full_file_path, base_dir):
         filename = os.path.basename(full_file_path)
         try:
-            with open(full_file_path, 'rb') as f:
-                data = f.read()
+            asset_file = open(full_file_path, 'rb')
         except IOError:
             # OS X "companion files". See
             # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
@@ -139,6 +163,18 @@ class StaticContentImporter:
             # Not a 'hidden file', then re-raise exception
             raise
 
+        with asset_file:
+            imported_file_attrs = self._import_static_file(asset_file, full_file_path, base_dir)
+            # Saving the file read it to its end.
+            self.imported_sizes.append(asset_file.tell())
+        return imported_file_attrs
+
+    def _import_static_file(self, asset_file, full_file_path, base_dir):
+        """
+        Save the static file `asset_file` at `full_file_path` to the contentstore, a chunk at a time.
+        """
+        filename = os.path.basename(full_file_path)
+
         # strip away leading path from the name
         file_subpath = full_file_path.replace(base_dir, '')
         if file_subpath.startswith('/'):
@@ -159,12 +195,14 @@ class StaticContentImporter:
         if not mime_type or mime_type not in self.mimetypes_list:
             mime_type = mimetypes.guess_type(filename)[0]  # Assign guessed mimetype
         content = StaticContent(
-            asset_key, displayname, mime_type, data,
+            asset_key, displayname, mime_type, iter(partial(asset_file.read, ASSET_FILE_CHUNK_SIZE), b''),
             import_path=file_subpath, locked=locked
         )
 
         # first let's save a thumbnail so we can get back a thumbnail location
-        thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(content)
+        thumbnail_content, thumbnail_location = self.static_content_store.generate_thumbnail(
+            content, tempfile_path=full_file_path
+        )
 
         if thumbnail_content is not None:
             content.thumbnail_location = thumbnail_location
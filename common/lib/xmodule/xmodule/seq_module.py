@@ -8,6 +8,7 @@ xModule implementation of a learning sequence
 import collections
 import json
 import logging
+import time
 from datetime import datetime
 from functools import reduce
 
@@ -499,8 +500,17 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
         Updates the given fragment with rendered student views of the given
         display_items.  Returns a list of dict objects with information about
         the given display_items.
+
+        If the context contains a lazy_unit_url, only the item at the
+        current position is rendered.  The other items are given a
+        'lazy_url' from which their content can be fetched on demand.
+        The lazy_unit_url format is defined in the template context like so:
+        context['lazy_unit_url'] = '/my/item/path/{usage_key}/whatever'
         """
         render_items = not context.get('exclude_units', False)
+        lazy_unit_url = context.get('lazy_unit_url') if render_items else None
+        rendered_item_seconds = 0.0
+        num_lazy_items = 0
         is_user_authenticated = self.is_user_authenticated(context)
         completion_service = self.runtime.service(self, 'completion')
         if render_items:
@@ -514,7 +524,7 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
             self.display_name_with_default
         ]
         contents = []
-        for item in display_items:
+        for index, item in enumerate(display_items):
             # NOTE (CCB): This seems like a hack, but I don't see a better method of determining the type/category.
             item_type = item.get_icon_class()
             usage_id = item.scope_ids.usage_id
@@ -536,8 +546,15 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
             context['show_bookmark_button'] = show_bookmark_button
             context['bookmarked'] = is_bookmarked
 
-            if render_items:
+            lazy_url = None
+            if render_items and lazy_unit_url and index != self.position - 1:
+                lazy_url = lazy_unit_url.format(usage_key=usage_id)
+                num_lazy_items += 1
+                content = ''
+            elif render_items:
+                render_start = time.time()
                 rendered_item = item.render(view, context)
+                rendered_item_seconds += time.time() - render_start
                 fragment.add_fragment_resources(rendered_item)
                 content = rendered_item.content
             else:
@@ -551,6 +568,8 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
                 'path': " > ".join(display_names + [item.display_name_with_default]),
                 'graded': item.graded
             }
+            if lazy_url:
+                iteminfo['lazy_url'] = lazy_url
             if not render_items:
                 # The item url format can be defined in the template context like so:
                 # context['item_url'] = '/my/item/path/{usage_key}/whatever'
@@ -561,6 +580,9 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
 
             contents.append(iteminfo)
 
+        if lazy_unit_url:
+            self._capture_lazy_unit_metrics(num_lazy_items, rendered_item_seconds)
+
         return contents
 
     def _locations_in_subtree(self, node):
@@ -635,6 +657,20 @@ class SequenceModule(SequenceFields, ProctoringFields, XModule):
             for block_type, count in curr_block_counts.items():
                 newrelic.agent.add_custom_parameter('seq.current.block_counts.{}'.format(block_type), count)
 
+    def _capture_lazy_unit_metrics(self, num_lazy_items, rendered_item_seconds):
+        """
+        Capture information about the Units whose rendering was deferred
+        because the sequence was rendered with lazily loaded Units.  The
+        render time saved is estimated from the time spent rendering the
+        current Unit.
+        """
+        if not newrelic:
+            return
+        rendered_item_ms = int(rendered_item_seconds * 1000)
+        newrelic.agent.add_custom_parameter('seq.lazy_units.num_deferred', num_lazy_items)
+        newrelic.agent.add_custom_parameter('seq.lazy_units.rendered_ms', rendered_item_ms)
+        newrelic.agent.add_custom_parameter('seq.lazy_units.estimated_saved_ms', rendered_item_ms * num_lazy_items)
+
     def _time_limited_student_view(self):
         """
         Delegated rendering of a student view when in a time
@@ -137,6 +137,20 @@ class CapaFactory(object):
         return module
 
 
+class DictCache(object):
+    """
+    A cache backed by a dict, to be used as the cache of a ModuleSystem.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, timeout_secs=None):  # pylint: disable=unused-argument
+        self.data[key] = value
+
+
 class CapaFactoryWithFiles(CapaFactory):
     """
     A factory for creating a Capa problem with files attached.
@@ -1544,6 +1558,42 @@ class ProblemBlockTest(unittest.TestCase):
         # Assert that the encapsulated html contains the original html
         self.assertIn(html, html_encapsulated)
 
+    def test_get_problem_html_cached(self):
+        module = CapaFactory.create(rerandomize=RANDOMIZATION.NEVER)
+        module.system.cache = DictCache()
+        module.get_problem_html()
+        problem_html = module.system.render_template.call_args[0][1]['problem']['html']
+        self.assertEqual(len(module.system.cache.data), 1)
+
+        # Without its problem built, nor its HTML looked up, the module renders the cached HTML.
+        del module.__dict__['lcp']
+        module._cached_problem_html = (None, None)  # pylint: disable=protected-access
+        module.score = None
+        with patch('xmodule.capa_base.LoncapaProblem') as mock_problem:
+            module.get_problem_html()
+        self.assertFalse(mock_problem.called)
+        context = module.system.render_template.call_args[0][1]
+        self.assertEqual(context['problem']['html'], problem_html)
+        self.assertFalse(context['demand_hint_possible'])
+        self.assertEqual(module.score, Score(raw_earned=0, raw_possible=1))
+
+    @ddt.data(
+        {'problem_state': {'student_answers': {'1_2_1': '3.14'}}},
+        {'problem_state': {'done': True}},
+        {'problem_state': {'has_saved_answers': True}},
+        {'xml': textwrap.dedent("""\
+            <problem>
+                <script type="loncapa/python">x = anonymous_student_id</script>
+                <p>$x</p>
+            </problem>
+        """)},
+    )
+    def test_get_problem_html_not_cached(self, kwargs):
+        module = CapaFactory.create(rerandomize=RANDOMIZATION.NEVER, **kwargs)
+        module.system.cache = DictCache()
+        module.get_problem_html()
+        self.assertEqual(module.system.cache.data, {})
+
     demand_xml = """
         <problem>
         <p>That is the question</p>
@@ -129,6 +129,19 @@ class ContentTest(unittest.TestCase):
             thumbnail_file_location
         )
 
+    @ddt.data(
+        (None, u"monsters-png.jpg"),
+        ((64, 48), u"monsters-png-64x48.jpg"),
+    )
+    @ddt.unpack
+    def test_compute_thumbnail_location(self, dimensions, thumbnail_filename):
+        content = Content(AssetLocator(CourseLocator(u'mitX', u'800', u'ignore_run'), u'asset', u'monsters.png'),
+                          'image/png')
+        self.assertEqual(
+            ContentStore.compute_thumbnail_location(content, dimensions=dimensions),
+            AssetLocator(CourseLocator(u'mitX', u'800', u'ignore_run'), u'thumbnail', thumbnail_filename),
+        )
+
     @patch('xmodule.contentstore.content.Image')
     def test_image_is_closed_when_generating_thumbnail(self, image_class_mock):
         # We used to keep the Image's file descriptor open when generating a thumbnail.
@@ -216,6 +229,30 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    def test_static_content_stream_reads_whole_chunks(self):
+        """
+        Test that StaticContentStream reads its stream a GridFS chunk at a time, starting with the rest of the
+        chunk holding the first byte of a range
+        """
+        item = FakeGridFsItem(SAMPLE_STRING)
+        item.chunk_size = 256
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        chunks = list(static_content_stream.stream_data_in_range(100, 1500))
+        self.assertEqual([len(chunk) for chunk in chunks], [156, 256, 256, 256, 256, 221])
+        self.assertEqual(''.join(chunks), SAMPLE_STRING[100:1501])
+
+        item.seek(0)
+        chunks = list(static_content_stream.stream_data())
+        self.assertTrue(all(len(chunk) == 256 for chunk in chunks[:-1]))
+
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test StaticContent stream_data_in_range function, which serves ranges of cached content
+        """
+        content = StaticContent('loc', 'name', 'type', SAMPLE_STRING, length=len(SAMPLE_STRING))
+        self.assertEqual(list(content.stream_data_in_range(100, 1500)), [SAMPLE_STRING[100:1501]])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -96,6 +96,7 @@ class HtmlBlockCourseApiTestCase(unittest.TestCase):
         self.assertIn(html, rendered)
 
 
+@ddt.ddt
 class HtmlBlockSubstitutionTestCase(unittest.TestCase):
 
     def test_substitution_works(self):
@@ -124,6 +125,17 @@ class HtmlBlockSubstitutionTestCase(unittest.TestCase):
         module = HtmlBlock(module_system, field_data, Mock())
         self.assertEqual(module.get_html(), sample_xml)
 
+    @ddt.data(
+        ('<p>Hi!</p>', STUDENT_VIEW, True),
+        ('<p>Hi!</p>', PUBLIC_VIEW, True),
+        ('<p>Hi!</p>', 'studio_view', False),
+        ('<p>Hi %%USER_ID%%!</p>', STUDENT_VIEW, False),
+    )
+    @ddt.unpack
+    def test_view_cacheable(self, sample_xml, view, cacheable):
+        module = HtmlBlock(get_test_system(), DictFieldData({'data': sample_xml}), Mock())
+        self.assertEqual(module.is_view_cacheable(view), cacheable)
+
 
 class HtmlBlockIndexingTestCase(unittest.TestCase):
     """
@@ -253,6 +265,9 @@ class CourseInfoBlockTestCase(unittest.TestCase):
         except ValueError:
             self.fail("CourseInfoBlock could not parse an invalid date!")
 
+        # Updates aren't cached, since which of them are shown depends on the date.
+        self.assertFalse(info_module.is_view_cacheable(STUDENT_VIEW))
+
     def test_updates_order(self):
         """
         Tests that a course info module will render its updates in the correct order.
@@ -174,6 +174,21 @@ class SequenceBlockTestCase(XModuleXmlImportTest):
         for child in self.sequence_3_1.children:
             self.assertIn("'page_title': '{}'".format(child.block_id), html)
 
+    @ddt.data(1, 3)
+    def test_lazy_unit_rendering(self, position):
+        html = self._get_rendered_view(
+            self.sequence_3_1,
+            extra_context=dict(position=position, lazy_unit_url='/xblock/{usage_key}'),
+        )
+        self._assert_view_at_position(html, expected_position=position)
+        for index, child in enumerate(self.sequence_3_1.children):
+            lazy_url = "'lazy_url': '/xblock/{}'".format(child)
+            if index == position - 1:
+                self.assertNotIn(lazy_url, html)
+            else:
+                self.assertIn(lazy_url, html)
+        self.assertEqual(html.count("'lazy_url'"), 2)
+
     def test_hidden_content_before_due(self):
         html = self._get_rendered_view(self.sequence_4_1)
         self.assertIn("seq_module.html", html)
@@ -137,6 +137,15 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
 
         return [block_structure.create_removal_filter(check_child_removal)]
 
+    def transform_block_filters_cache_key(self, usage_info, block_structure):
+        # The selected library children are stored per user and may be
+        # updated by the filters, so only structures without any library
+        # children are cacheable.
+        for block_key in block_structure:
+            if block_key.block_type == 'library_content' and block_structure.get_children(block_key):
+                return None
+        return u'none'
+
     def _publish_events(self, block_structure, location, previous_count, max_count, block_keys, user_id):
         """
         Helper method to publish events for analytics purposes
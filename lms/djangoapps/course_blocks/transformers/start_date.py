@@ -3,11 +3,17 @@ Start Date Transformer implementation.
 """
 
 
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from pytz import UTC
+
 from lms.djangoapps.courseware.access_utils import check_start_date
 from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
 )
+from student.roles import CourseBetaTesterRole
 from xmodule.course_metadata_utils import DEFAULT_START_DATE
 
 from .utils import collect_merged_date_field
@@ -29,9 +35,11 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
 
     Staff users are exempted from visibility rules.
     """
-    WRITE_VERSION = 1
+    WRITE_VERSION = 2
     READ_VERSION = 1
     MERGED_START_DATE = 'merged_start_date'
+    START_DATES = 'start_dates'
+    BETA_START_DATES = 'beta_start_dates'
 
     @classmethod
     def name(cls):
@@ -69,15 +77,70 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+        # The sorted effective start dates of the blocks, for students and
+        # for beta testers, from which the filter cache key is computed.
+        start_dates = []
+        beta_start_dates = []
+        for block_key in block_structure:
+            start = cls._get_merged_start_date(block_structure, block_key)
+            if start is None:
+                continue
+            days_early_for_beta = block_structure.get_xblock_field(block_key, 'days_early_for_beta')
+            start_dates.append(start)
+            if days_early_for_beta is not None:
+                beta_start_dates.append(start - timedelta(days_early_for_beta))
+            else:
+                beta_start_dates.append(start)
+        start_dates.sort()
+        beta_start_dates.sort()
+        block_structure.set_transformer_data(cls, cls.START_DATES, start_dates)
+        block_structure.set_transformer_data(
+            cls, cls.BETA_START_DATES, beta_start_dates if beta_start_dates != start_dates else None
+        )
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access:
             return [block_structure.create_universal_filter()]
 
-        removal_condition = lambda block_key: not check_start_date(
+        removal_condition = lambda block_key: not self._has_started(usage_info, block_structure, block_key)
+        return [block_structure.create_removal_filter(removal_condition)]
+
+    def transform_block_filters_cache_key(self, usage_info, block_structure):
+        if usage_info.has_staff_access:
+            return u'staff'
+
+        start_dates = block_structure.get_transformer_data(self, self.START_DATES)
+        if start_dates is None:
+            # Collected before the start dates were.
+            return None
+
+        # Start dates don't apply at all when they're disabled, or in
+        # preview mode or masquerade, which even a block that never
+        # starts is accessible in.
+        if check_start_date(usage_info.user, None, datetime.max.replace(tzinfo=UTC), usage_info.course_key):
+            return u'all'
+
+        # A user's effective start date of each block is fixed, so the
+        # set of started blocks only grows over time and is identified by
+        # its size.  Beta testers have different effective start dates,
+        # which are only looked up in courses that have any.
+        beta_start_dates = block_structure.get_transformer_data(self, self.BETA_START_DATES)
+        is_beta_tester = (
+            beta_start_dates is not None and
+            CourseBetaTesterRole(usage_info.course_key).has_user(usage_info.user)
+        )
+        effective_start_dates = beta_start_dates if is_beta_tester else start_dates
+        return u'{}.{}'.format(is_beta_tester, bisect_left(effective_start_dates, datetime.now(UTC)))
+
+    def _has_started(self, usage_info, block_structure, block_key):
+        """
+        Returns whether the block with the given block_key has started
+        for the user in the given usage_info.
+        """
+        return check_start_date(
             usage_info.user,
             block_structure.get_xblock_field(block_key, 'days_early_for_beta'),
             self._get_merged_start_date(block_structure, block_key),
             usage_info.course_key,
         )
-        return [block_structure.create_removal_filter(removal_condition)]
@@ -8,10 +8,11 @@ from datetime import timedelta
 import ddt
 import six
 from django.utils.timezone import now
-from mock import patch
+from mock import Mock, patch
 
 from lms.djangoapps.courseware.tests.factories import BetaTesterFactory
 
+from ...api import get_course_blocks
 from ..start_date import DEFAULT_START_DATE, StartDateTransformer
 from .helpers import BlockParentsMapTestCase, update_block
 
@@ -121,3 +122,24 @@ class StartDateTransformerTestCase(BlockParentsMapTestCase):
             blocks_with_differing_student_access,
             self.transformers,
         )
+
+    @patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': False})
+    def test_filter_cache_key(self):
+        block = self.get_block(0)
+        block.start = self.StartDateType.start(self.StartDateType.future)
+        update_block(block)
+        block_structure = get_course_blocks(self.student, self.course.location, self.transformers)
+        transformer = StartDateTransformer()
+
+        def get_cache_key(user):
+            """
+            Returns the filter cache key of the transformer for the given user.
+            """
+            usage_info = Mock(user=user, course_key=self.course.id, has_staff_access=False)
+            return transformer.transform_block_filters_cache_key(usage_info, block_structure)
+
+        # Only the course has started for the beta tester, 33 days early.
+        self.assertEqual(get_cache_key(self.student), u'False.0')
+        self.assertEqual(get_cache_key(self.beta_user), u'True.1')
+        with patch.dict('django.conf.settings.FEATURES', {'DISABLE_START_DATES': True}):
+            self.assertEqual(get_cache_key(self.student), u'all')
@@ -10,6 +10,7 @@ from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
 )
+from xmodule.partitions.partitions import UserPartition
 from xmodule.partitions.partitions_service import (
     get_all_partitions_for_course,
     get_partition_from_id,
@@ -122,6 +123,36 @@ class UserPartitionTransformer(FilteringTransformerMixin, BlockStructureTransfor
         result_list.append(group_access_filter)
         return result_list
 
+    def transform_block_filters_cache_key(self, usage_info, block_structure):
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return u'none'
+
+        # Partitions with access denied messages override fields of the
+        # blocks they deny, which the filter cache can't replay.
+        if any(_has_access_denied_message(partition) for partition in user_partitions):
+            return None
+
+        user_groups = get_user_partition_groups(usage_info.course_key, user_partitions, usage_info.user, 'id')
+        return u'{}.{}.{}'.format(
+            usage_info.user.id,
+            usage_info.has_staff_access,
+            u','.join(sorted(
+                u'{}:{}'.format(partition_id, group.id) for partition_id, group in six.iteritems(user_groups)
+            )),
+        )
+
+
+def _has_access_denied_message(user_partition):
+    """
+    Returns whether the given user partition can provide a message for
+    content that it denies access to.
+    """
+    return (
+        six.get_unbound_function(type(user_partition).access_denied_message) is not
+        six.get_unbound_function(UserPartition.access_denied_message)
+    )
+
 
 class _MergedGroupAccess(object):
     """
@@ -71,3 +71,6 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
                 lambda block_key: self._get_visible_to_staff_only(block_structure, block_key),
             )
         ]
+
+    def transform_block_filters_cache_key(self, usage_info, block_structure):
+        return u'staff' if usage_info.has_staff_access else u'learner'
@@ -7,6 +7,7 @@ import hashlib
 import json
 import logging
 import textwrap
+import time
 from collections import OrderedDict
 from functools import partial
 
@@ -24,7 +25,11 @@ from django.utils.text import slugify
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.decorators.csrf import csrf_exempt
 from edx_django_utils.cache import RequestCache
-from edx_django_utils.monitoring import set_custom_metrics_for_course_key, set_monitoring_transaction_name
+from edx_django_utils.monitoring import (
+    set_custom_metric,
+    set_custom_metrics_for_course_key,
+    set_monitoring_transaction_name
+)
 from edx_proctoring.api import get_attempt_status_summary
 from edx_proctoring.services import ProctoringService
 from edx_rest_framework_extensions.auth.jwt.authentication import JwtAuthentication
@@ -53,10 +58,13 @@ from lms.djangoapps.courseware.masquerade import (
     is_masquerading_as_specific_student,
     setup_masquerade
 )
+from lms.djangoapps.courseware import render_profiler
 from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from edxmako.shortcuts import render_to_string
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.courseware.services import UserStateService
+from lms.djangoapps.courseware.tasks import send_to_xqueue
+from lms.djangoapps.courseware.toggles import ASYNC_XQUEUE_DISPATCH_FLAG, CACHE_BLOCK_FRAGMENTS_FLAG
 from lms.djangoapps.grades.api import GradesUtilService
 from lms.djangoapps.grades.api import signals as grades_signals
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -77,10 +85,9 @@ from openedx.core.lib.xblock_utils import (
     add_staff_markup,
     get_aside_from_xblock,
     hash_resource,
+    FragmentCache,
     is_xblock_aside,
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls
+    replace_urls
 )
 from openedx.core.lib.xblock_utils import request_token as xblock_request_token
 from openedx.core.lib.xblock_utils import wrap_xblock
@@ -114,6 +121,32 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+
+class AsyncXQueueInterface(XQueueInterface):
+    """
+    Interface to xqueue that sends submissions from the send_to_xqueue task,
+    rather than in the learner's request.
+
+    Submissions with files are still sent in the request, since the uploaded
+    files only last as long as it does.
+    """
+    def send_to_queue(self, header, body, files_to_upload=None):
+        if files_to_upload:
+            set_custom_metric('xqueue_dispatch', 'sync')
+            return super(AsyncXQueueInterface, self).send_to_queue(header, body, files_to_upload)
+
+        send_to_xqueue.apply_async(args=(header, body, time.time()))
+        set_custom_metric('xqueue_dispatch', 'async')
+        # Success, with an unknown queue length.
+        return 0, ''
+
+
+ASYNC_XQUEUE_INTERFACE = AsyncXQueueInterface(
+    settings.XQUEUE_INTERFACE['url'],
+    settings.XQUEUE_INTERFACE['django_auth'],
+    REQUESTS_AUTH,
+)
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -493,8 +526,13 @@ def get_module_system_for_user(
     # TODO: Queuename should be derived from 'course_settings.json' of each course
     xqueue_default_queuename = descriptor.location.org + '-' + descriptor.location.course
 
+    if ASYNC_XQUEUE_DISPATCH_FLAG.is_enabled(course_id):
+        xqueue_interface = ASYNC_XQUEUE_INTERFACE
+    else:
+        xqueue_interface = XQUEUE_INTERFACE
+
     xqueue = {
-        'interface': XQUEUE_INTERFACE,
+        'interface': xqueue_interface,
         'construct_callback': make_xqueue_callback,
         'default_queuename': xqueue_default_queuename.replace(' ', '_'),
         'waittime': settings.XQUEUE_WAITTIME_BETWEEN_REQUESTS
@@ -693,40 +731,41 @@ def get_module_system_for_user(
     # Wrap the output display in a single div to allow for the XModule
     # javascript to be bound correctly
     if wrap_xmodule_display is True:
-        block_wrappers.append(partial(
+        block_wrappers.append(render_profiler.profile_block_wrapper(render_profiler.WRAP, partial(
             wrap_xblock,
             'LmsRuntime',
             extra_data={'course-id': text_type(course_id)},
             usage_id_serializer=lambda usage_id: quote_slashes(text_type(usage_id)),
             request_token=request_token,
-        ))
+        )))
 
     # TODO (cpennington): When modules are shared between courses, the static
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
+    # Rewrite urls in one pass over the output:
+    # - urls beginning in /static to point to course-specific content
+    # - urls of the form '/course/' to refer to the root of multicourse directory
     #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # - intra-courseware links (/jump_to_id/<id>). This format is an improvement
+    #   over the /course/... format for studio authored courses, because it is
+    #   agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
-    block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+    url_rewriter = render_profiler.profile_block_wrapper(render_profiler.STATIC_URLS, partial(
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
         course_id,
         reverse('jump_to_id', kwargs={'course_id': text_type(course_id), 'module_id': ''}),
+        static_asset_path=static_asset_path or descriptor.static_asset_path
     ))
+    block_wrappers.append(url_rewriter)
+
+    # Views that are the same for all users are cached with their urls rewritten,
+    # and the other wrappers are applied to them afterwards.
+    fragment_cache = None
+    if CACHE_BLOCK_FRAGMENTS_FLAG.is_enabled(course_id):
+        fragment_cache = FragmentCache([url_rewriter])
 
     block_wrappers.append(partial(display_access_messages, user))
     block_wrappers.append(partial(course_expiration_wrapper, user))
@@ -770,7 +809,7 @@ def get_module_system_for_user(
 
     system = LmsModuleSystem(
         track_function=track_function,
-        render_template=render_to_string,
+        render_template=render_profiler.profile_template_renderer(render_to_string),
         static_url=settings.STATIC_URL,
         xqueue=xqueue,
         # TODO (cpennington): Figure out how to share info between systems
@@ -826,6 +865,7 @@ def get_module_system_for_user(
         rebind_noauth_module_to_user=rebind_noauth_module_to_user,
         user_location=user_location,
         request_token=request_token,
+        fragment_cache=fragment_cache,
     )
 
     # pass position specified in URL to module through ModuleSystem
@@ -867,56 +907,56 @@ def get_module_for_descriptor_internal(user, descriptor, student_data, course_id
     Arguments:
         request_token (str): A unique token for this request, used to isolate xblock rendering
     """
+    with render_profiler.profile(descriptor.scope_ids.block_type, render_profiler.FIELD_LOAD):
+        (system, student_data) = get_module_system_for_user(
+            user=user,
+            student_data=student_data,  # These have implicit user bindings, the rest of args are considered not to
+            descriptor=descriptor,
+            course_id=course_id,
+            track_function=track_function,
+            xqueue_callback_url_prefix=xqueue_callback_url_prefix,
+            position=position,
+            wrap_xmodule_display=wrap_xmodule_display,
+            grade_bucket_type=grade_bucket_type,
+            static_asset_path=static_asset_path,
+            user_location=user_location,
+            request_token=request_token,
+            disable_staff_debug_info=disable_staff_debug_info,
+            course=course,
+            will_recheck_access=will_recheck_access,
+        )
 
-    (system, student_data) = get_module_system_for_user(
-        user=user,
-        student_data=student_data,  # These have implicit user bindings, the rest of args are considered not to
-        descriptor=descriptor,
-        course_id=course_id,
-        track_function=track_function,
-        xqueue_callback_url_prefix=xqueue_callback_url_prefix,
-        position=position,
-        wrap_xmodule_display=wrap_xmodule_display,
-        grade_bucket_type=grade_bucket_type,
-        static_asset_path=static_asset_path,
-        user_location=user_location,
-        request_token=request_token,
-        disable_staff_debug_info=disable_staff_debug_info,
-        course=course,
-        will_recheck_access=will_recheck_access,
-    )
-
-    descriptor.bind_for_student(
-        system,
-        user.id,
-        [
-            partial(DateLookupFieldData, course_id=course_id, user=user),
-            partial(OverrideFieldData.wrap, user, course),
-            partial(LmsFieldData, student_data=student_data),
-        ],
-    )
-
-    descriptor.scope_ids = descriptor.scope_ids._replace(user_id=user.id)
-
-    # Do not check access when it's a noauth request.
-    # Not that the access check needs to happen after the descriptor is bound
-    # for the student, since there may be field override data for the student
-    # that affects xblock visibility.
-    user_needs_access_check = getattr(user, 'known', True) and not isinstance(user, SystemUser)
-    if user_needs_access_check:
-        access = has_access(user, 'load', descriptor, course_id)
-        # A descriptor should only be returned if either the user has access, or the user doesn't have access, but
-        # the failed access has a message for the user and the caller of this function specifies it will check access
-        # again. This allows blocks to show specific error message or upsells when access is denied.
-        caller_will_handle_access_error = (
-            not access
-            and will_recheck_access
-            and (access.user_message or access.user_fragment)
+        descriptor.bind_for_student(
+            system,
+            user.id,
+            [
+                partial(DateLookupFieldData, course_id=course_id, user=user),
+                partial(OverrideFieldData.wrap, user, course),
+                partial(LmsFieldData, student_data=student_data),
+            ],
         )
-        if access or caller_will_handle_access_error:
-            return descriptor
-        return None
-    return descriptor
+
+        descriptor.scope_ids = descriptor.scope_ids._replace(user_id=user.id)
+
+        # Do not check access when it's a noauth request.
+        # Not that the access check needs to happen after the descriptor is bound
+        # for the student, since there may be field override data for the student
+        # that affects xblock visibility.
+        user_needs_access_check = getattr(user, 'known', True) and not isinstance(user, SystemUser)
+        if user_needs_access_check:
+            access = has_access(user, 'load', descriptor, course_id)
+            # A descriptor should only be returned if either the user has access, or the user doesn't have access,
+            # but the failed access has a message for the user and the caller of this function specifies it will
+            # check access again. This allows blocks to show specific error message or upsells when access is denied.
+            caller_will_handle_access_error = (
+                not access
+                and will_recheck_access
+                and (access.user_message or access.user_fragment)
+            )
+            if access or caller_will_handle_access_error:
+                return descriptor
+            return None
+        return descriptor
 
 
 def load_single_xblock(request, user_id, course_id, usage_key_string, course=None, will_recheck_access=False):
@@ -0,0 +1,177 @@
+"""
+Profiling of the time spent rendering XBlocks in the courseware.
+
+The time spent in each phase of rendering a block is aggregated per
+block type over the course of a request.  Time spent in nested phases,
+such as rendering the children of a block or its templates, is only
+attributed to the innermost phase, so the totals of all phases add up
+to the overall time spent rendering blocks.
+
+Profiling is enabled by the courseware.profile_block_rendering waffle
+switch.  The aggregated timings are then reported by the
+RenderProfilerMiddleware in a Server-Timing header and a log message.
+"""
+
+
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import six
+from edx_django_utils.cache import RequestCache
+
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+log = logging.getLogger(__name__)
+
+WAFFLE_NAMESPACE = WaffleSwitchNamespace(name=u'courseware')
+
+# Switch to enable profiling of block rendering.
+PROFILE_BLOCK_RENDERING = u'profile_block_rendering'
+
+# Rendering phases.
+FIELD_LOAD = u'field_load'
+VIEW = u'view'
+WRAP = u'wrap'
+STATIC_URLS = u'static_urls'
+TEMPLATE = u'template'
+
+_REQUEST_CACHE_NAMESPACE = u'courseware.render_profiler'
+_PROFILER_CACHE_KEY = u'profiler'
+
+
+class BlockRenderProfiler(object):
+    """
+    Aggregates the time spent in each rendering phase per block type.
+    """
+    def __init__(self):
+        # Map of (block_type, phase) to the time spent, in seconds.
+        # dict {(string, string): float}
+        self.timings = defaultdict(float)
+
+        # Stack of the phases currently being measured, each a list of
+        # the block type and the time spent in its nested phases.
+        # list [[string, float]]
+        self._stack = []
+
+    @contextmanager
+    def measure(self, block_type, phase):
+        """
+        Context manager that adds the time spent within it, excluding
+        nested measurements, to the timings of the given block type and
+        phase.  If block_type is None, the block type of the enclosing
+        measurement is used.
+        """
+        if block_type is None:
+            block_type = self._stack[-1][0] if self._stack else u'unknown'
+
+        frame = [block_type, 0.0]
+        self._stack.append(frame)
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start_time
+            self._stack.pop()
+            self.timings[(block_type, phase)] += duration - frame[1]
+            if self._stack:
+                self._stack[-1][1] += duration
+
+    def server_timing(self):
+        """
+        Returns the timings formatted as a Server-Timing header value.
+        """
+        return u', '.join(
+            u'{}.{};dur={:.1f}'.format(block_type, phase, duration * 1000)
+            for (block_type, phase), duration in sorted(six.iteritems(self.timings))
+        )
+
+    def summary(self):
+        """
+        Returns the timings, in milliseconds, as a dict of block types
+        to dicts of phases to durations.
+        """
+        summary = defaultdict(dict)
+        for (block_type, phase), duration in six.iteritems(self.timings):
+            summary[block_type][phase] = round(duration * 1000, 1)
+        return dict(summary)
+
+
+def get_profiler(create=True):
+    """
+    Returns the BlockRenderProfiler for the current request, or None if
+    profiling is disabled.
+
+    Arguments:
+        create (bool) - Whether to create the profiler if rendering
+            hasn't been profiled yet in the current request.
+    """
+    request_cache = RequestCache(_REQUEST_CACHE_NAMESPACE)
+    cached_response = request_cache.get_cached_response(_PROFILER_CACHE_KEY)
+    if cached_response.is_found:
+        return cached_response.value
+
+    if not create or not WAFFLE_NAMESPACE.is_enabled(PROFILE_BLOCK_RENDERING):
+        return None
+
+    profiler = BlockRenderProfiler()
+    request_cache.set(_PROFILER_CACHE_KEY, profiler)
+    return profiler
+
+
+@contextmanager
+def profile(block_type, phase):
+    """
+    Context manager that measures the time spent within it for the given
+    block type and rendering phase, if profiling is enabled.
+    """
+    profiler = get_profiler()
+    if profiler is None:
+        yield
+    else:
+        with profiler.measure(block_type, phase):
+            yield
+
+
+def profile_block_wrapper(phase, wrapper):
+    """
+    Returns the given block wrapper function, as used by the XBlock
+    runtime to wrap rendered fragments, measured as the given phase.
+    """
+    def _profiled_wrapper(block, view, frag, context):
+        with profile(block.scope_ids.block_type, phase):
+            return wrapper(block, view, frag, context)
+    return _profiled_wrapper
+
+
+def profile_template_renderer(render_template):
+    """
+    Returns the given template rendering function measured as the
+    template phase of the block being rendered.
+    """
+    def _profiled_render_template(*args, **kwargs):
+        with profile(None, TEMPLATE):
+            return render_template(*args, **kwargs)
+    return _profiled_render_template
+
+
+class RenderProfilerMiddleware(object):
+    """
+    Reports the block rendering timings of the request, if any, in a
+    Server-Timing header and a log message.
+    """
+    def process_response(self, request, response):
+        """
+        Adds the Server-Timing header to the response and logs the timings.
+        """
+        profiler = get_profiler(create=False)
+        if profiler is not None and profiler.timings:
+            response['Server-Timing'] = profiler.server_timing()
+            log.info(
+                u'Block render timings for %s: %s',
+                request.path,
+                json.dumps(profiler.summary(), sort_keys=True),
+            )
+        return response
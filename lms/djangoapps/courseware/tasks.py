@@ -0,0 +1,137 @@
+"""
+Asynchronous tasks for courseware.
+"""
+
+
+import json
+import time
+from logging import getLogger
+
+from celery import task
+from celery_utils.persist_on_failure import LoggedPersistOnFailureTask
+from django.conf import settings
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from django.utils.translation import ugettext as _
+from edx_django_utils.monitoring import set_custom_metric
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from requests.auth import HTTPBasicAuth
+from six.moves.urllib.parse import urlparse  # pylint: disable=import-error
+
+from capa.correctmap import CorrectMap
+from capa.xqueue_interface import XQueueInterface
+from lms.djangoapps.courseware.models import StudentModule
+
+log = getLogger(__name__)
+
+XQUEUE_DISPATCH_MAX_RETRIES = 5
+XQUEUE_DISPATCH_RETRY_DELAY_SECONDS = 30
+
+# The interface of this worker process, whose session keeps its connections
+# to xqueue open between tasks.
+_xqueue_interface = None
+
+
+def get_xqueue_interface():
+    """
+    Return the XQueueInterface of this process, creating it if needed.
+    """
+    global _xqueue_interface  # pylint: disable=global-statement
+    if _xqueue_interface is None:
+        basic_auth = settings.XQUEUE_INTERFACE.get('basic_auth')
+        _xqueue_interface = XQueueInterface(
+            settings.XQUEUE_INTERFACE['url'],
+            settings.XQUEUE_INTERFACE['django_auth'],
+            HTTPBasicAuth(*basic_auth) if basic_auth is not None else None,
+        )
+    return _xqueue_interface
+
+
+@task(
+    bind=True,
+    base=LoggedPersistOnFailureTask,
+    default_retry_delay=XQUEUE_DISPATCH_RETRY_DELAY_SECONDS,
+    max_retries=XQUEUE_DISPATCH_MAX_RETRIES,
+    routing_key=settings.XQUEUE_DISPATCH_ROUTING_KEY,
+)
+def send_to_xqueue(self, header, body, queued_at):
+    """
+    Send a submission to xqueue, retrying while xqueue can't take it.
+
+    If xqueue still can't take it after the last retry, the submission is no
+    longer shown as queued to the learner, see fail_xqueue_dispatch, and the
+    task is saved as failed.
+
+    Arguments:
+        header (str): xqueue header of the submission, from make_xheader.
+        body (str): body of the submission.
+        queued_at (float): time at which the submission was queued, as
+            returned by time.time().
+    """
+    error, msg = get_xqueue_interface().send_to_queue(header=header, body=body)
+    set_custom_metric('xqueue_dispatch_retries', self.request.retries)
+    if error:
+        set_custom_metric('xqueue_dispatch_error', msg)
+        log.warning(u'Unable to send submission to xqueue (attempt %d): %s', self.request.retries + 1, msg)
+        if self.request.retries >= self.max_retries:
+            fail_xqueue_dispatch(header, msg)
+        raise self.retry()
+
+    set_custom_metric('xqueue_dispatch_latency', time.time() - queued_at)
+
+
+def fail_xqueue_dispatch(header, error_msg):
+    """
+    Record that a submission couldn't be sent to xqueue, and clear the queued
+    state of the learner's problem as failing to send it in the learner's
+    request would have, so that they can submit again right away.
+
+    Arguments:
+        header (str): xqueue header of the submission, from make_xheader.
+        error_msg (str): the last error sending the submission.
+    """
+    header_info = json.loads(header)
+    queuekey = header_info.get('lms_key')
+    set_custom_metric('xqueue_dispatch_failed', queuekey)
+    log.error(
+        u'Unable to send submission %s to xqueue after %d attempts: %s',
+        queuekey, XQUEUE_DISPATCH_MAX_RETRIES + 1, error_msg,
+    )
+
+    # The learner's problem is the one the grader would have replied to.
+    try:
+        callback = resolve(urlparse(header_info.get('lms_callback_url', '')).path)
+    except Resolver404:
+        callback = None
+    if callback is None or callback.url_name != 'xqueue_callback':
+        log.warning(u'Unable to find the problem of submission %s to clear its queued state', queuekey)
+        return
+    course_key = CourseKey.from_string(callback.kwargs['course_id'])
+    usage_key = UsageKey.from_string(callback.kwargs['mod_id']).map_into_course(course_key)
+
+    with transaction.atomic():
+        student_module = StudentModule.objects.select_for_update().filter(
+            student_id=callback.kwargs['userid'],
+            course_id=course_key,
+            module_state_key=usage_key,
+        ).first()
+        state = json.loads(student_module.state or '{}') if student_module else {}
+        correct_map = CorrectMap()
+        correct_map.set_dict(state.get('correct_map', {}))
+        queued_answer_ids = [
+            answer_id for answer_id in correct_map
+            if correct_map.is_right_queuekey(answer_id, queuekey)
+        ]
+        if not queued_answer_ids:
+            # The learner submitted again meanwhile, or the state is gone.
+            return
+        for answer_id in queued_answer_ids:
+            correct_map.set(
+                answer_id,
+                queuestate=None,
+                msg=_(u'Unable to deliver your submission to grader (Reason: {error_msg}).'
+                      u' Please try again later.').format(error_msg=error_msg),
+            )
+        state['correct_map'] = correct_map.get_dict()
+        student_module.state = json.dumps(state)
+        student_module.save()
@@ -17,6 +17,7 @@ from completion import waffle as completion_waffle
 from completion.models import BlockCompletion
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.http import Http404, HttpResponse
 from django.middleware.csrf import get_token
 from django.test.client import RequestFactory
@@ -57,11 +58,13 @@ from lms.djangoapps.courseware.tests.factories import (
 )
 from lms.djangoapps.courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.courseware.tests.tests import LoginEnrollmentTestCase
+from lms.djangoapps.courseware.toggles import CACHE_BLOCK_FRAGMENTS_FLAG
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from openedx.core.djangoapps.credit.api import set_credit_requirement_status, set_credit_requirements
 from openedx.core.djangoapps.credit.models import CreditCourse
 from openedx.core.djangoapps.oauth_dispatch.jwt import create_jwt_for_user
+from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
 from openedx.core.lib.courses import course_image_url
 from openedx.core.lib.gating import api as gating_api
 from openedx.core.lib.url_utils import quote_slashes
@@ -1662,6 +1665,29 @@ class TestHtmlModifiers(ModuleStoreTestCase):
             result_fragment.content
         )
 
+    @override_waffle_flag(CACHE_BLOCK_FRAGMENTS_FLAG, active=True)
+    def test_fragment_cache(self):
+        """
+        Test that HTML blocks of split courses are rendered once, and then wrapped from the fragment cache.
+        """
+        cache.clear()
+        course = CourseFactory.create(default_store=ModuleStoreEnum.Type.split)
+        descriptor = ItemFactory.create(parent_location=course.location, category='html', data=self.course_link)
+        field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course.id, self.user, descriptor)
+
+        student_view = HtmlBlock.student_view
+        with patch.object(HtmlBlock, 'student_view', autospec=True, side_effect=student_view) as mock_student_view:
+            fragments = [
+                render.get_module(self.user, self.request, descriptor.location, field_data_cache).render(STUDENT_VIEW)
+                for __ in range(2)
+            ]
+
+        self.assertEqual(mock_student_view.call_count, 1)
+        self.assertEqual(fragments[0].content, fragments[1].content)
+        self.assertEqual(fragments[0].resources, fragments[1].resources)
+        self.assertIn('/courses/{course_id}/bar/content'.format(course_id=course.id), fragments[1].content)
+        self.assertEqual(len(PyQuery(fragments[1].content)('div.xblock.xblock-student_view.xmodule_HtmlBlock')), 1)
+
 
 class XBlockWithJsonInitData(XBlock):
     """
@@ -0,0 +1,96 @@
+"""
+Tests for the block render profiler.
+"""
+
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from edx_django_utils.cache import RequestCache
+from mock import Mock, patch
+
+from lms.djangoapps.courseware import render_profiler
+from lms.djangoapps.courseware.render_profiler import (
+    PROFILE_BLOCK_RENDERING,
+    WAFFLE_NAMESPACE,
+    BlockRenderProfiler,
+    RenderProfilerMiddleware,
+    get_profiler,
+    profile,
+    profile_block_wrapper,
+    profile_template_renderer
+)
+
+
+class BlockRenderProfilerTestCase(TestCase):
+    """
+    Tests for the BlockRenderProfiler class.
+    """
+    def setUp(self):
+        super(BlockRenderProfilerTestCase, self).setUp()
+        self.profiler = BlockRenderProfiler()
+        patcher = patch('lms.djangoapps.courseware.render_profiler.time.time')
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_nested_measurements(self):
+        self.mock_time.side_effect = [0.0, 0.1, 0.3, 0.4, 0.45, 1.0]
+        with self.profiler.measure(u'vertical', render_profiler.VIEW):
+            with self.profiler.measure(u'html', render_profiler.VIEW):
+                pass
+            with self.profiler.measure(None, render_profiler.TEMPLATE):
+                pass
+
+        self.assertEqual(self.profiler.summary(), {
+            u'vertical': {render_profiler.VIEW: 750.0, render_profiler.TEMPLATE: 50.0},
+            u'html': {render_profiler.VIEW: 200.0},
+        })
+        self.assertEqual(
+            self.profiler.server_timing(),
+            u'html.view;dur=200.0, vertical.template;dur=50.0, vertical.view;dur=750.0',
+        )
+
+    def test_repeated_measurements(self):
+        self.mock_time.side_effect = [0.0, 0.1, 0.2, 0.4]
+        for _ in range(2):
+            with self.profiler.measure(u'problem', render_profiler.STATIC_URLS):
+                pass
+        self.assertEqual(self.profiler.summary(), {u'problem': {render_profiler.STATIC_URLS: 300.0}})
+
+
+class RenderProfilerTestCase(TestCase):
+    """
+    Tests for profiling block rendering within requests.
+    """
+    def setUp(self):
+        super(RenderProfilerTestCase, self).setUp()
+        RequestCache.clear_all_namespaces()
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        self.request = RequestFactory().get('/courses/course-v1:edX+Test+Run/courseware')
+
+    def test_disabled(self):
+        with profile(u'html', render_profiler.VIEW):
+            pass
+        self.assertIsNone(get_profiler())
+        response = RenderProfilerMiddleware().process_response(self.request, HttpResponse())
+        self.assertNotIn('Server-Timing', response)
+
+    def test_enabled(self):
+        block = Mock(scope_ids=Mock(block_type=u'html'))
+        wrapper = profile_block_wrapper(render_profiler.STATIC_URLS, lambda block, view, frag, context: frag)
+        render_template = profile_template_renderer(lambda template, context: template)
+
+        with WAFFLE_NAMESPACE.override(PROFILE_BLOCK_RENDERING, active=True):
+            with profile(u'html', render_profiler.VIEW):
+                self.assertEqual(render_template(u'html.html', {}), u'html.html')
+            self.assertEqual(wrapper(block, u'student_view', u'fragment', {}), u'fragment')
+
+        self.assertEqual(
+            set(get_profiler(create=False).timings),
+            {
+                (u'html', render_profiler.VIEW),
+                (u'html', render_profiler.TEMPLATE),
+                (u'html', render_profiler.STATIC_URLS),
+            },
+        )
+        response = RenderProfilerMiddleware().process_response(self.request, HttpResponse())
+        self.assertIn(u'html.view;dur=', response['Server-Timing'])
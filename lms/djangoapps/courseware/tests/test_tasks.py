@@ -0,0 +1,133 @@
+"""
+Tests for the courseware tasks, and sending submissions to xqueue with them.
+"""
+
+
+import json
+from io import BytesIO
+
+import six
+from celery.exceptions import Retry
+from django.test import TestCase
+from django.urls import reverse
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
+
+from capa.xqueue_interface import make_xheader
+from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.module_render import ASYNC_XQUEUE_INTERFACE
+from lms.djangoapps.courseware.tasks import (
+    XQUEUE_DISPATCH_MAX_RETRIES,
+    fail_xqueue_dispatch,
+    get_xqueue_interface,
+    send_to_xqueue
+)
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+
+HEADER = json.dumps({'lms_callback_url': '/callback', 'lms_key': 'key', 'queue_name': 'queue'})
+BODY = json.dumps({'student_response': 'print("hi")'})
+
+
+class SendToXQueueTest(TestCase):
+    """
+    Tests for the send_to_xqueue task.
+    """
+    @patch('lms.djangoapps.courseware.tasks.set_custom_metric')
+    def test_send(self, mock_set_custom_metric):
+        with patch.object(get_xqueue_interface(), 'send_to_queue', return_value=(0, '3')) as mock_send_to_queue:
+            send_to_xqueue.apply(args=(HEADER, BODY, 0))
+        mock_send_to_queue.assert_called_once_with(header=HEADER, body=BODY)
+        mock_set_custom_metric.assert_any_call('xqueue_dispatch_retries', 0)
+        self.assertIn('xqueue_dispatch_latency', [call[0][0] for call in mock_set_custom_metric.call_args_list])
+
+    @patch('lms.djangoapps.courseware.tasks.set_custom_metric')
+    def test_retry(self, mock_set_custom_metric):
+        with patch.object(get_xqueue_interface(), 'send_to_queue', return_value=(1, 'cannot connect to server')):
+            with self.assertRaises(Retry):
+                send_to_xqueue(HEADER, BODY, 0)
+        mock_set_custom_metric.assert_any_call('xqueue_dispatch_error', 'cannot connect to server')
+
+    @patch('lms.djangoapps.courseware.tasks.fail_xqueue_dispatch')
+    def test_last_retry(self, mock_fail_xqueue_dispatch):
+        with patch.object(get_xqueue_interface(), 'send_to_queue', return_value=(1, 'cannot connect to server')):
+            send_to_xqueue.apply(args=(HEADER, BODY, 0), retries=XQUEUE_DISPATCH_MAX_RETRIES - 1)
+            self.assertFalse(mock_fail_xqueue_dispatch.called)
+
+            send_to_xqueue.apply(args=(HEADER, BODY, 0), retries=XQUEUE_DISPATCH_MAX_RETRIES)
+        mock_fail_xqueue_dispatch.assert_called_once_with(HEADER, 'cannot connect to server')
+
+    def test_reuses_interface(self):
+        self.assertIs(get_xqueue_interface(), get_xqueue_interface())
+
+
+class FailXQueueDispatchTest(TestCase):
+    """
+    Tests for giving up sending a submission to xqueue.
+    """
+    def setUp(self):
+        super(FailXQueueDispatchTest, self).setUp()
+        course_key = CourseLocator('edX', 'xqueue', 'run')
+        self.student_module = StudentModuleFactory(
+            course_id=course_key,
+            module_state_key=course_key.make_usage_key('problem', 'code'),
+            state=json.dumps({'correct_map': {
+                'code_2_1': {'correctness': 'incomplete', 'queuestate': {'key': 'key', 'time': '20261019000000'}},
+            }}),
+        )
+        self.header = make_xheader(
+            'https://lms.example.com' + reverse('xqueue_callback', kwargs={
+                'course_id': six.text_type(self.student_module.course_id),
+                'userid': str(self.student_module.student_id),
+                'mod_id': six.text_type(self.student_module.module_state_key),
+                'dispatch': 'score_update',
+            }),
+            'key',
+            'queue',
+        )
+
+    def get_correct_map(self):
+        """
+        Return the correct map of the learner's problem.
+        """
+        return json.loads(StudentModule.objects.get(id=self.student_module.id).state)['correct_map']
+
+    @patch('lms.djangoapps.courseware.tasks.set_custom_metric')
+    def test_clears_queued_state(self, mock_set_custom_metric):
+        fail_xqueue_dispatch(self.header, 'cannot connect to server')
+        mock_set_custom_metric.assert_called_once_with('xqueue_dispatch_failed', 'key')
+        answer = self.get_correct_map()['code_2_1']
+        self.assertIsNone(answer['queuestate'])
+        self.assertIsNone(answer['correctness'])
+        self.assertIn('cannot connect to server', answer['msg'])
+
+    def test_submitted_again(self):
+        header = json.loads(self.header)
+        header['lms_key'] = 'other key'
+        fail_xqueue_dispatch(json.dumps(header), 'cannot connect to server')
+        self.assertEqual(self.get_correct_map()['code_2_1']['queuestate']['key'], 'key')
+
+    def test_unknown_callback(self):
+        fail_xqueue_dispatch(HEADER, 'cannot connect to server')
+        self.assertEqual(self.get_correct_map()['code_2_1']['queuestate']['key'], 'key')
+
+
+class AsyncXQueueInterfaceTest(TestCase):
+    """
+    Tests for sending submissions to xqueue from the send_to_xqueue task.
+    """
+    @patch('lms.djangoapps.courseware.module_render.send_to_xqueue.apply_async')
+    def test_send_to_queue(self, mock_apply_async):
+        with patch.object(ASYNC_XQUEUE_INTERFACE, 'session') as mock_session:
+            self.assertEqual(ASYNC_XQUEUE_INTERFACE.send_to_queue(HEADER, BODY), (0, ''))
+        self.assertFalse(mock_session.post.called)
+        self.assertEqual(mock_apply_async.call_args[1]['args'][:2], (HEADER, BODY))
+
+    @patch('lms.djangoapps.courseware.module_render.send_to_xqueue.apply_async')
+    def test_files_are_sent_in_request(self, mock_apply_async):
+        submission = BytesIO(b'print("hi")')
+        submission.name = 'prog.py'
+        with patch.object(ASYNC_XQUEUE_INTERFACE, 'session') as mock_session:
+            mock_session.post.return_value.status_code = 200
+            mock_session.post.return_value.text = json.dumps({'return_code': 0, 'content': '3'})
+            self.assertEqual(ASYNC_XQUEUE_INTERFACE.send_to_queue(HEADER, BODY, [submission]), (0, '3'))
+        self.assertFalse(mock_apply_async.called)
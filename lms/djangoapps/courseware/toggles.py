@@ -0,0 +1,42 @@
+"""
+Toggles for courseware.
+"""
+
+
+from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag, WaffleFlagNamespace
+
+# Namespace for courseware waffle flags.
+WAFFLE_FLAG_NAMESPACE = WaffleFlagNamespace(name='courseware')
+
+# Waffle flag to send submissions to xqueue from a celery task rather than in the learner's request.
+# .. toggle_name: courseware.async_xqueue_dispatch
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, submissions to problems graded by xqueue are sent to xqueue by the
+#   send_to_xqueue celery task, on the XQUEUE_DISPATCH_ROUTING_KEY queue, and the learner's request returns
+#   as soon as the task is queued. Submissions with files are still sent in the learner's request.
+# .. toggle_category: courseware
+# .. toggle_use_cases: monitored_rollout
+# .. toggle_creation_date: 2026-10-19
+# .. toggle_expiration_date: None
+# .. toggle_warnings: The problem is shown as queued even if xqueue can't be reached, until the task gives up.
+#   Failed tasks are saved, and can be run again with the reapply_tasks management command.
+# .. toggle_tickets: N/A
+# .. toggle_status: supported
+ASYNC_XQUEUE_DISPATCH_FLAG = CourseWaffleFlag(WAFFLE_FLAG_NAMESPACE, 'async_xqueue_dispatch')
+
+# Waffle flag to cache the rendered views of blocks that are the same for all users.
+# .. toggle_name: courseware.cache_block_fragments
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, the views of blocks that declare them the same for all users, such as most
+#   HTML blocks, are cached with their urls rewritten, keyed on the block's definition, the course version, the
+#   language and the theme. The wrappers that depend on the user or the request are applied to them afterwards.
+# .. toggle_category: courseware
+# .. toggle_use_cases: monitored_rollout
+# .. toggle_creation_date: 2026-10-19
+# .. toggle_expiration_date: None
+# .. toggle_warnings: Only blocks of split courses are cached, since old mongo courses don't have versions.
+# .. toggle_tickets: N/A
+# .. toggle_status: supported
+CACHE_BLOCK_FRAGMENTS_FLAG = CourseWaffleFlag(WAFFLE_FLAG_NAMESPACE, 'cache_block_fragments')
@@ -44,6 +44,7 @@ from openedx.core.djangolib.markup import HTML, Text
 from openedx.features.course_experience import (
     COURSE_ENABLE_UNENROLLED_ACCESS_FLAG,
     COURSE_OUTLINE_PAGE_FLAG,
+    LAZY_LOAD_SEQUENCE_UNITS_FLAG,
     default_course_url_name
 )
 from openedx.features.course_experience.views.course_sock import CourseSockFragmentView
@@ -548,6 +549,19 @@ class CoursewareIndex(View):
             section_context['next_url'] = _compute_section_url(next_of_active_section, 'first')
         # sections can hide data that masquerading staff should see when debugging issues with specific students
         section_context['specific_masquerade'] = self._is_masquerading_as_specific_student()
+        if (
+            self.request.user.is_authenticated and
+            settings.FEATURES.get('ENABLE_XBLOCK_VIEW_ENDPOINT', False) and
+            LAZY_LOAD_SEQUENCE_UNITS_FLAG.is_enabled(self.course_key)
+        ):
+            section_context['lazy_unit_url'] = reverse(
+                'xblock_view',
+                kwargs={
+                    'course_id': six.text_type(self.course_key),
+                    'usage_id': 'usage_key',
+                    'view_name': 'student_view',
+                },
+            ).replace('usage_key', '{usage_key}')
         return section_context
 
 
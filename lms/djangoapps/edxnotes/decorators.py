@@ -60,4 +60,26 @@ def edxnotes(cls):
             })
 
     cls.get_html = get_html
+
+    original_is_view_cacheable = getattr(cls, 'is_view_cacheable', None)
+    if original_is_view_cacheable is not None:
+        def is_view_cacheable(self, view):
+            """
+            Returns whether the view can be cached, which it can't when it includes the user's notes token.
+            """
+            # Import is placed here to avoid model import at project startup.
+            from edxnotes.helpers import is_feature_enabled
+
+            if not original_is_view_cacheable(self, view):
+                return False
+            runtime = getattr(self, 'descriptor', self).runtime
+            if not hasattr(runtime, 'modulestore') or getattr(self.system, "is_author_mode", False):
+                return True
+            course = runtime.modulestore.get_course(self.runtime.course_id)
+            get_real_user = getattr(self.runtime, 'get_real_user', None)
+            user = get_real_user(self.runtime.anonymous_student_id) if get_real_user else None
+            return not is_feature_enabled(course, user)
+
+        cls.is_view_cacheable = is_view_cacheable
+
     return cls
@@ -92,6 +92,12 @@ class TestProblem(object):
         """
         return "original_get_html"
 
+    def is_view_cacheable(self, view):
+        """
+        Imitate is_view_cacheable in module.
+        """
+        return view == "student_view"
+
 
 @skipUnless(settings.FEATURES["ENABLE_EDXNOTES"], "EdxNotes feature needs to be enabled.")
 class EdxNotesDecoratorTest(ModuleStoreTestCase):
@@ -187,6 +193,22 @@ class EdxNotesDecoratorTest(ModuleStoreTestCase):
         enable_edxnotes_for_the_course(self.course, self.user.id)
         self.assertEqual("original_get_html", self.problem.get_html())
 
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_EDXNOTES": True})
+    def test_edxnotes_view_not_cacheable(self):
+        """
+        Tests that views aren't cacheable when edxnotes are enabled, since they include the user's token.
+        """
+        enable_edxnotes_for_the_course(self.course, self.user.id)
+        self.assertFalse(self.problem.is_view_cacheable("student_view"))
+
+    @patch.dict("django.conf.settings.FEATURES", {"ENABLE_EDXNOTES": False})
+    def test_edxnotes_disabled_view_cacheable(self):
+        """
+        Tests that views are cacheable as the module declares when edxnotes are disabled.
+        """
+        self.assertTrue(self.problem.is_view_cacheable("student_view"))
+        self.assertFalse(self.problem.is_view_cacheable("studio_view"))
+
     @patch.dict("django.conf.settings.FEATURES", {"ENABLE_EDXNOTES": True})
     def test_anonymous_user(self):
         user = AnonymousUser()
@@ -17,8 +17,10 @@ from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Count, Q
 from django.urls import reverse
 from edx_proctoring.api import get_exam_violation_report
+from edx_user_state_client.interface import XBlockUserState
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from six import text_type
+from xblock.fields import Scope
 
 import xmodule.graders as xmgraders
 from lms.djangoapps.courseware.models import StudentModule
@@ -433,51 +435,72 @@ def coupon_codes_features(features, coupons_list, course_id):
     return [extract_coupon(coupon, features) for coupon in coupons_list]
 
 
-def list_problem_responses(course_key, problem_location, limit_responses=None):
+def iter_problem_response_batches(course_key, problem_location, batch_size=None):
     """
-    Return responses to a given problem as a dict.
-
-    list_problem_responses(course_key, problem_location)
-
-    would return [
-        {'username': u'user1', 'state': u'...'},
-        {'username': u'user2', 'state': u'...'},
-        {'username': u'user3', 'state': u'...'},
-    ]
-
-    where `state` represents a student's response to the problem
-    identified by `problem_location`.
+    Yield the responses to a given problem in batches, without loading all of
+    them at once.
+
+    The responses are read in ranges of primary keys, so each batch is a
+    single indexed query, and the state of each is decoded only once.
+
+    Arguments:
+        course_key (CourseKey): the course of the problem.
+        problem_location (UsageKey|str): the location of the problem.
+        batch_size (int): the number of responses in each batch, defaulting
+            to the USER_STATE_BATCH_SIZE setting.
+
+    Yields:
+        lists of (response, user_state) tuples, where `response` is a dict
+        with the username of the learner and the state of the response as
+        get_response_state returns it, and `user_state` is the
+        XBlockUserState of the response, or None if its state is empty.
     """
     if isinstance(problem_location, UsageKey):
         problem_key = problem_location
     else:
         problem_key = UsageKey.from_string(problem_location)
     # Are we dealing with an "old-style" problem location?
-    run = problem_key.run
-    if not run:
-        problem_key = UsageKey.from_string(problem_location).map_into_course(course_key)
+    if not problem_key.run:
+        problem_key = problem_key.map_into_course(course_key)
     if problem_key.course_key != course_key:
-        return []
+        return
 
-    smdat = StudentModule.objects.filter(
-        course_id=course_key,
-        module_state_key=problem_key
-    )
-    smdat = smdat.order_by('student')
-    if limit_responses is not None:
-        smdat = smdat[:limit_responses]
+    if batch_size is None:
+        batch_size = settings.USER_STATE_BATCH_SIZE
 
-    return [
-        {'username': response.student.username, 'state': get_response_state(response)}
-        for response in smdat
-    ]
+    modules = StudentModule.objects.filter(
+        course_id=course_key,
+        module_state_key=problem_key,
+    ).select_related('student').order_by('id')
+
+    last_id = 0
+    while True:
+        batch = list(modules.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        responses = []
+        for module in batch:
+            state = json.loads(module.state or '{}')
+            response = {'username': module.student.username, 'state': get_response_state(module, state)}
+            user_state = None
+            if state != {}:
+                user_state = XBlockUserState(
+                    module.student.username, problem_key, state, module.modified, Scope.user_state
+                )
+            responses.append((response, user_state))
+        yield responses
 
 
-def get_response_state(response):
+def get_response_state(response, state=None):
     """
     Returns state of a particular response as string.
 
     This method also does necessary encoding for displaying unicode data correctly.
+
+    `state` is the decoded state of the response, if it's already been decoded.
+    It isn't modified.
     """
     def get_transformer():
         """
@@ -495,7 +518,11 @@ def get_response_state(response):
     if not problem_state_transformer:
         return problem_state
 
-    state = json.loads(problem_state)
+    if state is None:
+        state = json.loads(problem_state)
+    else:
+        # Transformers replace the values of the state they're given.
+        state = dict(state)
     try:
         transformed_state = problem_state_transformer(state)
         return json.dumps(transformed_state, ensure_ascii=False)
@@ -13,8 +13,7 @@ from django.db.models import Q
 from django.urls import reverse
 from edx_proctoring.api import create_exam
 from edx_proctoring.models import ProctoredExamStudentAttempt
-from mock import MagicMock, Mock, patch
-from opaque_keys.edx.locator import UsageKey
+from mock import Mock, patch
 from six import text_type
 from six.moves import range, zip
 
@@ -25,14 +24,12 @@ from lms.djangoapps.instructor_analytics.basic import (
     AVAILABLE_FEATURES,
     PROFILE_FEATURES,
     STUDENT_FEATURES,
-    StudentModule,
     coupon_codes_features,
     course_registration_features,
     enrolled_students_features,
     get_proctored_exam_results,
     get_response_state,
     list_may_enroll,
-    list_problem_responses,
     sale_order_record_features,
     sale_record_features
 )
@@ -97,48 +94,6 @@ class TestAnalyticsBasic(ModuleStoreTestCase):
         self.assertEqual(transformed_state['saved_files_descriptions'][0], files_descriptions)
         self.assertEqual(transformed_state['saved_response']['parts'][0]['text'], saved_response)
 
-    def test_list_problem_responses(self):
-        def result_factory(result_id):
-            """
-            Return a dummy StudentModule object that can be queried for
-            relevant info (student.username and state).
-            """
-            result = Mock(spec=['student', 'state'])
-            result.student.username.return_value = u'user{}'.format(result_id)
-            result.state.return_value = u'state{}'.format(result_id)
-            return result
-
-        # Ensure that UsageKey.from_string returns a problem key that list_problem_responses can work with
-        # (even when called with a dummy location):
-        mock_problem_key = Mock(return_value=u'')
-        mock_problem_key.course_key = self.course_key
-        with patch.object(UsageKey, 'from_string') as patched_from_string:
-            patched_from_string.return_value = mock_problem_key
-
-            # Ensure that StudentModule.objects.filter returns a result set that list_problem_responses can work with
-            # (this keeps us from having to create fixtures for this test):
-            mock_results = MagicMock(return_value=[result_factory(n) for n in range(5)])
-            with patch.object(StudentModule, 'objects') as patched_manager:
-                patched_manager.filter.return_value = mock_results
-
-                mock_problem_location = ''
-                problem_responses = list_problem_responses(self.course_key, problem_location=mock_problem_location)
-
-                # Check if list_problem_responses called UsageKey.from_string to look up problem key:
-                patched_from_string.assert_called_once_with(mock_problem_location)
-                # Check if list_problem_responses called StudentModule.objects.filter to obtain relevant records:
-                patched_manager.filter.assert_called_once_with(
-                    course_id=self.course_key, module_state_key=mock_problem_key
-                )
-
-                # Check if list_problem_responses returned expected results:
-                self.assertEqual(len(problem_responses), len(mock_results))
-                for mock_result in mock_results:
-                    self.assertIn(
-                        {'username': mock_result.student.username, 'state': mock_result.state},
-                        problem_responses
-                    )
-
     def test_enrolled_students_features_username(self):
         self.assertIn('username', AVAILABLE_FEATURES)
         userreports = enrolled_students_features(self.course_key, ['username'])
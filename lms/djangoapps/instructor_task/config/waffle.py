@@ -16,6 +16,7 @@ OPTIMIZE_GET_LEARNERS_FOR_COURSE = u'optimize_get_learners_for_course'
 # Course-specific flags
 PROBLEM_GRADE_REPORT_VERIFIED_ONLY = u'problem_grade_report_verified_only'
 COURSE_GRADE_REPORT_VERIFIED_ONLY = u'course_grade_report_verified_only'
+BATCH_RESCORE_PROBLEMS = u'batch_rescore_problems'
 
 
 def waffle_flags():
@@ -33,6 +34,11 @@ def waffle_flags():
             flag_name=COURSE_GRADE_REPORT_VERIFIED_ONLY,
             flag_undefined_default=False,
         ),
+        BATCH_RESCORE_PROBLEMS: CourseWaffleFlag(
+            waffle_namespace=INSTRUCTOR_TASK_WAFFLE_FLAG_NAMESPACE,
+            flag_name=BATCH_RESCORE_PROBLEMS,
+            flag_undefined_default=False,
+        ),
     }
 
 
@@ -54,6 +60,14 @@ def course_grade_report_verified_only(course_id):
     return waffle_flags()[PROBLEM_GRADE_REPORT_VERIFIED_ONLY].is_enabled(course_id)
 
 
+def batch_rescore_problems_enabled(course_id):
+    """
+    Returns True if rescoring tasks should grade the stored answers of
+    learners in batches in the given course, False otherwise.
+    """
+    return waffle_flags()[BATCH_RESCORE_PROBLEMS].is_enabled(course_id)
+
+
 def optimize_get_learners_switch_enabled():
     """
     Returns True if optimize get learner switch is enabled, otherwise False.
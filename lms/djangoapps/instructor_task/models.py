@@ -17,16 +17,18 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 import codecs
 import csv
 import hashlib
+import io
 import json
 import logging
 import os.path
+from tempfile import TemporaryFile
 from uuid import uuid4
 
 import six
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -290,15 +292,25 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        The rows can be a generator.  They're written to a temporary file
+        rather than kept in memory, so reports can be larger than memory.
         """
-        output_buffer = ContentFile('')
-        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
-        if six.PY2:
-            output_buffer.write(codecs.BOM_UTF8)
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        with TemporaryFile() as output_file:
+            if six.PY2:
+                # Adding unicode signature (BOM) for MS Excel 2013 compatibility
+                output_file.write(codecs.BOM_UTF8)
+                output_buffer = output_file
+            else:
+                output_buffer = io.TextIOWrapper(output_file, encoding='utf-8', newline='')
+            csvwriter = csv.writer(output_buffer)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            output_buffer.flush()
+            if not six.PY2:
+                # Leave the file open for storing it.
+                output_buffer.detach()
+            output_file.seek(0)
+            self.storage.save(self.path_to(course_id, filename), File(output_file, filename))
 
     def links_for(self, course_id):
         """
@@ -45,10 +45,10 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_proctored_exam_results_report
 )
 from lms.djangoapps.instructor_task.tasks_helper.module_state import (
+    BatchProblemRescorer,
     delete_problem_module_state,
     override_score_module_state,
     perform_module_state_update,
-    rescore_problem_module_state,
     reset_attempts_module_state
 )
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
@@ -77,7 +77,7 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    update_fcn = BatchProblemRescorer(xmodule_instance_args)
 
     visit_fcn = partial(perform_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
@@ -3,11 +3,13 @@ Functionality for generating grade reports.
 """
 
 
+import json
 import logging
 import re
 from collections import OrderedDict, defaultdict
 from datetime import datetime
 from itertools import chain
+from tempfile import TemporaryFile
 from time import time
 
 import six
@@ -22,12 +24,10 @@ from course_blocks.api import get_course_blocks
 from course_modes.models import CourseMode
 from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCertificate, certificate_info_for_user
 from lms.djangoapps.courseware.courses import get_course_by_id
-from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from lms.djangoapps.grades.api import CourseGradeFactory
 from lms.djangoapps.grades.api import context as grades_context
 from lms.djangoapps.grades.api import prefetch_course_and_subsection_grades
-from lms.djangoapps.instructor_analytics.basic import list_problem_responses
-from lms.djangoapps.instructor_analytics.csvs import format_dictlist
+from lms.djangoapps.instructor_analytics.basic import iter_problem_response_batches
 from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     optimize_get_learners_switch_enabled,
@@ -671,10 +671,13 @@ class ProblemResponses(object):
                 yield result
 
     @classmethod
-    def _build_student_data(cls, user_id, course_key, usage_key_str):
+    def _iter_student_data(cls, user_id, course_key, usage_key_str, student_data_keys):
         """
-        Generate a list of problem responses for all problem under the
-        ``problem_location`` root.
+        Generate the problem responses for all problem under the
+        ``problem_location`` root, one at a time.
+
+        Responses are read in batches, so the memory used doesn't depend on
+        the number of responses.
 
         Arguments:
             user_id (int): The user id for the user generating the report
@@ -682,23 +685,19 @@ class ProblemResponses(object):
                 is being generated
             usage_key_str (str): The generated report will include this
                 block and it child blocks.
+            student_data_keys (set): The keys of the student data generated
+                by blocks are added to this set.
 
-        Returns:
-              Tuple[List[Dict], List[str]]: Returns a list of dictionaries
-                containing the student data which will be included in the
-                final csv, and the features/keys to include in that CSV.
+        Yields:
+              Dict: the student data of each row of the final csv.
         """
         usage_key = UsageKey.from_string(usage_key_str).map_into_course(course_key)
         user = get_user_model().objects.get(pk=user_id)
         course_blocks = get_course_blocks(user, usage_key)
 
-        student_data = []
         max_count = settings.FEATURES.get('MAX_PROBLEM_RESPONSES_COUNT')
 
         store = modulestore()
-        user_state_client = DjangoXBlockUserStateClient()
-
-        student_data_keys = set()
 
         with store.bulk_operations(course_key):
             for title, path, block_key in cls._build_problem_list(course_blocks, usage_key):
@@ -708,58 +707,80 @@ class ProblemResponses(object):
                     continue
 
                 block = store.get_item(block_key)
-                generated_report_data = defaultdict(list)
-
-                # Blocks can implement the generate_report_data method to provide their own
-                # human-readable formatting for user state.
-                if hasattr(block, 'generate_report_data'):
-                    try:
-                        user_state_iterator = user_state_client.iter_all_for_block(block_key)
-                        for username, state in block.generate_report_data(user_state_iterator, max_count):
-                            generated_report_data[username].append(state)
-                    except NotImplementedError:
-                        pass
-
-                responses = []
-
-                for response in list_problem_responses(course_key, block_key, max_count):
-                    response['title'] = title
-                    # A human-readable location for the current block
-                    response['location'] = ' > '.join(path)
-                    # A machine-friendly location for the current block
-                    response['block_key'] = str(block_key)
-                    # A block that has a single state per user can contain multiple responses
-                    # within the same state.
-                    user_states = generated_report_data.get(response['username'], [])
-                    if user_states:
-                        # For each response in the block, copy over the basic data like the
-                        # title, location, block_key and state, and add in the responses
-                        for user_state in user_states:
-                            user_response = response.copy()
-                            user_response.update(user_state)
-                            student_data_keys = student_data_keys.union(list(user_state.keys()))
-                            responses.append(user_response)
-                    else:
-                        responses.append(response)
 
-                student_data += responses
+                for batch in iter_problem_response_batches(course_key, block_key):
+                    for response in cls._build_batch_student_data(block, batch, max_count, student_data_keys):
+                        response['title'] = title
+                        # A human-readable location for the current block
+                        response['location'] = ' > '.join(path)
+                        # A machine-friendly location for the current block
+                        response['block_key'] = str(block_key)
+                        yield response
+
+                        if max_count is not None:
+                            max_count -= 1
+                            if max_count <= 0:
+                                return
+
+    @classmethod
+    def _build_batch_student_data(cls, block, batch, max_count, student_data_keys):
+        """
+        Generate the student data of a batch of responses to a block.
+
+        Arguments:
+            block (XBlock): The block the responses are to.
+            batch (List[Tuple[Dict, XBlockUserState]]): A batch of responses,
+                as yielded by ``iter_problem_response_batches``.
+            max_count (int): The maximum number of responses the block
+                should generate, or None for no maximum.
+            student_data_keys (set): The keys of the student data generated
+                by the block are added to this set.
 
-                if max_count is not None:
-                    max_count -= len(responses)
-                    if max_count <= 0:
-                        break
+        Yields:
+              Dict: the student data of each response.
+        """
+        generated_report_data = defaultdict(list)
+
+        # Blocks can implement the generate_report_data method to provide their own
+        # human-readable formatting for user state.
+        if hasattr(block, 'generate_report_data'):
+            try:
+                user_state_iterator = (user_state for _, user_state in batch if user_state is not None)
+                for username, state in block.generate_report_data(user_state_iterator, max_count):
+                    generated_report_data[username].append(state)
+            except NotImplementedError:
+                pass
+
+        for response, _ in batch:
+            # A block that has a single state per user can contain multiple responses
+            # within the same state.
+            user_states = generated_report_data.get(response['username'], [])
+            if user_states:
+                # For each response in the block, copy over the basic data like the
+                # title, location, block_key and state, and add in the responses
+                for user_state in user_states:
+                    user_response = response.copy()
+                    user_response.update(user_state)
+                    student_data_keys.update(user_state)
+                    yield user_response
+            else:
+                yield response
 
+    @classmethod
+    def _get_student_data_keys(cls, student_data_keys):
+        """
+        Return the keys to include in the CSV, given the keys of the student
+        data generated by blocks.
+        """
         # Keep the keys in a useful order, starting with username, title and location,
         # then the columns returned by the xblock report generator in sorted order and
         # finally end with the more machine friendly block_key and state.
-        student_data_keys_list = (
+        return (
             ['username', 'title', 'location'] +
             sorted(student_data_keys) +
             ['block_key', 'state']
         )
 
-        return student_data, student_data_keys_list
-
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, task_input, action_name):
         """
@@ -774,31 +795,38 @@ class ProblemResponses(object):
         task_progress.update_task_state(extra_meta=current_step)
         problem_location = task_input.get('problem_location')
 
-        # Compute result table and format it
-        student_data, student_data_keys = cls._build_student_data(
-            user_id=task_input.get('user_id'),
-            course_key=course_id,
-            usage_key_str=problem_location
-        )
-
-        for data in student_data:
-            for key in student_data_keys:
-                data.setdefault(key, '')
-
-        header, rows = format_dictlist(student_data, student_data_keys)
+        # The columns of the CSV depend on all the student data, so it's
+        # spooled to a temporary file, one JSON object per line, and then
+        # formatted, rather than kept in memory.
+        with TemporaryFile(mode='w+') as student_data_file:
+            student_data_keys = set()
+            num_rows = 0
+            for data in cls._iter_student_data(
+                user_id=task_input.get('user_id'),
+                course_key=course_id,
+                usage_key_str=problem_location,
+                student_data_keys=student_data_keys,
+            ):
+                student_data_file.write(json.dumps(data, default=six.text_type) + '\n')
+                num_rows += 1
 
-        task_progress.attempted = task_progress.succeeded = len(rows)
-        task_progress.skipped = task_progress.total - task_progress.attempted
+            task_progress.attempted = task_progress.succeeded = num_rows
+            task_progress.skipped = task_progress.total - task_progress.attempted
 
-        rows.insert(0, header)
+            current_step = {'step': 'Uploading CSV'}
+            task_progress.update_task_state(extra_meta=current_step)
 
-        current_step = {'step': 'Uploading CSV'}
-        task_progress.update_task_state(extra_meta=current_step)
+            student_data_file.seek(0)
+            header = cls._get_student_data_keys(student_data_keys)
+            rows = (
+                [data.get(key, '') for key in header]
+                for data in (json.loads(line) for line in student_data_file)
+            )
 
-        # Perform the upload
-        problem_location = re.sub(r'[:/]', '_', problem_location)
-        csv_name = 'student_state_from_{}'.format(problem_location)
-        report_name = upload_csv_to_report_store(rows, csv_name, course_id, start_date)
+            # Perform the upload
+            problem_location = re.sub(r'[:/]', '_', problem_location)
+            csv_name = 'student_state_from_{}'.format(problem_location)
+            report_name = upload_csv_to_report_store(chain([header], rows), csv_name, course_id, start_date)
         current_step = {'step': 'CSV uploaded', 'report_name': report_name}
 
         return task_progress.update_task_state(extra_meta=current_step)
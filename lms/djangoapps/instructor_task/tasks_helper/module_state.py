@@ -13,24 +13,43 @@ from opaque_keys.edx.keys import UsageKey
 from xblock.runtime import KvsFieldData
 from xblock.scorable import Score
 
+from capa.correctmap import CorrectMap
 from capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
 from lms.djangoapps.courseware.courses import get_course_by_id, get_problems_in_section
 from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from lms.djangoapps.courseware.models import StudentModule
 from lms.djangoapps.courseware.module_render import get_module_for_descriptor_internal
+from lms.djangoapps.grades.api import constants as grades_constants
 from lms.djangoapps.grades.api import events as grades_events
+from lms.djangoapps.grades.api import signals as grades_signals
 from student.models import get_user_by_username_or_email
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
 from track.views import task_track
 from util.db import outer_atomic
 from xmodule.modulestore.django import modulestore
 
+from ..config.waffle import batch_rescore_problems_enabled
 from ..exceptions import UpdateProblemModuleStateError
 from .runner import TaskProgress
 from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED, UPDATE_STATUS_SUCCEEDED
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Response types whose grading only depends on the learner's answers and the
+# problem's seed, so that one problem instance can grade the answers of all
+# learners with the same seed.
+BATCH_RESCORE_RESPONSE_TYPES = {
+    'choiceresponse',
+    'multiplechoiceresponse',
+    'optionresponse',
+    'numericalresponse',
+    'stringresponse',
+    'formularesponse',
+}
+
+# Keys of the problem state in problem_rescore events, as LoncapaProblem.get_state returns them.
+PROBLEM_STATE_EVENT_KEYS = ('seed', 'student_answers', 'has_saved_answers', 'correct_map', 'input_state', 'done')
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -196,6 +215,185 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
         return UPDATE_STATUS_SUCCEEDED
 
 
+class BatchProblemRescorer(object):
+    """
+    Update function for perform_module_state_update that rescores problems,
+    grading the stored answers of learners with one problem instance per
+    problem and seed rather than instantiating the problem for every learner.
+
+    Learners whose stored answers still get the correctness and score stored
+    in their state have no state to update, so only the grade signal and the
+    problem_rescore tracking event of the rescore are sent for them, for
+    their subsection and course grades to be recomputed as well.  All other
+    learners are rescored by rescore_problem_module_state, as are all
+    learners of problems with scripts, with masked responses or with
+    response types whose grading depends on more than the answers and the
+    seed.
+
+    Batching is only done in courses with the instructor_task.batch_rescore_problems
+    waffle flag enabled.
+    """
+    def __init__(self, xmodule_instance_args):
+        self.xmodule_instance_args = xmodule_instance_args
+        # Map of usage keys to a problem instance to create graders from, or None
+        # if the problem can't be rescored in batches.
+        self._problems = {}
+        # Map of (usage key, seed) to the LoncapaProblem grading the answers of
+        # learners with that seed.
+        self._graders = {}
+
+    def __call__(self, module_descriptor, student_module, task_input):
+        if batch_rescore_problems_enabled(student_module.course_id):
+            state = json.loads(student_module.state) if student_module.state else {}
+            if not state.get('done'):
+                # The problem hasn't been answered, so there is nothing to rescore.
+                return UPDATE_STATUS_SKIPPED
+
+            grader = self._get_grader(module_descriptor, student_module, state)
+            if grader is not None and self._is_score_unchanged(grader, student_module, state):
+                self._publish_unchanged_score(module_descriptor, student_module, task_input)
+                self._track_unchanged_score(grader, student_module, state)
+                TASK_LOG.debug(
+                    u"score unchanged by rescore call for course %(course)s, problem %(loc)s "
+                    u"and student %(student)s",
+                    dict(
+                        course=student_module.course_id,
+                        loc=student_module.module_state_key,
+                        student=student_module.student_id
+                    )
+                )
+                return UPDATE_STATUS_SUCCEEDED
+
+        return rescore_problem_module_state(
+            self.xmodule_instance_args, module_descriptor, student_module, task_input
+        )
+
+    def _get_grader(self, module_descriptor, student_module, state):
+        """
+        Returns the LoncapaProblem to grade the learner's answers with, or None
+        if the problem can't be rescored in batches.
+        """
+        usage_key = student_module.module_state_key
+        if usage_key not in self._problems:
+            self._problems[usage_key] = self._get_problem_instance(module_descriptor, student_module)
+
+        instance = self._problems[usage_key]
+        seed = state.get('seed')
+        if instance is None or seed is None:
+            return None
+
+        if (usage_key, seed) not in self._graders:
+            self._graders[(usage_key, seed)] = instance.new_lcp({'seed': seed})
+        return self._graders[(usage_key, seed)]
+
+    def _get_problem_instance(self, module_descriptor, student_module):
+        """
+        Returns an instance of the problem for the given learner, or None if
+        the problem can't be rescored in batches.
+        """
+        course_id = student_module.course_id
+        with modulestore().bulk_operations(course_id):
+            course = get_course_by_id(course_id)
+            instance = _get_module_instance_for_task(
+                course_id,
+                student_module.student,
+                module_descriptor,
+                self.xmodule_instance_args,
+                grade_bucket_type='rescore',
+                course=course
+            )
+
+        lcp = getattr(instance, 'lcp', None)
+        if lcp is None or lcp.context.get('script_code'):
+            return None
+        if any(responder.has_mask() for responder in lcp.responders.values()):
+            # The answers in the rescore events of masked responses depend on
+            # the problem instance of each learner.
+            return None
+        if any(responder.xml.tag not in BATCH_RESCORE_RESPONSE_TYPES for responder in lcp.responders.values()):
+            return None
+        return instance
+
+    @staticmethod
+    def _is_score_unchanged(grader, student_module, state):
+        """
+        Returns whether grading the learner's stored answers results in the
+        correctness and score already stored for them.
+        """
+        grader.student_answers = state.get('student_answers', {})
+        grader.correct_map = CorrectMap()
+        grader.correct_map.set_dict(state.get('correct_map', {}))
+        try:
+            grader.correct_map.update(grader.get_grade_from_current_answers(None))
+        except (LoncapaProblemError, StudentInputError, ResponseError):
+            # Leave it to the rescore of the learner's problem instance to report.
+            return False
+
+        score = grader.calculate_score()
+        return (
+            grader.correct_map.get_dict() == state.get('correct_map') and
+            state.get('score') == {'raw_earned': score['score'], 'raw_possible': score['total']} and
+            student_module.grade == score['score'] and
+            student_module.max_grade == score['total']
+        )
+
+    @staticmethod
+    def _publish_unchanged_score(module_descriptor, student_module, task_input):
+        """
+        Sends the grade signal that rescoring the learner's problem module
+        would, so that the persisted grades depending on the problem's score
+        are recomputed as well.
+        """
+        create_new_event_transaction_id()
+        set_event_transaction_type(grades_events.GRADES_RESCORE_EVENT_TYPE)
+        grades_signals.PROBLEM_RAW_SCORE_CHANGED.send(
+            sender=None,
+            raw_earned=student_module.grade,
+            raw_possible=student_module.max_grade,
+            weight=getattr(module_descriptor, 'weight', None),
+            user_id=student_module.student_id,
+            course_id=six.text_type(student_module.course_id),
+            usage_id=six.text_type(student_module.module_state_key),
+            only_if_higher=task_input['only_if_higher'],
+            modified=student_module.modified,
+            score_db_table=grades_constants.ScoreDatabaseTableEnum.courseware_student_module,
+        )
+
+    def _track_unchanged_score(self, grader, student_module, state):
+        """
+        Emits the problem_rescore event that rescoring the learner's problem
+        module would, with the score that rescoring left unchanged.
+        """
+        event_info = {
+            'state': {key: state.get(key) for key in PROBLEM_STATE_EVENT_KEYS},
+            'problem_id': six.text_type(student_module.module_state_key),
+            'orig_score': student_module.grade,
+            'orig_total': student_module.max_grade,
+            'new_score': student_module.grade,
+            'new_total': student_module.max_grade,
+            'correct_map': grader.correct_map.get_dict(),
+            'success': 'correct' if all(
+                grader.correct_map.is_correct(answer_id) for answer_id in grader.correct_map
+            ) else 'incorrect',
+            'attempts': state.get('attempts', 0),
+        }
+        # The grader is the learner's problem as far as permutations go, since
+        # they depend on the seed only.
+        for responder in grader.responders.values():
+            if responder.has_shuffle():
+                permutation_option = 'shuffle'
+            elif responder.has_answerpool():
+                permutation_option = 'answerpool'
+            else:
+                continue
+            event_info.setdefault('permutation', {})[responder.answer_id] = (
+                permutation_option, responder.unmask_order()
+            )
+
+        track_function = _get_track_function_for_task(student_module.student, self.xmodule_instance_args)
+        track_function('problem_rescore', event_info)
+
+
 @outer_atomic
 def override_score_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
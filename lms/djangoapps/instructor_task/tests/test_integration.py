@@ -31,7 +31,9 @@ from lms.djangoapps.instructor_task.api import (
     submit_rescore_problem_for_student,
     submit_reset_problem_attempts_for_all_students
 )
+from lms.djangoapps.instructor_task.config.waffle import BATCH_RESCORE_PROBLEMS, waffle_flags
 from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.tasks_helper import module_state
 from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport
 from lms.djangoapps.instructor_task.tests.test_base import (
     OPTION_1,
@@ -40,6 +42,7 @@ from lms.djangoapps.instructor_task.tests.test_base import (
     TestReportMixin
 )
 from openedx.core.djangoapps.util.testing import TestConditionalContent
+from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
 from openedx.core.lib.url_utils import quote_slashes
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.tests.factories import ItemFactory
@@ -220,6 +223,71 @@ class TestRescoringTask(TestIntegrationTask):
             problem_edit, new_expected_scores, new_expected_max, rescore_if_higher=False,
         )
 
+    @ddt.data(
+        RescoreTestData(edit=dict(), new_expected_scores=(2, 1, 1, 0), new_expected_max=2),
+        RescoreTestData(edit=dict(correct_answer=OPTION_2), new_expected_scores=(0, 1, 1, 2), new_expected_max=2),
+        RescoreTestData(edit=dict(num_inputs=2), new_expected_scores=(2, 1, 1, 0), new_expected_max=4),
+    )
+    @ddt.unpack
+    def test_batch_rescoring_option_problem(self, problem_edit, new_expected_scores, new_expected_max):
+        """
+        Verify rescoring in batches gives the same results as rescoring each learner.
+        """
+        with override_waffle_flag(waffle_flags()[BATCH_RESCORE_PROBLEMS], active=True):
+            self.verify_rescore_results(
+                problem_edit, new_expected_scores, new_expected_max, rescore_if_higher=False,
+            )
+
+    def test_batch_rescoring_unchanged_scores(self):
+        """
+        Verify learners whose scores don't change are rescored without creating
+        a problem instance for each of them, and still have their grades updated.
+        """
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_1, OPTION_2])
+        self.submit_student_answer('u3', problem_url_name, [OPTION_2, OPTION_2])
+
+        with override_waffle_flag(waffle_flags()[BATCH_RESCORE_PROBLEMS], active=True):
+            with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state._get_module_instance_for_task',
+                wraps=module_state._get_module_instance_for_task,
+            ) as mock_get_module_instance:
+                with patch(
+                    'lms.djangoapps.grades.signals.handlers.PROBLEM_WEIGHTED_SCORE_CHANGED.send'
+                ) as mock_weighted_score_changed:
+                    with patch(
+                        'lms.djangoapps.instructor_task.tasks_helper.module_state.task_track'
+                    ) as mock_task_track:
+                        instructor_task = self.submit_rescore_all_student_answers('instructor', problem_url_name)
+
+        self.assertEqual(mock_get_module_instance.call_count, 1)
+        rescore_events = {
+            call_args[0][1]['student']: call_args[0][3]
+            for call_args in mock_task_track.call_args_list
+            if call_args[0][2] == 'problem_rescore'
+        }
+        self.assertEqual(sorted(rescore_events), sorted(user.username for user in self.users[:3]))
+        for user, expected_score in zip(self.users, (2, 1, 0)):
+            event = rescore_events[user.username]
+            self.assertEqual(event['problem_id'], six.text_type(location))
+            self.assertEqual(event['orig_score'], expected_score)
+            self.assertEqual(event['new_score'], expected_score)
+            self.assertEqual(event['new_total'], 2)
+            self.assertEqual(event['success'], 'correct' if expected_score == 2 else 'incorrect')
+        self.assertEqual(
+            sorted(call_args[1]['user_id'] for call_args in mock_weighted_score_changed.call_args_list),
+            sorted(user.id for user in self.users[:3]),
+        )
+        status = json.loads(InstructorTask.objects.get(id=instructor_task.id).task_output)
+        self.assertEqual(status['skipped'], 0)
+        self.assertEqual(status['succeeded'], 3)
+        for user, expected_score in zip(self.users, (2, 1, 0)):
+            self.check_state(user, descriptor, expected_score, 2)
+
     @ddt.data(
         RescoreTestData(edit=dict(), new_expected_scores=(2, 1, 1, 0), new_expected_max=2),
         RescoreTestData(edit=dict(correct_answer=OPTION_2), new_expected_scores=(2, 1, 1, 2), new_expected_max=2),
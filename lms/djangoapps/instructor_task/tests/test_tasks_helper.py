@@ -42,7 +42,7 @@ from lms.djangoapps.grades.models import (
 )
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
-from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, iter_problem_response_batches
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 # from lms.djangoapps.instructor_task.config.waffle import problem_grade_report_verified_only
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -513,10 +513,21 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         finally:
             ProblemBlock.generate_report_data = generate_report_data
 
+    def _iter_student_data(self, usage_key_str):
+        """
+        Return the student data generated for the blocks under ``usage_key_str``.
+        """
+        return list(ProblemResponses._iter_student_data(
+            user_id=self.instructor.id,
+            course_key=self.course.id,
+            usage_key_str=usage_key_str,
+            student_data_keys=set(),
+        ))
+
     @patch.dict('django.conf.settings.FEATURES', {'MAX_PROBLEM_RESPONSES_COUNT': 4})
-    def test_build_student_data_limit(self):
+    def test_iter_student_data_limit(self):
         """
-        Ensure that the _build_student_data method respects the global setting for
+        Ensure that the _iter_student_data method respects the global setting for
         maximum responses to return in a report.
         """
         self.define_option_problem(u'Problem1')
@@ -524,19 +535,15 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             student = self.create_student('student{}'.format(ctr))
             self.submit_student_answer(student.username, u'Problem1', ['Option 1'])
 
-        student_data, _ = ProblemResponses._build_student_data(
-            user_id=self.instructor.id,
-            course_key=self.course.id,
-            usage_key_str=str(self.course.location),
-        )
+        student_data = self._iter_student_data(str(self.course.location))
 
         self.assertEqual(len(student_data), 4)
 
     @patch(
-        'lms.djangoapps.instructor_task.tasks_helper.grades.list_problem_responses',
-        wraps=list_problem_responses
+        'lms.djangoapps.instructor_task.tasks_helper.grades.iter_problem_response_batches',
+        wraps=iter_problem_response_batches
     )
-    def test_build_student_data_for_block_without_generate_report_data(self, mock_list_problem_responses):
+    def test_iter_student_data_for_block_without_generate_report_data(self, mock_iter_problem_response_batches):
         """
         Ensure that building student data for a block the doesn't have the
         ``generate_report_data`` method works as expected.
@@ -544,11 +551,7 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         problem = self.define_option_problem(u'Problem1')
         self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
         with self._remove_capa_report_generator():
-            student_data, _ = ProblemResponses._build_student_data(
-                user_id=self.instructor.id,
-                course_key=self.course.id,
-                usage_key_str=str(problem.location),
-            )
+            student_data = self._iter_student_data(str(problem.location))
         self.assertEqual(len(student_data), 1)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -557,10 +560,10 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             'title': 'Problem1',
         }, student_data[0])
         self.assertIn('state', student_data[0])
-        mock_list_problem_responses.assert_called_with(self.course.id, ANY, ANY)
+        mock_iter_problem_response_batches.assert_called_with(self.course.id, ANY)
 
     @patch('xmodule.capa_module.ProblemBlock.generate_report_data', create=True)
-    def test_build_student_data_for_block_with_mock_generate_report_data(self, mock_generate_report_data):
+    def test_iter_student_data_for_block_with_mock_generate_report_data(self, mock_generate_report_data):
         """
         Ensure that building student data for a block that supports the
         ``generate_report_data`` method works as expected.
@@ -573,11 +576,7 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             ('student', state1),
             ('student', state2),
         ])
-        student_data, _ = ProblemResponses._build_student_data(
-            user_id=self.instructor.id,
-            course_key=self.course.id,
-            usage_key_str=str(self.course.location),
-        )
+        student_data = self._iter_student_data(str(self.course.location))
         self.assertEqual(len(student_data), 2)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -597,18 +596,14 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }, student_data[1])
         self.assertEqual(student_data[0]['state'], student_data[1]['state'])
 
-    def test_build_student_data_for_block_with_real_generate_report_data(self):
+    def test_iter_student_data_for_block_with_real_generate_report_data(self):
         """
         Ensure that building student data for a block that supports the
         ``generate_report_data`` method works as expected.
         """
         self.define_option_problem(u'Problem1')
         self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
-        student_data, _ = ProblemResponses._build_student_data(
-            user_id=self.instructor.id,
-            course_key=self.course.id,
-            usage_key_str=str(self.course.location),
-        )
+        student_data = self._iter_student_data(str(self.course.location))
         self.assertEqual(len(student_data), 1)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -622,26 +617,49 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }, student_data[0])
         self.assertIn('state', student_data[0])
 
-    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.list_problem_responses')
     @patch('xmodule.capa_module.ProblemBlock.generate_report_data', create=True)
-    def test_build_student_data_for_block_with_generate_report_data_not_implemented(
+    def test_iter_student_data_for_block_with_generate_report_data_not_implemented(
             self,
             mock_generate_report_data,
-            mock_list_problem_responses,
     ):
         """
         Ensure that if ``generate_report_data`` raises a NotImplementedError,
         the report falls back to the alternative method.
         """
         problem = self.define_option_problem(u'Problem1')
+        self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
         mock_generate_report_data.side_effect = NotImplementedError
-        ProblemResponses._build_student_data(
-            user_id=self.instructor.id,
-            course_key=self.course.id,
-            usage_key_str=str(problem.location),
-        )
+        student_data = self._iter_student_data(str(problem.location))
         mock_generate_report_data.assert_called_with(ANY, ANY)
-        mock_list_problem_responses.assert_called_with(self.course.id, ANY, ANY)
+        self.assertEqual(len(student_data), 1)
+        self.assertEqual(student_data[0]['username'], 'student')
+        self.assertIn('state', student_data[0])
+
+    @override_settings(USER_STATE_BATCH_SIZE=2)
+    @patch('xmodule.capa_module.ProblemBlock.generate_report_data', create=True)
+    def test_iter_student_data_in_batches(self, mock_generate_report_data):
+        """
+        Ensure that responses are read in batches, each given to the block's
+        ``generate_report_data`` at once.
+        """
+        self.define_option_problem(u'Problem1')
+        for ctr in range(5):
+            student = self.create_student('student{}'.format(ctr))
+            self.submit_student_answer(student.username, u'Problem1', ['Option 1'])
+        mock_generate_report_data.side_effect = lambda user_states, _: (
+            (user_state.username, {'Answer': 'Option 1'}) for user_state in user_states
+        )
+
+        student_data = self._iter_student_data(str(self.course.location))
+
+        self.assertEqual(mock_generate_report_data.call_count, 3)
+        self.assertEqual(
+            [data['username'] for data in student_data],
+            ['student{}'.format(ctr) for ctr in range(5)],
+        )
+        for data in student_data:
+            self.assertEqual(data['Answer'], 'Option 1')
+            self.assertIn('state', data)
 
     def test_success(self):
         task_input = {
@@ -650,15 +668,12 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }
         with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
             with patch('lms.djangoapps.instructor_task.tasks_helper.grades'
-                       '.ProblemResponses._build_student_data') as mock_build_student_data:
-                mock_build_student_data.return_value = (
-                    [
-                        {'username': 'user0', 'state': u'state0'},
-                        {'username': 'user1', 'state': u'state1'},
-                        {'username': 'user2', 'state': u'state2'},
-                    ],
-                    ['username', 'state']
-                )
+                       '.ProblemResponses._iter_student_data') as mock_iter_student_data:
+                mock_iter_student_data.return_value = iter([
+                    {'username': 'user0', 'state': u'state0'},
+                    {'username': 'user1', 'state': u'state1'},
+                    {'username': 'user2', 'state': u'state2'},
+                ])
                 result = ProblemResponses.generate(
                     None, None, self.course.id, task_input, 'calculated'
                 )
@@ -669,6 +684,28 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
         self.assertIn("report_name", result)
 
+    def test_success_with_real_generate_report_data(self):
+        self.define_option_problem(u'Problem1')
+        self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
+        task_input = {
+            'problem_location': str(self.course.location),
+            'user_id': self.instructor.id
+        }
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            result = ProblemResponses.generate(None, None, self.course.id, task_input, 'calculated')
+
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
+        self.verify_rows_in_csv([{
+            'username': 'student',
+            'title': 'Problem1',
+            'location': 'test_course > Section > Subsection > Problem1',
+            'Answer': 'Option 1',
+            'Answer ID': 'i4x-edx-1_23x-problem-Problem1_2_1',
+            'Correct Answer': 'Option 1',
+            'Question': 'The correct answer is Option 1',
+            'block_key': 'i4x://edx/1.23x/problem/Problem1',
+        }], ignore_other_columns=True)
+
 
 @ddt.ddt
 @patch.dict('django.conf.settings.FEATURES', {'ENABLE_PAID_COURSE_REGISTRATION': True})
@@ -12,6 +12,7 @@ from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
 
 from badges.service import BadgingService
 from badges.utils import badges_enabled
+from lms.djangoapps.courseware import render_profiler
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from lms.djangoapps.teams.services import TeamsService
 from openedx.core.djangoapps.user_api.course_tag import api as user_course_tag_api
@@ -156,10 +157,41 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
         if badges_enabled():
             services['badging'] = BadgingService(course_id=kwargs.get('course_id'), modulestore=store)
         self.request_token = kwargs.pop('request_token', None)
+        self.fragment_cache = kwargs.pop('fragment_cache', None)
         services['teams'] = TeamsService()
         services['teams_configuration'] = TeamsConfigurationService()
         super(LmsModuleSystem, self).__init__(**kwargs)
 
+    def render(self, block, view_name, context=None):
+        """
+        Renders the block, measuring the time spent in its view when
+        block rendering is profiled.
+        """
+        with render_profiler.profile(block.scope_ids.block_type, render_profiler.VIEW):
+            cache_key = self.fragment_cache.get_key(block, view_name) if self.fragment_cache is not None else None
+            if cache_key is None:
+                return super(LmsModuleSystem, self).render(block, view_name, context)
+            return self.render_from_fragment_cache(cache_key, block, view_name, context)
+
+    def render_from_fragment_cache(self, cache_key, block, view_name, context):
+        """
+        Renders a block whose view is the same for all users from the fragment cache.
+
+        The wrappers of the fragment cache have already been applied to cached fragments,
+        so only the other wrappers, which may depend on the user and the request, are.
+        """
+        def render_view():
+            """
+            Renders the view itself, without wrapping it.
+            """
+            return getattr(block, view_name)(context)
+
+        frag = self.fragment_cache.render(cache_key, block, view_name, context, render_view)
+        for wrapper in self.wrappers:
+            if wrapper not in self.fragment_cache.wrappers:
+                frag = wrapper(block, view_name, frag, context)
+        return self.render_asides(block, view_name, frag, context)
+
     def handler_url(self, *args, **kwargs):
         """
         Implement the XBlock runtime handler_url interface.
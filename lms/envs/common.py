@@ -612,6 +612,10 @@ TPA_PROVIDER_SUSTAINED_THROTTLE = '50/hr'
 # Mako templating
 import tempfile  # pylint: disable=wrong-import-order
 MAKO_MODULE_DIR = os.path.join(tempfile.gettempdir(), 'mako_lms')
+# Compiled Mako templates are written to and read from MAKO_MODULE_DIR.  Point it at a directory shared by
+# all the workers and fill it with the compile_mako_templates management command at build time, so that no
+# worker compiles templates itself.  With MAKO_PRELOAD_TEMPLATES, every template is loaded at startup.
+MAKO_PRELOAD_TEMPLATES = False
 MAKO_TEMPLATE_DIRS_BASE = [
     PROJECT_ROOT / 'templates',
     COMMON_ROOT / 'templates',
@@ -996,6 +1000,22 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# On-disk cache of large course assets, keyed by their content digest, for the contentserver to send them from.
+# It's disabled while ROOT is None.  Assets of at least MIN_ASSET_SIZE bytes are cached, and the least recently
+# used ones are deleted once the cache is larger than MAX_SIZE bytes.  The files are sent by the web server if
+# SENDFILE_HEADER is 'X-Accel-Redirect' (nginx), with SENDFILE_URL_PREFIX as the internal URL of ROOT, or
+# 'X-Sendfile' (Apache, lighttpd), and otherwise by the WSGI server.
+COURSE_ASSETS_DISK_CACHE = {
+    'ROOT': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+    'MIN_ASSET_SIZE': 1024 * 1024,
+    'SENDFILE_HEADER': None,
+    'SENDFILE_URL_PREFIX': None,
+}
+
+# Sizes (width, height) of the thumbnails generated for each image uploaded to a course, besides the default one.
+ASSET_THUMBNAIL_SIZES = []
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1083,6 +1103,13 @@ CODE_JAIL = {
         'REALTIME': 3,
         'PROXY': 0,
     },
+
+    # Pool of pre-warmed sandboxed processes to run jailed code with, see
+    # common/lib/capa/capa/safe_exec/worker_pool.py.
+    'worker_pool': {
+        # Number of workers per process.  0 disables the pool.
+        'size': 0,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1495,6 +1522,7 @@ MIDDLEWARE_CLASSES = [
 
     'lms.djangoapps.discussion.django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'openedx.core.djangoapps.util.middleware.ConfigureSandboxWorkerPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -1509,6 +1537,9 @@ MIDDLEWARE_CLASSES = [
     'lms.djangoapps.courseware.middleware.CacheCourseIdMiddleware',
     'lms.djangoapps.courseware.middleware.RedirectMiddleware',
 
+    # Reports block render timings, when enabled by the courseware.profile_block_rendering switch
+    'lms.djangoapps.courseware.render_profiler.RenderProfilerMiddleware',
+
     'course_wiki.middleware.WikiAccessMiddleware',
 
     'openedx.core.djangoapps.theming.middleware.CurrentSiteThemeMiddleware',
@@ -2801,6 +2832,11 @@ POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
+# Queue of the tasks sending submissions to xqueue, when the
+# courseware.async_xqueue_dispatch waffle flag is enabled.  Learners wait for
+# these, so they run on the high-priority queue.
+XQUEUE_DISPATCH_ROUTING_KEY = HIGH_PRIORITY_QUEUE
+
 GRADES_DOWNLOAD = {
     'STORAGE_CLASS': 'django.core.files.storage.FileSystemStorage',
     'STORAGE_KWARGS': {
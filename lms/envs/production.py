@@ -136,6 +136,9 @@ CELERY_QUEUES = {
 CELERY_ROUTES = "{}celery.Router".format(QUEUE_VARIANT)
 CELERYBEAT_SCHEDULE = {}  # For scheduling tasks, entries can be added to this dict
 
+MAKO_MODULE_DIR = ENV_TOKENS.get('MAKO_MODULE_DIR', MAKO_MODULE_DIR)
+MAKO_PRELOAD_TEMPLATES = ENV_TOKENS.get('MAKO_PRELOAD_TEMPLATES', MAKO_PRELOAD_TEMPLATES)
+
 # STATIC_ROOT specifies the directory where static files are
 # collected
 STATIC_ROOT_BASE = ENV_TOKENS.get('STATIC_ROOT_BASE', None)
@@ -302,6 +305,10 @@ BULK_EMAIL_ROUTING_KEY = ENV_TOKENS.get('BULK_EMAIL_ROUTING_KEY', HIGH_PRIORITY_
 # we have to reset the value here.
 BULK_EMAIL_ROUTING_KEY_SMALL_JOBS = ENV_TOKENS.get('BULK_EMAIL_ROUTING_KEY_SMALL_JOBS', DEFAULT_PRIORITY_QUEUE)
 
+# Queue for sending submissions to xqueue. See note above for why we have to
+# reset the value here.
+XQUEUE_DISPATCH_ROUTING_KEY = ENV_TOKENS.get('XQUEUE_DISPATCH_ROUTING_KEY', HIGH_PRIORITY_QUEUE)
+
 # Queue to use for expiring old entitlements
 ENTITLEMENTS_EXPIRATION_ROUTING_KEY = ENV_TOKENS.get('ENTITLEMENTS_EXPIRATION_ROUTING_KEY', DEFAULT_PRIORITY_QUEUE)
 
@@ -592,6 +599,8 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+COURSE_ASSETS_DISK_CACHE = ENV_TOKENS.get('COURSE_ASSETS_DISK_CACHE', COURSE_ASSETS_DISK_CACHE)
+ASSET_THUMBNAIL_SIZES = ENV_TOKENS.get('ASSET_THUMBNAIL_SIZES', ASSET_THUMBNAIL_SIZES)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -18,11 +18,16 @@ from django.contrib.sites.requests import RequestSite
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.site_configuration.models import SiteConfiguration
-from openedx.core.lib.cache_utils import request_cached
+from openedx.core.lib.cache_utils import bump_cache_generation, process_lru_cached, request_cached
+
+# Version stamp of the current configurations cached by StackedConfigurationModel.current.
+CURRENT_CONFIGURATION_CACHE_GENERATION = u'config_model_utils.StackedConfigurationModel.current'
 
 
 class Provenance(Enum):
@@ -106,7 +111,17 @@ class StackedConfigurationModel(ConfigurationModel):
         ),
     )
 
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        super(StackedConfigurationModel, self).save(*args, **kwargs)
+        # A change at any level can affect the current configuration of every course.
+        bump_cache_generation(CURRENT_CONFIGURATION_CACHE_GENERATION)
+
+    def delete(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        super(StackedConfigurationModel, self).delete(*args, **kwargs)
+        bump_cache_generation(CURRENT_CONFIGURATION_CACHE_GENERATION)
+
     @classmethod
+    @process_lru_cached(CURRENT_CONFIGURATION_CACHE_GENERATION, maxsize=1024)
     def current(cls, site=None, org=None, org_course=None, course_key=None):  # pylint: disable=arguments-differ
         """
         Return the current overridden configuration at the specified level.
@@ -342,3 +357,14 @@ class StackedConfigurationModel(ConfigurationModel):
             raise ValidationError(
                 _('Configuration may not be specified at more than one level at once.')
             )
+
+
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+def invalidate_current_configurations(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached current configurations when a site configuration
+    changes, since it can change the site of an org and so the configuration
+    of its courses.
+    """
+    bump_cache_generation(CURRENT_CONFIGURATION_CACHE_GENERATION)
@@ -10,6 +10,7 @@ The following internal data structures are implemented:
 """
 
 
+from contextlib import contextmanager
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -26,6 +27,10 @@ logger = getLogger(__name__)  # pylint: disable=invalid-name
 # A dictionary key value for storing a transformer's version number.
 TRANSFORMER_VERSION_KEY = '_version'
 
+# A name in the transformer data map for storing data that pertains to the
+# collected block structure as a whole rather than to a single transformer.
+COLLECTION_DATA_NAME = '_collection'
+
 
 class _BlockRelations(object):
     """
@@ -417,6 +422,20 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # List of (usage_key, keep_descendants) pairs for blocks removed
+        # while a removal recording is in progress; None otherwise.
+        # list [(UsageKey, bool)]
+        self._removed_blocks = None
+
+    @property
+    def collection_id(self):
+        """
+        Returns the unique identifier assigned to the block structure's
+        data when it was collected, or None if the data was collected
+        before identifiers were assigned.
+        """
+        return self.get_transformer_data(COLLECTION_DATA_NAME, 'id')
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
@@ -636,6 +655,9 @@ class BlockStructureBlockData(BlockStructure):
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
 
+        if self._removed_blocks is not None:
+            self._removed_blocks.append((usage_key, keep_descendants))
+
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
             for child in children:
@@ -753,6 +775,26 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException(u'Version attributes are not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.WRITE_VERSION)
 
+    def _set_collection_id(self, collection_id):
+        """
+        Records the unique identifier of the block structure's
+        collected data.
+        """
+        self.set_transformer_data(COLLECTION_DATA_NAME, 'id', collection_id)
+
+    @contextmanager
+    def _record_removals(self):
+        """
+        A context manager that yields a list to which each block removed
+        from the block structure within the context is appended, as a
+        (usage_key, keep_descendants) pair.
+        """
+        self._removed_blocks = []
+        try:
+            yield self._removed_blocks
+        finally:
+            self._removed_blocks = None
+
     def _get_or_create_block(self, usage_key):
         """
         Returns the BlockData associated with the given usage_key.
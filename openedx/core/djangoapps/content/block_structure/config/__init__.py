@@ -16,6 +16,22 @@ WAFFLE_NAMESPACE = u'block_structure'
 INVALIDATE_CACHE_ON_PUBLISH = u'invalidate_cache_on_publish'
 STORAGE_BACKING_FOR_CACHE = u'storage_backing_for_cache'
 RAISE_ERROR_WHEN_NOT_FOUND = u'raise_error_when_not_found'
+# .. toggle_name: block_structure.cache_filtered_blocks
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: Caches which blocks the filtering transformers remove from a collected block structure, by
+#   the cache keys of those transformers, so that later transforms with the same keys replay the removals instead of
+#   running the filters.
+# .. toggle_category: block structure
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2020-10-19
+# .. toggle_expiration_date: None
+# .. toggle_warnings: Transforms aren't cached when a transformer can't provide a key.  That's the case for courses
+#   with a user partition that has access denied messages, such as the content type gating partition of every
+#   course with content gating enabled, and for courses with randomized library content.
+# .. toggle_tickets: None
+# .. toggle_status: supported
+CACHE_FILTERED_BLOCKS = u'cache_filtered_blocks'
 
 
 def waffle():
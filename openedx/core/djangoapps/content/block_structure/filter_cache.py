@@ -0,0 +1,121 @@
+"""
+Module for caching the outcome of the filtering phase of block
+structure transformations.
+
+The outcome of filtering a collected block structure is the ordered
+list of blocks that the filters removed.  It is stored compactly as two
+bitsets over the structure's block index - the topological ordering of
+its blocks before filtering: one marking the removed blocks and one
+marking those removed while keeping their descendants.
+"""
+
+
+from hashlib import md5
+from logging import getLogger
+
+import six
+from django.core.cache import cache
+
+from . import config
+
+logger = getLogger(__name__)  # pylint: disable=C0103
+
+# Version of the format of the cached data.  Increment this value whenever
+# the format changes so previously cached data is ignored.
+VERSION = 2
+
+
+def get_cache_key(block_structure, transformer_keys):
+    """
+    Returns the cache key for the filtering outcome of the given block
+    structure, given the cache key contributions of all its filtering
+    transformers, as (transformer name, key) pairs.
+    """
+    hashed_keys = md5()
+    hashed_keys.update(six.text_type(block_structure.root_block_usage_key).encode('utf-8'))
+    for transformer_name, transformer_key in transformer_keys:
+        hashed_keys.update(b'|')
+        hashed_keys.update(six.text_type(transformer_name).encode('utf-8'))
+        hashed_keys.update(b'=')
+        hashed_keys.update(six.text_type(transformer_key).encode('utf-8'))
+    return u'block_structure.filtered.v{version}.{collection_id}.{hash}'.format(
+        version=VERSION,
+        collection_id=block_structure.collection_id,
+        hash=hashed_keys.hexdigest(),
+    )
+
+
+def get_removals(cache_key, block_index):
+    """
+    Returns the cached filtering outcome for the given cache key, as a
+    tuple of the set of removed blocks and the set of blocks that were
+    removed while keeping their descendants; or None if not cached.
+
+    Arguments:
+        cache_key (string) - The key returned by get_cache_key.
+
+        block_index ([UsageKey]) - The block index of the block
+            structure, as returned by its topological_traversal method.
+    """
+    cached_value = cache.get(cache_key)
+    if cached_value is None:
+        return None
+
+    num_blocks, removed_bitset, kept_descendants_bitset = cached_value
+    if num_blocks != len(block_index):
+        logger.warning(u"BlockStructure: Ignoring mismatched filter cache entry %s.", cache_key)
+        return None
+
+    return _decode_bitset(block_index, removed_bitset), _decode_bitset(block_index, kept_descendants_bitset)
+
+
+def set_removals(cache_key, block_index, removals):
+    """
+    Caches the given filtering outcome for the given cache key.
+
+    Arguments:
+        cache_key (string) - The key returned by get_cache_key.
+
+        block_index ([UsageKey]) - The block index of the block
+            structure, as returned by its topological_traversal method
+            before it was filtered.
+
+        removals ([(UsageKey, bool)]) - The removed blocks, with whether
+            their descendants were kept, as recorded during filtering.
+    """
+    removed = set(usage_key for usage_key, _ in removals)
+    kept_descendants = set(usage_key for usage_key, keep_descendants in removals if keep_descendants)
+    cache.set(
+        cache_key,
+        (
+            len(block_index),
+            _encode_bitset(block_index, removed),
+            _encode_bitset(block_index, kept_descendants),
+        ),
+        timeout=config.cache_timeout_in_seconds(),
+    )
+
+
+def _encode_bitset(block_index, usage_keys):
+    """
+    Returns a bytes object with the bits set at the positions in the
+    block index of the given usage keys.
+    """
+    bitset = bytearray((len(block_index) + 7) // 8)
+    for position, usage_key in enumerate(block_index):
+        if usage_key in usage_keys:
+            bitset[position >> 3] |= 1 << (position & 7)
+    return bytes(bitset)
+
+
+def _decode_bitset(block_index, encoded_bitset):
+    """
+    Returns the set of usage keys whose positions in the block index
+    are set in the given encoded bitset.
+    """
+    bitset = bytearray(encoded_bitset)
+    return set(
+        usage_key
+        for position, usage_key in enumerate(block_index)
+        if bitset[position >> 3] & (1 << (position & 7))
+    )
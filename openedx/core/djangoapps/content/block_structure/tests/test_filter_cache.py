@@ -0,0 +1,124 @@
+"""
+Tests for filter_cache.py and its use in transformers.py
+"""
+
+
+import ddt
+from mock import MagicMock
+
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+
+from .. import filter_cache
+from ..block_structure import BlockStructureModulestoreData
+from ..config import CACHE_FILTERED_BLOCKS, waffle
+from ..transformer import BlockStructureTransformer, FilteringTransformerMixin
+from ..transformers import BlockStructureTransformers
+from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, mock_registered_transformers
+
+
+class CacheableFilteringTransformer(FilteringTransformerMixin, BlockStructureTransformer):
+    """
+    A filtering transformer that removes the blocks listed in the
+    usage_info and supports caching of its filtering outcome.
+    """
+    WRITE_VERSION = 1
+    READ_VERSION = 1
+    filter_call_count = 0
+    cache_key_call_count = 0
+
+    @classmethod
+    def name(cls):
+        return cls.__name__
+
+    def transform_block_filters(self, usage_info, block_structure):
+        CacheableFilteringTransformer.filter_call_count += 1
+        return [
+            block_structure.create_removal_filter(
+                lambda block_key: block_key in usage_info.removed_blocks,
+                keep_descendants=usage_info.keep_descendants,
+            )
+        ]
+
+    def transform_block_filters_cache_key(self, usage_info, block_structure):
+        CacheableFilteringTransformer.cache_key_call_count += 1
+        return u'{}.{}'.format(sorted(usage_info.removed_blocks), usage_info.keep_descendants)
+
+
+@ddt.ddt
+class TestFilterCache(ChildrenMapTestMixin, CacheIsolationTestCase):
+    """
+    Test class for caching the outcome of filtering transformers.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(TestFilterCache, self).setUp()
+        CacheableFilteringTransformer.filter_call_count = 0
+        CacheableFilteringTransformer.cache_key_call_count = 0
+        self.transformer = CacheableFilteringTransformer()
+        with mock_registered_transformers([self.transformer, MockFilteringTransformer()]):
+            self.collected_structure = self.create_block_structure(
+                self.DAG_CHILDREN_MAP,
+                BlockStructureModulestoreData,
+            )
+            BlockStructureTransformers.collect(self.collected_structure)
+
+    def transform(self, removed_blocks, keep_descendants=False, transformers=None):
+        """
+        Transforms a copy of the collected block structure and returns it.
+        """
+        usage_info = MagicMock(removed_blocks=removed_blocks, keep_descendants=keep_descendants)
+        with mock_registered_transformers([self.transformer, MockFilteringTransformer()]):
+            block_structure = self.collected_structure.copy()
+            BlockStructureTransformers(transformers or [self.transformer], usage_info).transform(block_structure)
+        return block_structure
+
+    @ddt.data(
+        ({1}, False, [[2], [], [3, 4], [5, 6], [], [], []], {1}),
+        ({3}, False, [[1, 2], [], [4], [], [], [], []], {3, 5, 6}),
+        ({3}, True, [[1, 2], [5, 6], [5, 6, 4], [], [], [], []], {3}),
+    )
+    @ddt.unpack
+    def test_cached_outcome(self, removed_blocks, keep_descendants, expected_children_map, missing_blocks):
+        with waffle().override(CACHE_FILTERED_BLOCKS, active=True):
+            for _ in range(2):
+                block_structure = self.transform(removed_blocks, keep_descendants)
+                self.assert_block_structure(block_structure, expected_children_map, missing_blocks)
+        self.assertEqual(CacheableFilteringTransformer.filter_call_count, 1)
+
+    def test_different_keys(self):
+        with waffle().override(CACHE_FILTERED_BLOCKS, active=True):
+            self.transform({1})
+            block_structure = self.transform({2})
+        self.assert_block_structure(block_structure, [[1], [3], [], [5, 6], [], [], []], {2, 4})
+        self.assertEqual(CacheableFilteringTransformer.filter_call_count, 2)
+
+    def test_keys_named_by_transformer(self):
+        self.assertNotEqual(
+            filter_cache.get_cache_key(self.collected_structure, [('first', u'a'), ('second', u'b')]),
+            filter_cache.get_cache_key(self.collected_structure, [('first', u'b'), ('second', u'a')]),
+        )
+        self.assertNotEqual(
+            filter_cache.get_cache_key(self.collected_structure, [('first', u'a')]),
+            filter_cache.get_cache_key(self.collected_structure, [('second', u'a')]),
+        )
+
+    def test_disabled(self):
+        self.transform({1})
+        self.transform({1})
+        self.assertEqual(CacheableFilteringTransformer.filter_call_count, 2)
+        self.assertEqual(CacheableFilteringTransformer.cache_key_call_count, 0)
+
+    def test_uncacheable_transformer(self):
+        with waffle().override(CACHE_FILTERED_BLOCKS, active=True):
+            for _ in range(2):
+                self.transform({1}, transformers=[self.transformer, MockFilteringTransformer()])
+        self.assertEqual(CacheableFilteringTransformer.filter_call_count, 2)
+
+    def test_new_collection(self):
+        with waffle().override(CACHE_FILTERED_BLOCKS, active=True):
+            self.transform({1})
+            with mock_registered_transformers([self.transformer]):
+                BlockStructureTransformers.collect(self.collected_structure)
+            self.transform({1})
+        self.assertEqual(CacheableFilteringTransformer.filter_call_count, 2)
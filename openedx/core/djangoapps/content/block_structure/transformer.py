@@ -209,3 +209,31 @@ class FilteringTransformerMixin(BlockStructureTransformer):
                 transformer, that is to be transformed in place.
         """
         raise NotImplementedError
+
+    def transform_block_filters_cache_key(self, usage_info, block_structure):  # pylint: disable=unused-argument
+        """
+        Optional method that returns a string identifying all inputs,
+        other than the collected block structure itself, that determine
+        which blocks are removed by this transformer's filters for the
+        given usage_info.
+
+        When every filtering transformer in a collection returns a key,
+        the outcome of the combined filtering traversal is cached and
+        replayed on subsequent transforms with the same keys, without
+        calling transform_block_filters.  Transformers should therefore
+        only return a key if their filters have no side effects on the
+        block structure other than the removal of blocks.
+
+        Arguments:
+            usage_info (any negotiated type) - See the description in
+                transform_block_filters.
+
+            block_structure (BlockStructureBlockData) - The block
+                structure that is about to be filtered.
+
+        Returns:
+            string - The cache key contribution of this transformer, or
+                None (the default) if its filtering outcome must not be
+                cached.
+        """
+        return None
@@ -5,7 +5,11 @@ Module for a collection of BlockStructureTransformers.
 
 import functools
 from logging import getLogger
+from uuid import uuid4
 
+from edx_django_utils.monitoring import set_custom_metric
+
+from . import config, filter_cache
 from .exceptions import TransformerDataIncompatible, TransformerException
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
@@ -83,6 +87,9 @@ class BlockStructureTransformers(object):
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+        # Identify this collection so data derived from it can be cached.
+        block_structure._set_collection_id(uuid4().hex)  # pylint: disable=protected-access
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -123,10 +130,23 @@ class BlockStructureTransformers(object):
         """
         Transforms the given block_structure using the transform_block_filters
         method from the given transformers.
+
+        If all the transformers provide cache keys, the outcome of the
+        filtering traversal is cached and replayed on subsequent calls
+        with the same keys.
         """
         if not self._transformers['supports_filter']:
             return
 
+        cache_key = self._get_filter_cache_key(block_structure)
+        if cache_key:
+            block_index = list(block_structure.topological_traversal())
+            cached_removals = filter_cache.get_removals(cache_key, block_index)
+            set_custom_metric('block_structure_filter_cache_hit', cached_removals is not None)
+            if cached_removals is not None:
+                self._replay_removals(block_structure, *cached_removals)
+                return
+
         filters = []
         for transformer in self._transformers['supports_filter']:
             filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
@@ -136,7 +156,48 @@ class BlockStructureTransformers(object):
             filters,
             block_structure.create_universal_filter()
         )
-        block_structure.filter_topological_traversal(combined_filters)
+        if cache_key:
+            with block_structure._record_removals() as removals:  # pylint: disable=protected-access
+                block_structure.filter_topological_traversal(combined_filters)
+            filter_cache.set_removals(cache_key, block_index, removals)
+        else:
+            block_structure.filter_topological_traversal(combined_filters)
+
+    def _get_filter_cache_key(self, block_structure):
+        """
+        Returns the key for caching the outcome of the filtering
+        traversal of the given block_structure, or None if the outcome
+        is not cacheable.
+        """
+        # Check these first, since computing the transformers' keys
+        # costs queries and traversals of the structure.
+        if not block_structure.collection_id or not config.waffle().is_enabled(config.CACHE_FILTERED_BLOCKS):
+            return None
+
+        transformer_keys = []
+        for transformer in self._transformers['supports_filter']:
+            transformer_key = transformer.transform_block_filters_cache_key(self.usage_info, block_structure)
+            if transformer_key is None:
+                return None
+            transformer_keys.append((transformer.name(), transformer_key))
+
+        return filter_cache.get_cache_key(block_structure, transformer_keys)
+
+    def _replay_removals(self, block_structure, removed, kept_descendants):
+        """
+        Removes the given blocks from the given block_structure in the
+        same traversal order as the filters that originally removed them.
+        """
+        def _replay_filter(block_key):
+            """
+            Removes the block if it was removed by the original filters.
+            """
+            if block_key in removed:
+                block_structure.remove_block(block_key, keep_descendants=block_key in kept_descendants)
+                return False
+            return True
+
+        block_structure.filter_topological_traversal(_replay_filter)
 
     def _filter_chain(self, accumulated, additional):
         """
@@ -0,0 +1,18 @@
+"""
+Configuration for the contentserver Django app.
+"""
+
+
+from django.apps import AppConfig
+
+
+class ContentServerConfig(AppConfig):
+    """
+    Configuration class for the contentserver Django app.
+    """
+    name = 'openedx.core.djangoapps.contentserver'
+    verbose_name = "Content Server"
+
+    def ready(self):
+        # Connect the handler deleting changed assets from the cache.
+        from . import caching  # pylint: disable=unused-variable
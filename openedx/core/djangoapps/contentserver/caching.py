@@ -3,13 +3,16 @@ Helper functions for caching course assets.
 """
 
 
-import six
+from collections import namedtuple
 
+import six
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
+from django.dispatch import receiver
 from opaque_keys import InvalidKeyError
 
 from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.contentstore.django import asset_changed
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -19,6 +22,31 @@ except InvalidCacheBackendError:
     pass
 
 
+# The metadata of an asset that's needed to answer conditional requests for it, with the same attribute names
+# as StaticContent.
+AssetMetadata = namedtuple(
+    'AssetMetadata', ['content_digest', 'length', 'locked', 'content_type', 'last_modified_at']
+)
+
+
+# Seconds for which a thumbnail location that no asset has is remembered.
+MISSING_THUMBNAIL_TIMEOUT = 5 * 60
+
+
+def _metadata_key(location):
+    """
+    Returns the cache key of the metadata of the asset at the given location.
+    """
+    return u'metadata:{}'.format(location).encode("utf-8")
+
+
+def _missing_thumbnail_key(location):
+    """
+    Returns the cache key recording that no asset has its thumbnail at the given location.
+    """
+    return u'missing_thumbnail:{}'.format(location).encode("utf-8")
+
+
 def set_cached_content(content):
     """
     Stores the given piece of content in the cache, using its location as the key.
@@ -33,9 +61,48 @@ def get_cached_content(location):
     return CONTENT_CACHE.get(six.text_type(location).encode("utf-8"), version=STATIC_CONTENT_VERSION)
 
 
+def set_cached_metadata(content):
+    """
+    Stores the metadata of the given piece of content in the cache, and returns it.
+    """
+    metadata = AssetMetadata(
+        content_digest=getattr(content, 'content_digest', None),
+        length=content.length,
+        locked=getattr(content, 'locked', False),
+        content_type=content.content_type,
+        last_modified_at=content.last_modified_at,
+    )
+    CONTENT_CACHE.set(_metadata_key(content.location), tuple(metadata), version=STATIC_CONTENT_VERSION)
+    return metadata
+
+
+def get_cached_metadata(location):
+    """
+    Retrieves the AssetMetadata of the content at the given location if cached.
+    """
+    metadata = CONTENT_CACHE.get(_metadata_key(location), version=STATIC_CONTENT_VERSION)
+    return AssetMetadata(*metadata) if metadata is not None else None
+
+
+def set_cached_missing_thumbnail(location):
+    """
+    Records that no asset has its thumbnail at the given location.
+    """
+    CONTENT_CACHE.set(
+        _missing_thumbnail_key(location), True, MISSING_THUMBNAIL_TIMEOUT, version=STATIC_CONTENT_VERSION
+    )
+
+
+def is_cached_missing_thumbnail(location):
+    """
+    Returns whether no asset was found to have its thumbnail at the given location.
+    """
+    return CONTENT_CACHE.get(_missing_thumbnail_key(location), False, version=STATIC_CONTENT_VERSION)
+
+
 def del_cached_content(location):
     """
-    Delete content for the given location, as well versions of the content without a run.
+    Delete content and its metadata for the given location, as well versions of the content without a run.
 
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
@@ -44,11 +111,24 @@ def del_cached_content(location):
         """Force the location to a Unicode string."""
         return six.text_type(loc).encode("utf-8")
 
-    locations = [location_str(location)]
+    locations = [location]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(location.replace(run=None))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    keys = (
+        [location_str(loc) for loc in locations] +
+        [_metadata_key(loc) for loc in locations] +
+        [_missing_thumbnail_key(loc) for loc in locations]
+    )
+    CONTENT_CACHE.delete_many(keys, version=STATIC_CONTENT_VERSION)
+
+
+@receiver(asset_changed)
+def _handle_asset_changed(sender, asset_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete an asset and its metadata from the cache whenever it changes in the contentstore.
+    """
+    del_cached_content(asset_key)
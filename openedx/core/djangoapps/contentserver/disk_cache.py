@@ -0,0 +1,177 @@
+"""
+On-disk cache of course assets, for the web server to send.
+
+Large assets are too big for the course_assets cache, so each request for one
+used to stream it from the contentstore through Python, chunk by chunk.  Here
+each such asset is written once per host to a file named after its content
+digest, so that assets with the same content share a file, and a new version
+of an asset gets a new file.  The web server can then send that file itself,
+with X-Accel-Redirect or X-Sendfile, or the WSGI server can send it with
+sendfile.
+
+Files are written in the background, while the request that missed the cache
+streams the asset as before.  Once a file is written, the least recently used
+other files are deleted until the cache is no larger than its maximum size.
+Assets larger than the whole cache aren't cached.
+
+The cache is configured by the COURSE_ASSETS_DISK_CACHE setting, and is
+disabled when its ROOT is None.
+"""
+
+
+import logging
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+# Content digests are the hex MD5 of the content.
+DIGEST_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Digests of the files being written in the background by this process.
+_pending_digests = set()
+_pending_lock = threading.Lock()
+
+
+class AssetDiskCache(object):
+    """
+    A directory of asset files, named after their content digests.
+    """
+    def __init__(self, root, max_size):
+        self.root = root
+        self.max_size = max_size
+
+    def relative_path(self, digest):
+        """
+        Return the path of the file of `digest`, relative to the root.
+        """
+        return os.path.join(digest[:2], digest)
+
+    def get(self, digest):
+        """
+        Return the path of the file of `digest`, or None if it isn't cached.
+        """
+        if not DIGEST_RE.match(digest):
+            return None
+        path = os.path.join(self.root, self.relative_path(digest))
+        try:
+            # The modification time of a file is the last time it was used.
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def add(self, digest, chunks):
+        """
+        Write the file of `digest` from the byte strings in `chunks`, and
+        return its path, or None if `digest` isn't a content digest or the
+        file is larger than the cache.
+        """
+        if not DIGEST_RE.match(digest):
+            return None
+        path = os.path.join(self.root, self.relative_path(digest))
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process created it.
+                if not os.path.isdir(directory):
+                    raise
+
+        # Write to a temporary file, so that the file is only ever seen whole.
+        temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            size = 0
+            with os.fdopen(temp_fd, 'wb') as temp_file:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_size:
+                        break
+                    temp_file.write(chunk)
+            if size > self.max_size:
+                os.remove(temp_path)
+                return None
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def add_in_background(self, digest, size, get_chunks):
+        """
+        Write the file of `digest` in a background thread, from the byte
+        strings returned by `get_chunks()`, unless the `size` bytes of the
+        file are more than the cache holds or this process is already
+        writing it.
+        """
+        if not DIGEST_RE.match(digest) or size > self.max_size:
+            return
+        with _pending_lock:
+            if digest in _pending_digests:
+                return
+            _pending_digests.add(digest)
+        thread = threading.Thread(target=self._add_pending, args=(digest, get_chunks))
+        thread.daemon = True
+        thread.start()
+
+    def _add_pending(self, digest, get_chunks):
+        """
+        Write the file of `digest`, as requested by add_in_background.
+        """
+        try:
+            self.add(digest, get_chunks())
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Unable to add %s to the course assets disk cache", digest)
+        finally:
+            with _pending_lock:
+                _pending_digests.discard(digest)
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used files until the cache is no larger than
+        its maximum size, other than the file at the path `keep`.
+        """
+        files = []
+        total_size = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not DIGEST_RE.match(filename):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process deleted it.
+                pass
+            total_size -= size
+            log.info(u"Evicted %s from the course assets disk cache", path)
+
+
+def get_disk_cache():
+    """
+    Return the AssetDiskCache configured by COURSE_ASSETS_DISK_CACHE, or None
+    if it's disabled.
+    """
+    config = settings.COURSE_ASSETS_DISK_CACHE
+    if not config.get('ROOT'):
+        return None
+    return AssetDiskCache(config['ROOT'], config['MAX_SIZE'])
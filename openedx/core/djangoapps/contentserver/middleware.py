@@ -5,14 +5,16 @@ Middleware to serve assets.
 
 import logging
 import datetime
+import uuid
 import six
 log = logging.getLogger(__name__)
 try:
     import newrelic.agent
 except ImportError:
     newrelic = None  # pylint: disable=invalid-name
+from django.conf import settings
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
     HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
 from six import text_type
 from student.models import CourseEnrollment
@@ -23,7 +25,9 @@ from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
-from .caching import get_cached_content, set_cached_content
+from .caching import get_cached_content, get_cached_metadata, set_cached_content, set_cached_metadata
+from .disk_cache import get_disk_cache
+from .thumbnails import find_thumbnail_source, generate_missing_thumbnail
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -34,6 +38,9 @@ from .models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 
 HTTP_DATE_FORMAT = u"%a, %d %b %Y %H:%M:%S GMT"
 
+# Maximum number of ranges to send in a multipart/byteranges response.  The full content is sent for more.
+MAX_BYTE_RANGES = 20
+
 
 class StaticContentServer(object):
     """
@@ -70,14 +77,14 @@ class StaticContentServer(object):
             except (InvalidLocationError, InvalidKeyError):
                 return HttpResponseBadRequest()
 
-            # Attempt to load the asset to make sure it exists, and grab the asset digest
-            # if we're able to load it.
-            actual_digest = None
+            # Attempt to load the asset's metadata to make sure it exists, and grab the asset digest
+            # if we're able to load it.  The asset itself is only loaded if the metadata isn't cached,
+            # so that redirects and conditional requests don't read it.
             try:
-                content = self.load_asset_from_location(loc)
-                actual_digest = getattr(content, "content_digest", None)
+                metadata, content = self.load_asset_metadata(request, loc)
             except (ItemNotFoundError, NotFoundError):
                 return HttpResponseNotFound()
+            actual_digest = metadata.content_digest
 
             # If this was a versioned asset, and the digest doesn't match, redirect
             # them to the actual version.
@@ -102,33 +109,40 @@ class StaticContentServer(object):
                 newrelic.agent.add_custom_parameter('contentserver.from_cdn', is_from_cdn)
 
                 # Check if this content is locked or not.
-                locked = self.is_content_locked(content)
+                locked = self.is_content_locked(metadata)
                 newrelic.agent.add_custom_parameter('contentserver.locked', locked)
 
             # Check that user has access to the content.
-            if not self.is_user_authorized(request, content, loc):
+            if not self.is_user_authorized(request, metadata, loc):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
-
-            # *** File streaming within a byte range ***
+            # if this asset has changed since then, with the same caching headers as a full response.
+            last_modified_at_str = metadata.last_modified_at.strftime(HTTP_DATE_FORMAT)
+            not_modified = False
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                not_modified = self.is_etag_matched(request.META['HTTP_IF_NONE_MATCH'], metadata)
+            elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
+                not_modified = request.META['HTTP_IF_MODIFIED_SINCE'] == last_modified_at_str
+            if not_modified:
+                response = HttpResponseNotModified()
+                self.set_caching_headers(metadata, response)
+                return response
+
+            if content is None:
+                try:
+                    content = self.load_asset_from_location(loc)
+                except (ItemNotFoundError, NotFoundError):
+                    return HttpResponseNotFound()
+
+            # *** File streaming within byte ranges ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
+            # Request -> Range attribute structure: "Range: bytes=first-[last][, first-[last]...]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
+            if request.META.get('HTTP_RANGE') and self.is_range_current(request, content, last_modified_at_str):
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -139,38 +153,44 @@ class StaticContentServer(object):
                         text_type(exception), header_value, six.text_type(loc)
                     )
                 else:
+                    satisfiable_ranges = [
+                        (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                    ]
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif not satisfiable_ranges:
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, text_type(loc)
+                            u"Cannot satisfy ranges in Range header: %s for content: %s",
+                            header_value, text_type(loc)
                         )
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                    elif len(ranges) > MAX_BYTE_RANGES:
+                        # Send back the full content rather than many small parts of it.
+                        log.warning(
+                            u"Too many ranges in Range header: %s for content: %s", header_value, text_type(loc)
+                        )
+                    elif len(satisfiable_ranges) > 1:
+                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
+                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                        response = self.get_multipart_byteranges_response(content, satisfiable_ranges)
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, text_type(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
-
-            # If Range header is absent or syntactically invalid return a full content response.
+                        first, last = satisfiable_ranges[0]
+                        response = HttpResponse(content.stream_data_in_range(first, last))
+                        response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
+                            first=first, last=last, length=content.length
+                        )
+                        response['Content-Length'] = str(last - first + 1)
+                        response.status_code = 206  # Partial Content
+
+                    if response is not None and newrelic:
+                        newrelic.agent.add_custom_parameter('contentserver.ranged', True)
+                        newrelic.agent.add_custom_parameter('contentserver.range_count', len(satisfiable_ranges))
+
+            # If Range header is absent or syntactically invalid return a full content response,
+            # from the disk cache if the asset is large enough to be there.
+            if response is None:
+                response = self.get_disk_cached_response(content, loc)
             if response is None:
                 response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
@@ -181,7 +201,8 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            if not response['Content-Type'].startswith('multipart/byteranges'):
+                response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
@@ -192,6 +213,118 @@ class StaticContentServer(object):
 
             return response
 
+    @staticmethod
+    def get_etag(content):
+        """
+        Returns the entity tag of the content, from its digest, or None if it has no digest.
+        """
+        digest = getattr(content, "content_digest", None)
+        return u'"{}"'.format(digest) if digest else None
+
+    def is_etag_matched(self, if_none_match, content):
+        """
+        Determines whether the If-None-Match header value matches the entity tag of the content, comparing
+        weak entity tags as strong ones.
+        """
+        etag = self.get_etag(content)
+        if etag is None:
+            return False
+        etags = [value.strip() for value in if_none_match.split(',')]
+        return '*' in etags or etag in [value[2:] if value.startswith('W/') else value for value in etags]
+
+    def is_range_current(self, request, content, last_modified_at_str):
+        """
+        Determines whether the Range of the request applies to the current content, which is the case unless
+        the request has an If-Range header with an entity tag or date that isn't that of the content.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range:
+            return True
+        if if_range.startswith(('"', 'W/')):
+            return if_range == self.get_etag(content)
+        return if_range == last_modified_at_str
+
+    def get_multipart_byteranges_response(self, content, ranges):
+        """
+        Returns a multipart/byteranges response with the given (first, last) ranges of the content.
+        """
+        boundary = uuid.uuid4().hex
+        part_header_format = (
+            u'--{boundary}\r\n'
+            u'Content-Type: {content_type}\r\n'
+            u'Content-Range: bytes {first}-{last}/{length}\r\n'
+            u'\r\n'
+        )
+        part_headers = [
+            part_header_format.format(
+                boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+            ).encode('utf-8')
+            for first, last in ranges
+        ]
+        closing = u'--{}--\r\n'.format(boundary).encode('utf-8')
+
+        def stream_parts():
+            """
+            Streams each range after its headers.
+            """
+            for part_header, (first, last) in zip(part_headers, ranges):
+                yield part_header
+                for chunk in content.stream_data_in_range(first, last):
+                    yield chunk
+                yield b'\r\n'
+            yield closing
+
+        response = HttpResponse(stream_parts(), status=206)  # Partial Content
+        response['Content-Type'] = u'multipart/byteranges; boundary={}'.format(boundary)
+        response['Content-Length'] = str(
+            sum(len(part_header) + last - first + 1 + 2 for part_header, (first, last) in zip(part_headers, ranges)) +
+            len(closing)
+        )
+        return response
+
+    def get_disk_cached_response(self, content, location):
+        """
+        Returns a response sending the content from the disk cache, or None if it isn't to be sent from there.
+        Content missing from the cache is added to it in the background, to be sent from there next time.
+
+        The file is sent by the web server if COURSE_ASSETS_DISK_CACHE has a SENDFILE_HEADER, and otherwise
+        by the WSGI server, which uses sendfile if it can.  The content itself is left unread, so that the
+        caller can still stream it when None is returned.
+        """
+        disk_cache = get_disk_cache()
+        digest = getattr(content, "content_digest", None)
+        config = settings.COURSE_ASSETS_DISK_CACHE
+        if disk_cache is None or not digest or content.length is None or content.length < config['MIN_ASSET_SIZE']:
+            return None
+
+        path = disk_cache.get(digest)
+        if newrelic:
+            newrelic.agent.add_custom_parameter('contentserver.disk_cache_hit', path is not None)
+        if path is None:
+            # The background thread reads its own stream of the content, which is left to this request.
+            disk_cache.add_in_background(
+                digest, content.length, lambda: AssetManager.find(location, as_stream=True).stream_data()
+            )
+            return None
+
+        sendfile_header = config.get('SENDFILE_HEADER')
+        if sendfile_header == 'X-Accel-Redirect':
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = u'{}/{}'.format(
+                config['SENDFILE_URL_PREFIX'].rstrip('/'), disk_cache.relative_path(digest)
+            )
+        elif sendfile_header == 'X-Sendfile':
+            response = HttpResponse()
+            response['X-Sendfile'] = path
+        else:
+            try:
+                response = FileResponse(open(path, 'rb'))
+            except IOError:
+                # The file was just evicted, so the content is streamed instead.
+                return None
+            response['Content-Length'] = content.length
+        return response
+
     def set_caching_headers(self, content, response):
         """
         Sets caching headers based on whether or not the asset is locked.
@@ -218,6 +351,9 @@ class StaticContentServer(object):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = self.get_etag(content)
+        if etag:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -271,6 +407,36 @@ class StaticContentServer(object):
 
         return True
 
+    def load_asset_metadata(self, request, location):
+        """
+        Loads the metadata of an asset based on its location, from the cache, or along with the asset itself.
+
+        Returns (metadata, content), where content is the asset if it was loaded, and None otherwise.
+        """
+        metadata = get_cached_metadata(location)
+        if metadata is not None:
+            return metadata, None
+
+        try:
+            content = self.load_asset_from_location(location)
+        except (ItemNotFoundError, NotFoundError):
+            # The thumbnails of new images are generated in the background, so
+            # the first request for one can come before it's generated.
+            if location.category != 'thumbnail' or self.generate_missing_thumbnail(request, location) is None:
+                raise
+            content = self.load_asset_from_location(location)
+        return set_cached_metadata(content), content
+
+    def generate_missing_thumbnail(self, request, location):
+        """
+        Generates the thumbnail at the given location if it belongs to an asset that the user for this request
+        is authorized to view, but hasn't been generated yet, and returns it, or None.
+        """
+        content, dimensions = find_thumbnail_source(location)
+        if content is None or not self.is_user_authorized(request, content, content.location):
+            return None
+        return generate_missing_thumbnail(content, dimensions)
+
     def load_asset_from_location(self, location):
         """
         Loads an asset based on its location, either retrieving it from a cache
@@ -8,7 +8,10 @@ import copy
 import datetime
 import ddt
 import logging
+import shutil
 import six
+import tempfile
+import time
 import unittest
 from uuid import uuid4
 
@@ -17,6 +20,7 @@ from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
 from mock import patch
+from PIL import Image
 
 from xmodule.contentstore.django import contentstore
 from xmodule.contentstore.content import StaticContent, VERSIONED_ASSETS_PREFIX
@@ -30,7 +34,9 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from ..caching import get_cached_metadata
+from ..disk_cache import get_disk_cache
+from ..middleware import parse_range_header, HTTP_DATE_FORMAT, MAX_BYTE_RANGES, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -240,18 +246,168 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges response with each range.
         """
-        first_byte = self.length_unlocked / 4
-        last_byte = self.length_unlocked / 2
-        # pylint: disable=unicode-format-string
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+
+        full_content = self.client.get(self.url_unlocked).content
+        parts = resp.content.split(b'--' + boundary.encode('utf-8'))
+        self.assertEqual(parts[0], b'')
+        self.assertEqual(parts[-1], b'--\r\n')
+        expected_ranges = [(first_byte, last_byte), (self.length_unlocked - 100, self.length_unlocked - 1)]
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, data = part.split(b'\r\n\r\n', 1)
+            content_range = u'Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked)
+            self.assertIn(content_range.encode('utf-8'), headers)
+            self.assertEqual(data, full_content[first:last + 1] + b'\r\n')
+
+    def test_range_request_multiple_ranges_one_satisfiable(self):
+        """
+        Test that multiple ranges of which only one is satisfiable outputs a single part response.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {}-'.format(self.length_unlocked))
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], u'bytes 0-9/{}'.format(self.length_unlocked))
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that too many ranges in request outputs the full content.
+        """
+        header_value = 'bytes=' + ', '.join('{0}-{0}'.format(byte) for byte in range(MAX_BYTE_RANGES + 1))
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE=header_value)
+        self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    def test_range_request_if_range(self):
+        """
+        Test that a range request is only honoured if its If-Range is the current ETag or Last-Modified date.
+        """
+        resp = self.client.get(self.url_unlocked)
+        for if_range, status_code in (
+            (resp['ETag'], 206),
+            (resp['Last-Modified'], 206),
+            ('"{}"'.format(FAKE_MD5_HASH), 200),
+            ('Thu, 01 Jan 1970 00:00:00 GMT', 200),
+        ):
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=if_range)
+            self.assertEqual(resp.status_code, status_code)
+
+    def test_etag_header_sent(self):
+        """
+        Test that the ETag of an asset is its content digest.
+        """
+        resp = self.client.get(self.url_unlocked)
+        digest = self.contentstore.get_attr(self.unlocked_asset, 'content_digest')
+        self.assertEqual(resp['ETag'], u'"{}"'.format(digest))
+
+    def test_if_none_match(self):
+        """
+        Test that a request whose If-None-Match includes the current ETag is answered with a 304.
+        """
+        etag = self.client.get(self.url_unlocked)['ETag']
+        for if_none_match, status_code in (
+            (etag, 304),
+            ('W/' + etag, 304),
+            ('"{}", {}'.format(FAKE_MD5_HASH, etag), 304),
+            ('*', 304),
+            ('"{}"'.format(FAKE_MD5_HASH), 200),
+        ):
+            resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(resp.status_code, status_code)
+
+    @patch('openedx.core.djangoapps.contentserver.models.CourseAssetCacheTtlConfig.get_cache_ttl')
+    def test_not_modified_from_cached_metadata(self, mock_get_cache_ttl):
+        """
+        Test that conditional requests are answered from the cached metadata, without loading the asset,
+        with the caching headers of the asset.
+        """
+        mock_get_cache_ttl.return_value = 10
+        first_resp = self.client.get(self.url_unlocked)
+        with patch.object(StaticContentServer, 'load_asset_from_location') as mock_load_asset:
+            for conditional_header in (
+                {'HTTP_IF_NONE_MATCH': first_resp['ETag']},
+                {'HTTP_IF_MODIFIED_SINCE': first_resp['Last-Modified']},
+            ):
+                resp = self.client.get(self.url_unlocked, **conditional_header)
+                self.assertEqual(resp.status_code, 304)
+                for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+                    self.assertEqual(resp[header], first_resp[header])
+        self.assertFalse(mock_load_asset.called)
+
+    def test_cached_metadata_invalidated(self):
+        """
+        Test that changing an asset in the contentstore removes its metadata from the cache.
+        """
+        self.client.get(self.url_locked)
+        self.assertIsNotNone(get_cached_metadata(self.locked_asset))
+        self.contentstore.set_attr(self.locked_asset, 'locked', True)
+        self.assertIsNone(get_cached_metadata(self.locked_asset))
+
+    def save_image_without_thumbnail(self, name):
+        """
+        Save an image with the location of its default thumbnail, as if the thumbnail were still being generated.
+        """
+        image_file = six.BytesIO()
+        Image.new('RGB', (300, 200)).save(image_file, 'PNG')
+        content = StaticContent(
+            self.course_key.make_asset_key('asset', name), name, 'image/png', image_file.getvalue()
+        )
+        content.thumbnail_location = self.contentstore.compute_thumbnail_location(content)
+        self.contentstore.save(content)
+        return content
+
+    @override_settings(ASSET_THUMBNAIL_SIZES=[(64, 64)])
+    def test_missing_thumbnail_generated(self):
+        """
+        Test that a thumbnail which hasn't been generated yet is generated on the first request for it.
+        """
+        content = self.save_image_without_thumbnail('not_generated.png')
+        for dimensions in (None, (64, 64)):
+            thumbnail_location = self.contentstore.compute_thumbnail_location(content, dimensions=dimensions)
+            resp = self.client.get(six.text_type(thumbnail_location))
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp['Content-Type'], 'image/jpeg')
+
+        # Thumbnails of other sizes aren't generated.
+        thumbnail_location = self.contentstore.compute_thumbnail_location(content, dimensions=(32, 32))
+        resp = self.client.get(six.text_type(thumbnail_location))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_missing_thumbnail_lookup_cached(self):
+        """
+        Test that requests for a thumbnail no asset has only look for that asset once.
+        """
+        thumbnail_location = self.course_key.make_asset_key('thumbnail', 'no_such_image.jpg')
+        with patch.object(
+            self.contentstore, 'get_all_content_for_course', wraps=self.contentstore.get_all_content_for_course
+        ) as mock_get_all_content:
+            for _ in range(2):
+                resp = self.client.get(six.text_type(thumbnail_location))
+                self.assertEqual(resp.status_code, 404)
+        self.assertEqual(mock_get_all_content.call_count, 1)
+
+    def test_missing_thumbnail_of_locked_image(self):
+        """
+        Test that the thumbnail of a locked image isn't generated for users who can't view the image.
+        """
+        content = self.save_image_without_thumbnail('locked_not_generated.png')
+        self.contentstore.set_attr(content.location, 'locked', True)
+        thumbnail_location = self.contentstore.compute_thumbnail_location(content)
+        self.client.logout()
+        with patch('openedx.core.djangoapps.contentserver.middleware.generate_missing_thumbnail') as mock_generate:
+            resp = self.client.get(six.text_type(thumbnail_location))
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(mock_generate.called)
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -284,6 +440,81 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    def disk_cache_settings(self, **kwargs):
+        """
+        Returns settings enabling the disk cache for all assets, in a directory removed after the test.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        config = dict(ROOT=root, MAX_SIZE=1024 * 1024, MIN_ASSET_SIZE=0, SENDFILE_HEADER=None, SENDFILE_URL_PREFIX=None)
+        config.update(kwargs)
+        return override_settings(COURSE_ASSETS_DISK_CACHE=config)
+
+    def wait_for_disk_cache(self, asset):
+        """
+        Waits for the asset to be written to the disk cache in the background.
+        """
+        digest = self.contentstore.get_attr(asset, 'content_digest')
+        for _ in range(50):
+            if get_disk_cache().get(digest):
+                return
+            time.sleep(.1)
+        self.fail("The asset wasn't added to the disk cache")
+
+    def test_disk_cache(self):
+        """
+        Test that assets are streamed while they're added to the disk cache, and then sent from there.
+        """
+        with self.disk_cache_settings():
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertFalse(resp.streaming)
+            self.assertEqual(len(resp.content), self.length_unlocked)
+
+            self.wait_for_disk_cache(self.unlocked_asset)
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp.streaming)
+            self.assertEqual(len(b''.join(resp.streaming_content)), self.length_unlocked)
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+            resp.close()
+
+    def test_disk_cache_evicted(self):
+        """
+        Test that assets evicted from the disk cache once found there are streamed in full.
+        """
+        with self.disk_cache_settings():
+            self.client.get(self.url_unlocked)
+            self.wait_for_disk_cache(self.unlocked_asset)
+            with patch('openedx.core.djangoapps.contentserver.middleware.FileResponse', side_effect=IOError):
+                resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.content), self.length_unlocked)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+
+    @ddt.data('X-Accel-Redirect', 'X-Sendfile')
+    def test_disk_cache_sendfile(self, sendfile_header):
+        """
+        Test that assets in the disk cache are sent by the web server when it's configured to.
+        """
+        digest = self.contentstore.get_attr(self.unlocked_asset, 'content_digest')
+        with self.disk_cache_settings(SENDFILE_HEADER=sendfile_header, SENDFILE_URL_PREFIX='/course_assets/'):
+            self.client.get(self.url_unlocked)
+            self.wait_for_disk_cache(self.unlocked_asset)
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, b'')
+        self.assertTrue(resp[sendfile_header].endswith(u'/{}/{}'.format(digest[:2], digest)))
+
+    def test_disk_cache_small_assets(self):
+        """
+        Test that assets smaller than MIN_ASSET_SIZE aren't sent from the disk cache.
+        """
+        with self.disk_cache_settings(MIN_ASSET_SIZE=self.length_unlocked + 1):
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.streaming)
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
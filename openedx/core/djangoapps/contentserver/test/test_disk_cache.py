@@ -0,0 +1,106 @@
+"""
+Tests for the on-disk cache of course assets.
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from django.test.utils import override_settings
+from mock import Mock
+
+from ..disk_cache import AssetDiskCache, get_disk_cache
+
+DIGEST_1 = '0123456789abcdef0123456789abcdef'
+DIGEST_2 = 'fedcba9876543210fedcba9876543210'
+DIGEST_3 = '00000000000000000000000000000000'
+
+
+class AssetDiskCacheTest(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTest, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = AssetDiskCache(self.root, max_size=10)
+
+    def add(self, digest, data, mtime):
+        """
+        Add a file to the cache, last used at `mtime`.
+        """
+        path = self.cache.add(digest, [data[:2], data[2:]])
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_add_and_get(self):
+        path = self.cache.add(DIGEST_1, [b'abc', b'def'])
+        self.assertEqual(path, os.path.join(self.root, '01', DIGEST_1))
+        self.assertEqual(self.cache.get(DIGEST_1), path)
+        with open(path, 'rb') as cached_file:
+            self.assertEqual(cached_file.read(), b'abcdef')
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(DIGEST_1))
+
+    def test_invalid_digest(self):
+        self.assertIsNone(self.cache.add('../../etc/passwd', [b'abc']))
+        self.assertIsNone(self.cache.get('../../etc/passwd'))
+
+    def test_failed_add(self):
+        def chunks():
+            """
+            Fail after the first chunk.
+            """
+            yield b'abc'
+            raise IOError
+
+        with self.assertRaises(IOError):
+            self.cache.add(DIGEST_1, chunks())
+        self.assertIsNone(self.cache.get(DIGEST_1))
+        self.assertEqual(os.listdir(os.path.join(self.root, '01')), [])
+
+    def test_evict_least_recently_used(self):
+        self.add(DIGEST_1, b'1234', 1000)
+        self.add(DIGEST_2, b'1234', 2000)
+        # Using the first file makes the second one the least recently used.
+        self.cache.get(DIGEST_1)
+        self.add(DIGEST_3, b'1234', 3000)
+        self.assertIsNotNone(self.cache.get(DIGEST_1))
+        self.assertIsNone(self.cache.get(DIGEST_2))
+        self.assertIsNotNone(self.cache.get(DIGEST_3))
+
+    def test_add_larger_than_cache(self):
+        self.assertIsNone(self.cache.add(DIGEST_1, [b'123456', b'78901']))
+        self.assertIsNone(self.cache.get(DIGEST_1))
+        self.assertEqual(os.listdir(os.path.join(self.root, '01')), [])
+
+    def test_add_evicts_other_files(self):
+        self.add(DIGEST_1, b'1234', 1000)
+        path = self.cache.add(DIGEST_2, [b'12345678'])
+        self.assertIsNone(self.cache.get(DIGEST_1))
+        self.assertEqual(self.cache.get(DIGEST_2), path)
+
+    def test_add_in_background(self):
+        self.cache.add_in_background(DIGEST_1, 6, lambda: [b'abc', b'def'])
+        for _ in range(50):
+            if self.cache.get(DIGEST_1):
+                break
+            time.sleep(.1)
+        with open(self.cache.get(DIGEST_1), 'rb') as cached_file:
+            self.assertEqual(cached_file.read(), b'abcdef')
+
+    def test_add_in_background_larger_than_cache(self):
+        get_chunks = Mock()
+        self.cache.add_in_background(DIGEST_1, 11, get_chunks)
+        self.assertFalse(get_chunks.called)
+
+    def test_disabled(self):
+        with override_settings(COURSE_ASSETS_DISK_CACHE={'ROOT': None, 'MAX_SIZE': 10}):
+            self.assertIsNone(get_disk_cache())
+        with override_settings(COURSE_ASSETS_DISK_CACHE={'ROOT': self.root, 'MAX_SIZE': 10}):
+            self.assertEqual(get_disk_cache().root, self.root)
@@ -0,0 +1,134 @@
+"""
+Generation of course asset thumbnails outside of the request which uploads the asset.
+
+Studio can save an uploaded image along with the location its thumbnail will
+have, and leave generating the thumbnail to a celery task.  A thumbnail which
+is requested before the task has generated it is generated by that request,
+if the user can see the image.  Replacing an image deletes its thumbnails.
+
+Besides the default thumbnail, a thumbnail is generated for each of the
+(width, height) sizes of the ASSET_THUMBNAIL_SIZES setting.
+"""
+
+
+import logging
+import re
+import time
+
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+
+from xmodule.contentstore.django import contentstore
+
+from .caching import del_cached_content, is_cached_missing_thumbnail, set_cached_missing_thumbnail
+
+log = logging.getLogger(__name__)
+
+# The name of a thumbnail with dimensions is the name of the default
+# thumbnail, with "-{width}x{height}" before its extension.
+THUMBNAIL_DIMENSIONS_RE = re.compile(r'^(?P<root>.+)-(?P<width>\d+)x(?P<height>\d+)(?P<extension>\.\w+)$')
+
+
+def get_thumbnail_sizes():
+    """
+    Return the dimensions of the thumbnails of each image: None for the
+    default thumbnail, followed by the sizes in ASSET_THUMBNAIL_SIZES.
+    """
+    return [None] + [tuple(size) for size in settings.ASSET_THUMBNAIL_SIZES]
+
+
+def generate_thumbnail(content, dimensions=None):
+    """
+    Generate the thumbnail of `content` with the given `dimensions`, record
+    how long that took, and return it, or None if it couldn't be generated.
+    """
+    start_time = time.time()
+    thumbnail_content, thumbnail_location = contentstore().generate_thumbnail(content, dimensions=dimensions)
+    duration = time.time() - start_time
+    del_cached_content(thumbnail_location)
+
+    monitoring_utils.accumulate('asset_thumbnails_generated', 1)
+    monitoring_utils.accumulate('asset_thumbnail_generation_time', duration)
+    log.info(u"Generated the thumbnail %s in %.1f ms", thumbnail_location, duration * 1000)
+    return thumbnail_content
+
+
+def generate_thumbnails(content):
+    """
+    Generate the thumbnails of `content` in every size, and point the asset
+    at its default thumbnail, or at none if that couldn't be generated.
+    """
+    thumbnail_location = None
+    for dimensions in get_thumbnail_sizes():
+        thumbnail_content = generate_thumbnail(content, dimensions=dimensions)
+        if dimensions is None and thumbnail_content is not None:
+            thumbnail_location = thumbnail_content.location
+
+    if thumbnail_location != content.thumbnail_location:
+        set_thumbnail_location(content, thumbnail_location)
+    return thumbnail_location
+
+
+def set_thumbnail_location(content, thumbnail_location):
+    """
+    Point the asset `content` at the default thumbnail `thumbnail_location`.
+    """
+    value = thumbnail_location.to_deprecated_list_repr() if thumbnail_location else None
+    contentstore().set_attr(content.location, 'thumbnail_location', value)
+    content.thumbnail_location = thumbnail_location
+
+
+def delete_thumbnails(content):
+    """
+    Delete the thumbnails of `content` in every size, such as before it's
+    replaced, so that they aren't served until they're generated again.
+    """
+    store = contentstore()
+    for dimensions in get_thumbnail_sizes():
+        store.delete(store.compute_thumbnail_location(content, dimensions=dimensions))
+
+
+def find_thumbnail_source(thumbnail_location):
+    """
+    Return the asset whose thumbnail is at `thumbnail_location`, and the
+    dimensions of that thumbnail, or (None, None) if there's no such asset.
+
+    The default thumbnail of an asset is recorded with it.  Only the sizes in
+    ASSET_THUMBNAIL_SIZES are looked up from the name of the thumbnail, so that
+    requests can't have thumbnails of any size generated.  Locations found to
+    have no asset are cached for a while, or until an asset is saved with
+    them, so that requests for them don't query the contentstore each time.
+    """
+    if is_cached_missing_thumbnail(thumbnail_location):
+        return None, None
+
+    candidates = [(thumbnail_location.block_id, None)]
+    match = THUMBNAIL_DIMENSIONS_RE.match(thumbnail_location.block_id)
+    if match:
+        dimensions = (int(match.group('width')), int(match.group('height')))
+        if dimensions in get_thumbnail_sizes():
+            candidates.append((match.group('root') + match.group('extension'), dimensions))
+
+    store = contentstore()
+    for thumbnail_name, dimensions in candidates:
+        assets, __ = store.get_all_content_for_course(
+            thumbnail_location.course_key, maxresults=1, filter_params={'thumbnail_location.4': thumbnail_name}
+        )
+        if assets:
+            return store.find(assets[0]['asset_key']), dimensions
+
+    set_cached_missing_thumbnail(thumbnail_location)
+    return None, None
+
+
+def generate_missing_thumbnail(content, dimensions=None):
+    """
+    Generate the thumbnail of `content` with the given `dimensions`, which
+    hasn't been generated yet, as found by find_thumbnail_source, and return
+    it, or None.
+    """
+    thumbnail_content = generate_thumbnail(content, dimensions=dimensions)
+    if thumbnail_content is None and dimensions is None:
+        # Don't try again on every request for it.
+        set_thumbnail_location(content, None)
+    return thumbnail_content
@@ -8,14 +8,19 @@ from logging import getLogger
 
 from django.contrib.sites.models import Site
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from jsonfield.fields import JSONField
 from model_utils.models import TimeStampedModel
 
+from openedx.core.lib.cache_utils import bump_cache_generation, process_lru_cached
+
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
+# Version stamp of the org lookups cached by SiteConfiguration.
+ORG_LOOKUP_CACHE_GENERATION = u'site_configuration.SiteConfiguration.orgs'
+
 
 @python_2_unicode_compatible
 class SiteConfiguration(models.Model):
@@ -67,6 +72,7 @@ class SiteConfiguration(models.Model):
         return default
 
     @classmethod
+    @process_lru_cached(ORG_LOOKUP_CACHE_GENERATION)
     def get_configuration_for_org(cls, org, select_related=None):
         """
         This returns a SiteConfiguration object which has an org_filter that matches
@@ -110,6 +116,7 @@ class SiteConfiguration(models.Model):
             return configuration.get_value(name, default)
 
     @classmethod
+    @process_lru_cached(ORG_LOOKUP_CACHE_GENERATION)
     def get_all_orgs(cls):
         """
         This returns all of the orgs that are considered in site configurations, This can be used,
@@ -188,3 +195,12 @@ def update_site_configuration_history(sender, instance, **kwargs):  # pylint: di
         values=instance.values,
         enabled=instance.enabled,
     )
+
+
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+def invalidate_org_lookup_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached org lookups of site configurations.
+    """
+    bump_cache_generation(ORG_LOOKUP_CACHE_GENERATION)
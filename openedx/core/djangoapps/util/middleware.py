@@ -0,0 +1,19 @@
+"""
+Middleware for the util app.
+"""
+
+
+from capa.safe_exec.worker_pool import configure_worker_pool
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+class ConfigureSandboxWorkerPoolMiddleware(object):
+    """
+    Configure the pool of sandboxed workers of safe_exec from the
+    "worker_pool" dict of the CODE_JAIL setting, as codejail's own
+    ConfigureCodeJailMiddleware configures codejail, then step aside.
+    """
+    def __init__(self, get_response=None):
+        configure_worker_pool(getattr(settings, 'CODE_JAIL', {}).get('worker_pool'))
+        raise MiddlewareNotUsed()
@@ -0,0 +1,23 @@
+"""
+Tests for the util app middleware.
+"""
+
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import TestCase
+from django.test.utils import override_settings
+from mock import patch
+
+from openedx.core.djangoapps.util.middleware import ConfigureSandboxWorkerPoolMiddleware
+
+
+class ConfigureSandboxWorkerPoolMiddlewareTest(TestCase):
+    """
+    Tests for ConfigureSandboxWorkerPoolMiddleware.
+    """
+    @override_settings(CODE_JAIL={'worker_pool': {'size': 2}})
+    @patch('openedx.core.djangoapps.util.middleware.configure_worker_pool')
+    def test_configures_pool(self, mock_configure_worker_pool):
+        with self.assertRaises(MiddlewareNotUsed):
+            ConfigureSandboxWorkerPoolMiddleware()
+        mock_configure_worker_pool.assert_called_once_with({'size': 2})
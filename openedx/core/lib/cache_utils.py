@@ -4,12 +4,17 @@ Utilities related to caching.
 
 
 import collections
+import copy
 import functools
 import itertools
+import threading
+import time
 import zlib
+from uuid import uuid4
 
 import six
 import wrapt
+from django.core.cache import cache as django_cache
 from django.utils.encoding import force_text
 from edx_django_utils.cache import RequestCache
 from six import iteritems
@@ -151,6 +156,193 @@ class process_cached(object):  # pylint: disable=invalid-name
         return functools.partial(self.__call__, obj)
 
 
+def process_lru_cached(generation_key, maxsize=128, timeout=300, arg_map_function=None):
+    """
+    A function decorator that caches its return value both for the duration
+    of the request and, across requests, in a bounded per-process LRU cache.
+
+    Cached values are shared across the processes' requests until they expire
+    after ``timeout`` seconds, fall out of the ``maxsize`` most recently used
+    values, or are invalidated by ``bump_cache_generation(generation_key)``.
+    The current generation is a version stamp kept in the django cache, so an
+    invalidation in one process is seen by all of them, at the cost of one
+    cache read per generation key per request.  If the django cache doesn't
+    retain the generation, as with a DummyCache, values are only cached for
+    the duration of the request.
+
+    Each request gets its own deep copy of the values cached in the process,
+    as it would get its own unpickled copy of values cached in the django
+    cache, so that requests can't alter each other's values.  Within a
+    request, the same value is returned on every call, as with
+    ``request_cached``.
+
+    Use this for hot lookups of slowly changing data, such as configuration,
+    that are made in most requests.  The same caveats as for
+    ``request_cached`` apply to the function's arguments.
+
+    Arguments:
+        generation_key (string): The django cache key of the version stamp of
+            the cached values, also used as the namespace of the request cache.
+        maxsize (int): The maximum number of values to keep per process.
+        timeout (int): The number of seconds to keep values for.
+        arg_map_function (function: arg->string): Function to use for mapping
+            the wrapped function's arguments to strings to use in the cache key.
+
+    Returns:
+        func: a decorator for the function to cache.
+    """
+    def decorator(func):
+        """
+        Arguments:
+            func: the function to cache
+        """
+        lru_cache = _ProcessLRUCache(maxsize, timeout)
+        _PROCESS_LRU_CACHES[u'{}.{}'.format(func.__module__, func.__name__)] = lru_cache
+
+        @wrapt.decorator
+        def wrapper(wrapped, instance, args, kwargs):  # pylint: disable=unused-argument
+            """
+            Arguments:
+                args, kwargs: values passed into the wrapped function
+            """
+            cache_key = _func_call_cache_key(wrapped, arg_map_function, *args, **kwargs)
+            request_cache = RequestCache(generation_key)
+            cached_response = request_cache.get_cached_response(cache_key)
+            if cached_response.is_found:
+                return cached_response.value
+
+            generation = _get_cache_generation(generation_key)
+            is_found, result = lru_cache.get(cache_key, generation)
+            if not is_found:
+                result = wrapped(*args, **kwargs)
+                lru_cache.set(cache_key, generation, result)
+
+            request_cache.set(cache_key, result)
+            return result
+
+        return wrapper(func)
+
+    return decorator
+
+
+def bump_cache_generation(generation_key):
+    """
+    Invalidates the values cached by the ``process_lru_cached`` functions
+    with the given generation key in all processes.
+    """
+    django_cache.set(generation_key, uuid4().hex, None)
+    RequestCache(generation_key).clear()
+    RequestCache(_GENERATION_REQUEST_CACHE_NAMESPACE).delete(generation_key)
+
+
+def get_process_lru_cache_stats():
+    """
+    Returns the hit and miss counts and the current size of the cache of
+    each ``process_lru_cached`` function in this process, keyed by the
+    function's module and name.
+    """
+    return {
+        name: lru_cache.stats()
+        for name, lru_cache in six.iteritems(_PROCESS_LRU_CACHES)
+    }
+
+
+def clear_process_lru_caches():
+    """
+    Clears the caches of all ``process_lru_cached`` functions in this process.
+    """
+    for lru_cache in six.itervalues(_PROCESS_LRU_CACHES):
+        lru_cache.clear()
+
+
+_GENERATION_REQUEST_CACHE_NAMESPACE = u'cache_utils.generation'
+
+# Map of the names of process_lru_cached functions to their caches.
+_PROCESS_LRU_CACHES = {}
+
+
+def _get_cache_generation(generation_key):
+    """
+    Returns the current version stamp of the given generation key, read
+    from the django cache at most once per request, or None if the django
+    cache doesn't retain it.
+    """
+    request_cache = RequestCache(_GENERATION_REQUEST_CACHE_NAMESPACE)
+    cached_response = request_cache.get_cached_response(generation_key)
+    if cached_response.is_found:
+        return cached_response.value
+
+    generation = django_cache.get(generation_key)
+    if generation is None:
+        # The generation was never set or was evicted, so start a new one.
+        # This also invalidates values cached under the evicted generation.
+        django_cache.add(generation_key, uuid4().hex, None)
+        generation = django_cache.get(generation_key)
+
+    request_cache.set(generation_key, generation)
+    return generation
+
+
+class _ProcessLRUCache(object):
+    """
+    A thread-safe, bounded, least-recently-used cache of values stamped with
+    the generation and time they were cached at.  Values are copied on the
+    way in and out, so that the cached values are never shared.
+    """
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """
+        Returns a tuple of whether a value was found for the given key in the
+        given generation, and the value.  Values can't be found when the
+        generation is None.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and generation is not None:
+                entry_generation, expiration, value = entry
+                if entry_generation == generation and expiration > time.time():
+                    # Re-insert the entry to mark it as the most recently used.
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return True, copy.deepcopy(value)
+            self.misses += 1
+            return False, None
+
+    def set(self, key, generation, value):
+        """
+        Caches the value of the given key in the given generation, unless the
+        generation is None.
+        """
+        if generation is None:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (generation, time.time() + self.timeout, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all values from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit and miss counts and the size of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
 def zpickle(data):
     """Given any data structure, returns a zlib compressed pickled serialization."""
     return zlib.compress(pickle.dumps(data, 2))  # Keep this constant as we upgrade from python 2 to 3.
@@ -6,10 +6,16 @@ Tests for cache_utils.py
 from unittest import TestCase
 
 import ddt
-from mock import Mock
+from mock import ANY, Mock, patch
 
 from edx_django_utils.cache import RequestCache
-from openedx.core.lib.cache_utils import request_cached
+from openedx.core.lib.cache_utils import (
+    bump_cache_generation,
+    clear_process_lru_caches,
+    get_process_lru_cache_stats,
+    process_lru_cached,
+    request_cached
+)
 import six
 
 
@@ -297,3 +303,115 @@ class TestRequestCachedDecorator(TestCase):
         result = wrapped(3)
         self.assertEqual(result, 2)
         self.assertEqual(to_be_wrapped.call_count, 2)
+
+
+@patch('openedx.core.lib.cache_utils.django_cache')
+class TestProcessLRUCachedDecorator(TestCase):
+    """
+    Test the process_lru_cached decorator.
+    """
+    def setUp(self):
+        RequestCache.clear_all_namespaces()
+        clear_process_lru_caches()
+        self.to_be_wrapped = Mock(side_effect=lambda arg: arg * 10)
+
+        def mock_wrapper(arg):
+            """Simple wrapper to let us decorate our mock."""
+            return self.to_be_wrapped(arg)
+
+        self.wrapped = process_lru_cached(u'test.generation', maxsize=2, timeout=60)(mock_wrapper)
+
+    def _use_generation(self, mock_cache, generation):
+        """
+        Sets the generation returned by the mocked django cache.
+        """
+        mock_cache.get.return_value = generation
+
+    def _new_request(self):
+        """
+        Simulates the start of a new request.
+        """
+        RequestCache.clear_all_namespaces()
+
+    def test_cached_across_requests(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        self.assertEqual(self.wrapped(1), 10)
+        self.assertEqual(self.wrapped(1), 10)
+        self._new_request()
+        self.assertEqual(self.wrapped(1), 10)
+        self.assertEqual(self.to_be_wrapped.call_count, 1)
+        # The generation is only read once per request.
+        self.assertEqual(mock_cache.get.call_count, 2)
+
+    def test_new_generation(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        self.wrapped(1)
+        self._new_request()
+        self._use_generation(mock_cache, u'gen2')
+        self.wrapped(1)
+        self.assertEqual(self.to_be_wrapped.call_count, 2)
+
+    def test_bump_generation(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        self.wrapped(1)
+        bump_cache_generation(u'test.generation')
+        self.assertEqual(mock_cache.set.call_args[0][0], u'test.generation')
+        self._use_generation(mock_cache, mock_cache.set.call_args[0][1])
+        self.wrapped(1)
+        self.assertEqual(self.to_be_wrapped.call_count, 2)
+
+    @patch('openedx.core.lib.cache_utils.time.time')
+    def test_timeout(self, mock_time, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        mock_time.return_value = 0
+        self.wrapped(1)
+        self._new_request()
+        mock_time.return_value = 61
+        self.wrapped(1)
+        self.assertEqual(self.to_be_wrapped.call_count, 2)
+
+    def test_least_recently_used_evicted(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        self.wrapped(1)
+        self.wrapped(2)
+        self._new_request()
+        self.wrapped(1)
+        self.wrapped(3)
+        self._new_request()
+        self.wrapped(1)
+        self.wrapped(2)
+        self.assertEqual(
+            [call_args[0][0] for call_args in self.to_be_wrapped.call_args_list],
+            [1, 2, 3, 2],
+        )
+
+    def test_values_not_shared_across_requests(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        wrapped = process_lru_cached(u'test.generation')(lambda arg: [arg])
+        wrapped(1).append(2)
+        self.assertEqual(wrapped(1), [1, 2])
+        self._new_request()
+        value = wrapped(1)
+        self.assertEqual(value, [1])
+        value.append(3)
+        self._new_request()
+        self.assertEqual(wrapped(1), [1])
+
+    def test_generation_not_retained(self, mock_cache):
+        self._use_generation(mock_cache, None)
+        self.wrapped(1)
+        self.wrapped(1)
+        self._new_request()
+        self.wrapped(1)
+        self.assertEqual(self.to_be_wrapped.call_count, 2)
+        mock_cache.add.assert_called_with(u'test.generation', ANY, None)
+
+    def test_stats(self, mock_cache):
+        self._use_generation(mock_cache, u'gen1')
+        self.wrapped(1)
+        self._new_request()
+        self.wrapped(1)
+        self.assertEqual(
+            get_process_lru_cache_stats()[u'{}.mock_wrapper'.format(__name__)],
+            {'hits': 1, 'misses': 1, 'size': 1},
+        )
@@ -7,19 +7,22 @@ import uuid
 
 import ddt
 from django.conf import settings
+from django.core.cache import cache
 from django.test.client import RequestFactory
-from mock import patch
+from mock import Mock, patch
 from web_fragments.fragment import Fragment
 
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from openedx.core.lib.url_utils import quote_slashes
 from openedx.core.lib.xblock_builtin import get_css_dependencies, get_js_dependencies
 from openedx.core.lib.xblock_utils import (
+    FragmentCache,
     is_xblock_aside,
     get_aside_from_xblock,
     replace_course_urls,
     replace_jump_to_id_urls,
     replace_static_urls,
+    replace_urls,
     request_token,
     sanitize_html_id,
     wrap_fragment,
@@ -27,6 +30,7 @@ from openedx.core.lib.xblock_utils import (
 )
 from xblock.core import XBlockAside
 from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.test_asides import AsideTestType
@@ -177,6 +181,83 @@ class TestXblockUtils(SharedModuleStoreTestCase):
         self.assertIsInstance(test_replace, Fragment)
         self.assertEqual(test_replace.content, anchor_tag)
 
+    @ddt.data(
+        ('course_mongo', '<a href="/c4x/TestX/TS01/asset/id"><a href="/courses/TestX/TS01/2015/id"><a href="/base_url/id">'),
+        (
+            'course_split',
+            '<a href="/asset-v1:TestX+TS02+2015+type@asset+block/id">'
+            '<a href="/courses/course-v1:TestX+TS02+2015/id"><a href="/base_url/id">'
+        ),
+    )
+    @ddt.unpack
+    def test_replace_urls(self, course_id, anchor_tags):
+        """
+        Verify that the static, course and jump-to URLs have been replaced.
+        """
+        course = getattr(self, course_id)
+        test_replace = replace_urls(
+            data_dir=None,
+            course_id=course.id,
+            jump_to_id_base_url='/base_url/',
+            block=course,
+            view='baseview',
+            frag=Fragment('<a href="/static/id"><a href="/course/id"><a href="/jump_to_id/id">'),
+            context=None
+        )
+        self.assertIsInstance(test_replace, Fragment)
+        self.assertEqual(test_replace.content, anchor_tags)
+
+    def create_html(self, course, data):
+        """
+        Create an HTML block in the course, and return it as loaded from the modulestore.
+        """
+        html = ItemFactory.create(parent_location=course.location, category='html', data=data)
+        return modulestore().get_item(html.location)
+
+    def test_fragment_cache(self):
+        """
+        Verify that a view is rendered and wrapped once, and then taken from the cache with its resources.
+        """
+        cache.clear()
+        html = self.create_html(self.course_split, u'<p>Hello</p>')
+        render_view = Mock(return_value=self.create_fragment(u'<p>Hello</p>'))
+        wrapper = Mock(side_effect=lambda block, view, frag, context: wrap_fragment(frag, frag.content + u'!'))
+        fragment_cache = FragmentCache([wrapper])
+
+        key = fragment_cache.get_key(html, 'student_view')
+        fragments = [fragment_cache.render(key, html, 'student_view', {}, render_view) for __ in range(2)]
+
+        self.assertEqual(render_view.call_count, 1)
+        self.assertEqual(wrapper.call_count, 1)
+        for fragment in fragments:
+            self.assertEqual(fragment.content, u'<p>Hello</p>!')
+            self.assertEqual([resource.data for resource in fragment.resources], [
+                u'body {background-color:red;}', u'alert("Hi!");'
+            ])
+
+    def test_fragment_cache_key(self):
+        """
+        Verify which views can be cached, and that cache keys change with the block's definition.
+        """
+        fragment_cache = FragmentCache([])
+        html = self.create_html(self.course_split, u'<p>Hello</p>')
+        key = fragment_cache.get_key(html, 'student_view')
+        self.assertIsNotNone(key)
+        self.assertIsNone(fragment_cache.get_key(html, 'studio_view'))
+        self.assertIsNone(fragment_cache.get_key(self.course_split, 'student_view'))
+
+        html.data = u'<p>Goodbye</p>'
+        modulestore().update_item(html, ModuleStoreEnum.UserID.test)
+        self.assertNotEqual(fragment_cache.get_key(modulestore().get_item(html.location), 'student_view'), key)
+
+        # Blocks that show the user's id, and blocks of courses without versions, aren't cached.
+        self.assertIsNone(fragment_cache.get_key(
+            self.create_html(self.course_split, u'<p>%%USER_ID%%</p>'), 'student_view'
+        ))
+        self.assertIsNone(fragment_cache.get_key(
+            self.create_html(self.course_mongo, u'<p>Hello</p>'), 'student_view'
+        ))
+
     def test_sanitize_html_id(self):
         """
         Verify that colons and dashes are replaced.
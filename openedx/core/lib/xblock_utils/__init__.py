@@ -15,7 +15,9 @@ from lxml import html, etree
 from contracts import contract
 
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
+from django.utils import translation
 from django.utils.html import escape
 from django.contrib.auth.models import User
 from django.contrib.staticfiles.storage import staticfiles_storage
@@ -32,6 +34,8 @@ from xmodule.util.xmodule_django import add_webpack_to_fragment
 from xmodule.vertical_block import VerticalBlock
 from xmodule.x_module import shim_xmodule_js, XModuleDescriptor, XModule, PREVIEW_VIEWS, STUDIO_VIEW
 
+from openedx.core.djangoapps.theming.helpers import get_current_site_theme
+
 import webpack_loader.utils
 import six
 from six import text_type
@@ -273,6 +277,85 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(data_dir, course_id, jump_to_id_base_url, block, view, frag, context, static_asset_path=''):  # pylint: disable=unused-argument
+    """
+    Updates the supplied module with a new get_html function that wraps
+    the old get_html function and substitutes urls of the form /static/...,
+    /course/... and /jump_to_id/... in one pass, as replace_static_urls,
+    replace_course_urls and replace_jump_to_id_urls would.
+    """
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        jump_to_id_base_url,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path
+    ))
+
+
+class FragmentCache(object):
+    """
+    Cache of the rendered views of blocks that are the same for all users.
+
+    Blocks declare that a view can be cached with an `is_view_cacheable(view)`
+    method.  The fragments of their views are cached once `wrappers`, which
+    mustn't depend on the user or the request, have been applied to them, and
+    are keyed on the block's usage and definition, the course version, the
+    language and the theme, so that a cached fragment is never out of date.
+    Only blocks of courses with versions, that is of split courses, are cached.
+    """
+    TIMEOUT = 24 * 60 * 60
+
+    def __init__(self, wrappers):
+        self.wrappers = wrappers
+
+    def get_key(self, block, view):
+        """
+        Returns the cache key of the fragment of `view` of `block`, or None if it can't be cached.
+        """
+        is_view_cacheable = getattr(block, 'is_view_cacheable', None)
+        course_version = getattr(block, 'course_version', None)
+        if is_view_cacheable is None or course_version is None or not is_view_cacheable(view):
+            return None
+
+        site_theme = get_current_site_theme()
+        key = u'{usage_id}.{definition_id}.{course_version}.{view}.{language}.{theme}'.format(
+            usage_id=block.scope_ids.usage_id,
+            definition_id=block.scope_ids.def_id,
+            course_version=course_version,
+            view=view,
+            language=translation.get_language(),
+            theme=site_theme.theme_dir_name if site_theme else None,
+        )
+        return u'xblock_fragment.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        """
+        Returns the cached Fragment of `key`, or None if it isn't cached.
+        """
+        fragment_dict = cache.get(key)
+        return Fragment.from_dict(fragment_dict) if fragment_dict is not None else None
+
+    def set(self, key, fragment):
+        """
+        Caches `fragment` as the Fragment of `key`.
+        """
+        cache.set(key, fragment.to_dict(), self.TIMEOUT)
+
+    def render(self, key, block, view, context, render_view):
+        """
+        Returns the Fragment of `view` of `block` with the wrappers applied, from the cache
+        if it's there, and otherwise by calling `render_view` and caching the result under `key`.
+        """
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = render_view()
+            for wrapper in self.wrappers:
+                fragment = wrapper(block, view, fragment, context)
+            self.set(key, fragment)
+        return fragment
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.
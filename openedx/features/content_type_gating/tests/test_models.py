@@ -7,11 +7,11 @@ import ddt
 import pytz
 from django.utils import timezone
 from edx_django_utils.cache import RequestCache
-from mock import Mock
+from mock import Mock, patch
 from opaque_keys.edx.locator import CourseLocator
 
 from course_modes.tests.factories import CourseModeFactory
-from openedx.core.djangoapps.config_model_utils.models import Provenance
+from openedx.core.djangoapps.config_model_utils.models import CURRENT_CONFIGURATION_CACHE_GENERATION, Provenance
 from openedx.core.djangoapps.content.course_overviews.tests.factories import CourseOverviewFactory
 from openedx.core.djangoapps.site_configuration.tests.factories import SiteConfigurationFactory
 from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
@@ -376,6 +376,15 @@ class TestContentTypeGatingConfig(CacheIsolationTestCase):
         with self.assertNumQueries(0):
             self.assertFalse(ContentTypeGatingConfig.current(course_key=course.id).enabled)
 
+    def test_site_configuration_change_invalidates_current(self):
+        with patch('openedx.core.djangoapps.config_model_utils.models.bump_cache_generation') as mock_bump:
+            site_cfg = SiteConfigurationFactory.create(values={'course_org_filter': 'test-org'})
+            mock_bump.assert_called_with(CURRENT_CONFIGURATION_CACHE_GENERATION)
+
+            mock_bump.reset_mock()
+            site_cfg.delete()
+            mock_bump.assert_called_with(CURRENT_CONFIGURATION_CACHE_GENERATION)
+
     def _resolve_settings(self, settings):
         if all(setting is None for setting in settings):
             return None
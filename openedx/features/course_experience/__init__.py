@@ -74,6 +74,22 @@ LATEST_UPDATE_FLAG = CourseWaffleFlag(WAFFLE_FLAG_NAMESPACE, 'latest_update')
 # Waffle flag to enable the use of Bootstrap for course experience pages
 USE_BOOTSTRAP_FLAG = CourseWaffleFlag(WAFFLE_FLAG_NAMESPACE, 'use_bootstrap', flag_undefined_default=True)
 
+# Waffle flag to render only the active unit of a sequence with the courseware page.
+# .. toggle_name: course_experience.lazy_load_sequence_units
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, units other than the active one in a sequence are not rendered with the
+#   courseware page, but are loaded from the XBlock view handler when the learner navigates to them.
+# .. toggle_category: course_experience
+# .. toggle_use_cases: monitored_rollout
+# .. toggle_creation_date: 2026-10-19
+# .. toggle_expiration_date: None
+# .. toggle_warnings: Requires FEATURES['ENABLE_XBLOCK_VIEW_ENDPOINT'] to be enabled, or units are all rendered
+#   with the courseware page as usual.
+# .. toggle_tickets: N/A
+# .. toggle_status: supported
+LAZY_LOAD_SEQUENCE_UNITS_FLAG = CourseWaffleFlag(WAFFLE_FLAG_NAMESPACE, 'lazy_load_sequence_units')
+
 # Waffle flag to enable anonymous access to a course
 SEO_WAFFLE_FLAG_NAMESPACE = WaffleFlagNamespace(name='seo')
 COURSE_ENABLE_UNENROLLED_ACCESS_FLAG = CourseWaffleFlag(SEO_WAFFLE_FLAG_NAMESPACE, 'enable_anonymous_courseware_access')
@@ -5,10 +5,13 @@ Asset compilation and collection.
 
 import argparse
 import glob
+import hashlib
+import io
 import os
 import traceback
 from datetime import datetime
 from functools import wraps
+from multiprocessing import Pool, cpu_count
 from threading import Timer
 
 import six
@@ -23,7 +26,7 @@ from openedx.core.djangoapps.theming.paver_helpers import get_theme_paths
 from .utils.cmd import cmd, django_cmd
 from .utils.envs import Env
 from .utils.process import run_background_process
-from .utils.timer import timed
+from .utils.timer import timed, timed_step
 
 # setup baseline paths
 
@@ -88,6 +91,40 @@ SASS_LOOKUP_DEPENDENCIES = {
 # Collectstatic log directory setting
 COLLECTSTATIC_LOG_DIR_ARG = 'collect_log_dir'
 
+# Directory storing the fingerprints of the sources of the last Sass and Webpack builds
+ASSET_BUILD_CACHE_DIR = path(os.getenv('ASSET_BUILD_CACHE_DIR', Env.REPO_ROOT / '.asset_build_cache'))
+
+# The files installed in node_modules are fingerprinted by the NPM lock file
+NPM_LOCK_FILE = path('package-lock.json')
+
+SASS_SOURCE_EXTENSIONS = ('.scss', '.sass', '.css')
+
+# Files and directories that Webpack builds its bundles from
+WEBPACK_SOURCE_PATHS = [
+    path('webpack.common.config.js'),
+    path('webpack.dev.config.js'),
+    path('webpack.prod.config.js'),
+    path('webpack-config'),
+    path('.babelrc'),
+    NPM_LOCK_FILE,
+    Env.REPO_ROOT.parent / 'workers.json',
+    # Entries and module directories of the Webpack configs, and the apps
+    # whose static directories have entries
+    path('cms/djangoapps'),
+    path('cms/static'),
+    path('cms/templates/js'),
+    path('lms/djangoapps'),
+    path('lms/static'),
+    path('common/djangoapps'),
+    path('common/lib/xmodule'),
+    path('common/static'),
+    path('openedx'),
+]
+WEBPACK_SOURCE_EXTENSIONS = (
+    '.js', '.jsx', '.json', '.coffee', '.underscore', '.html', '.svg', '.woff', '.woff2', '.ttf', '.eot',
+)
+WEBPACK_BUNDLES_DIR = path('common/static/bundles')
+
 # Webpack command
 WEBPACK_COMMAND = u'STATIC_ROOT_LMS={static_root_lms} STATIC_ROOT_CMS={static_root_cms} $(npm bin)/webpack {options}'
 
@@ -378,6 +415,120 @@ class XModuleAssetsWatcher(PatternMatchingEventHandler):
         restart_django_servers()
 
 
+def find_asset_sources(paths, extensions, exclude=()):
+    """
+    Return the sorted paths of the files in `paths`, or in the directories
+    in `paths`, whose names end with one of `extensions`.
+
+    Directories in `exclude` are not searched. The files in node_modules are
+    represented by the NPM lock file rather than searched.
+    """
+    exclude = set(exclude)
+    sources = set()
+    for source_path in paths:
+        source_path = path(source_path)
+        if 'node_modules' in source_path.splitall():
+            if NPM_LOCK_FILE.isfile():
+                sources.add(NPM_LOCK_FILE)
+        elif source_path.isfile():
+            sources.add(source_path)
+        elif source_path.isdir():
+            for dirpath, dirnames, filenames in os.walk(source_path):
+                dirpath = path(dirpath)
+                dirnames[:] = [
+                    dirname for dirname in dirnames
+                    if dirname != 'node_modules' and dirpath / dirname not in exclude
+                ]
+                sources.update(dirpath / filename for filename in filenames if filename.endswith(extensions))
+    return sorted(sources)
+
+
+def compute_assets_fingerprint(paths, extensions, exclude=(), options=()):
+    """
+    Hash the names and contents of the asset sources in `paths`, along with
+    the build `options`. Returns the hex digest.
+    """
+    hasher = hashlib.sha1()
+    for option in options:
+        hasher.update(six.text_type(option).encode('utf-8'))
+    for source in find_asset_sources(paths, extensions, exclude):
+        hasher.update(six.text_type(source).encode('utf-8'))
+        with io.open(source, 'rb') as source_file:
+            hasher.update(source_file.read())
+    return hasher.hexdigest()
+
+
+def read_asset_build_cache(cache_name):
+    """
+    Return the fingerprint of the sources of the last successful `cache_name`
+    build, or None.
+    """
+    cache_file_path = ASSET_BUILD_CACHE_DIR / u'{}.sha1'.format(cache_name)
+    if not cache_file_path.isfile():
+        return None
+    with io.open(cache_file_path, 'r') as cache_file:
+        return cache_file.read().strip()
+
+
+def write_asset_build_cache(cache_name, fingerprint):
+    """
+    Record `fingerprint` as that of the sources of the last successful
+    `cache_name` build.
+    """
+    try:
+        os.makedirs(ASSET_BUILD_CACHE_DIR)
+    except OSError:
+        if not os.path.isdir(ASSET_BUILD_CACHE_DIR):
+            raise
+    with io.open(ASSET_BUILD_CACHE_DIR / u'{}.sha1'.format(cache_name), 'w') as cache_file:
+        cache_file.write(six.text_type(fingerprint))
+
+
+def get_sass_cache_name(system, theme):
+    """
+    Return the name of the asset build cache of the sass of `system` for `theme`.
+    """
+    if not theme:
+        return u'sass_{}'.format(system)
+    theme_hash = hashlib.sha1(six.text_type(theme).encode('utf-8')).hexdigest()[:8]
+    return u'sass_{}_{}_{}'.format(system, path(theme).basename(), theme_hash)
+
+
+def compute_sass_fingerprint(sass_dirs, debug, libsass_version):
+    """
+    Hash the sass sources and lookup paths of `sass_dirs`, the output options
+    and the version of libsass. The CSS they are compiled to is not part of
+    the fingerprint.
+    """
+    paths = list(COMMON_LOOKUP_PATHS)
+    options = [u'debug={}'.format(bool(debug)), u'libsass={}'.format(libsass_version)]
+    css_dirs = [dirs['css_destination_dir'] for dirs in get_common_sass_directories()]
+    for dirs in sass_dirs:
+        paths.append(dirs['sass_source_dir'])
+        paths.extend(dirs['lookup_paths'])
+        css_dirs.append(dirs['css_destination_dir'])
+        options.append(u'{} -> {}'.format(dirs['sass_source_dir'], dirs['css_destination_dir']))
+    return compute_assets_fingerprint(paths, SASS_SOURCE_EXTENSIONS, exclude=css_dirs, options=options)
+
+
+def _compile_sass_unit(unit):
+    """
+    Compile the sass of the (system, theme, debug, force) `unit`, and return
+    whether compiling it was successful, and its timing info.
+
+    This is a module level function so that compile_sass can run units in a
+    process pool.
+    """
+    system, theme, debug, force = unit
+    print(u"Started compiling '{system}' Sass for '{theme}'.".format(system=system, theme=theme or 'system'))
+
+    timing_info = []
+    is_successful = _compile_sass(system, theme, debug, force, timing_info)
+    if is_successful:
+        print(u"Finished compiling '{system}' Sass for '{theme}'.".format(system=system, theme=theme or 'system'))
+    return is_successful, timing_info
+
+
 @task
 @no_help
 @cmdopts([
@@ -386,6 +537,7 @@ class XModuleAssetsWatcher(PatternMatchingEventHandler):
     ('themes=', '-t', 'The theme to compile sass for (defaults to None)'),
     ('debug', 'd', 'Debug mode'),
     ('force', '', 'Force full compilation'),
+    ('processes=', 'p', 'Number of themes to compile in parallel (defaults to the number of cores)'),
 ])
 @timed
 def compile_sass(options):
@@ -423,6 +575,10 @@ def compile_sass(options):
         compile sass files for cms only for 'red-theme', 'stanford-style' and 'test-theme' present in
         '/edx/app/edxapp/edx-platform/themes' and '/edx/app/edxapp/edx-platform/common/test/'.
 
+    The sass of a system for a theme is only compiled if its sources have changed since it was last
+    compiled, unless --force is given. The systems and themes are compiled in parallel, by as many
+    processes as there are cores unless --processes is given.
+
     """
     debug = options.get('debug')
     force = options.get('force')
@@ -453,27 +609,29 @@ def compile_sass(options):
         print("Finished compiling 'common' sass.")
     compilation_results['success' if is_successful else 'failure'].append('"common" sass files.')
 
-    for system in systems:
-        for theme in themes:
-            print(u"Started compiling '{system}' Sass for '{theme}'.".format(system=system, theme=theme or 'system'))
-
-            # Compile sass files
-            is_successful = _compile_sass(
-                system=system,
-                theme=path(theme) if theme else None,
-                debug=debug,
-                force=force,
-                timing_info=timing_info
-            )
-
-            if is_successful:
-                print(u"Finished compiling '{system}' Sass for '{theme}'.".format(
-                    system=system, theme=theme or 'system'
-                ))
+    # The sass of each system for each theme is compiled to its own css directory, so
+    # they can be compiled in parallel once the common sass they import is compiled.
+    units = [
+        (system, path(theme) if theme else None, debug, force)
+        for system in systems
+        for theme in themes
+    ]
+    processes = min(int(get_parsed_option(options, 'processes', [cpu_count()])[0]), len(units))
+    if dry_run or processes <= 1:
+        results = [_compile_sass_unit(unit) for unit in units]
+    else:
+        pool = Pool(processes=processes)
+        try:
+            results = pool.map(_compile_sass_unit, units)
+        finally:
+            pool.close()
+            pool.join()
 
-            compilation_results['success' if is_successful else 'failure'].append(u'{system} sass for {theme}.'.format(
-                system=system, theme=theme or 'system',
-            ))
+    for (system, theme, __, __), (is_successful, unit_timing_info) in zip(units, results):
+        timing_info.extend(unit_timing_info)
+        compilation_results['success' if is_successful else 'failure'].append(u'{system} sass for {theme}.'.format(
+            system=system, theme=theme or 'system',
+        ))
 
     print("\t\tFinished compiling Sass:")
     if not dry_run:
@@ -493,7 +651,8 @@ def _compile_sass(system, theme, debug, force, timing_info):
     :param system: system to compile sass for e.g. 'lms', 'cms', 'common'
     :param theme: absolute path of the theme to compile sass for.
     :param debug: boolean showing whether to display source comments in resulted css
-    :param force: boolean showing whether to remove existing css files before generating new files
+    :param force: boolean showing whether to remove existing css files before generating new files, even if
+        the sources haven't changed since they were generated
     :param timing_info: list variable to keep track of timing for sass compilation
     """
 
@@ -509,6 +668,20 @@ def _compile_sass(system, theme, debug, force, timing_info):
 
     dry_run = tasks.environment.dry_run
 
+    if not dry_run:
+        cache_name = get_sass_cache_name(system, theme)
+        fingerprint = compute_sass_fingerprint(sass_dirs, debug, sass.__version__)
+        compiled = all(
+            dirs['css_destination_dir'].isdir() and dirs['css_destination_dir'].files('*.css')
+            for dirs in sass_dirs
+            if dirs['sass_source_dir'].isdir()
+        )
+        if not force and compiled and read_asset_build_cache(cache_name) == fingerprint:
+            print(u"'{system}' sass for '{theme}' unchanged, skipping...".format(
+                system=system, theme=theme or 'system',
+            ))
+            return True
+
     # determine css out put style and source comments enabling
     if debug:
         source_comments = True
@@ -565,6 +738,9 @@ def _compile_sass(system, theme, debug, force, timing_info):
         if not dry_run:
             duration = datetime.now() - start
             timing_info.append((sass_source_dir, css_dir, duration))
+
+    if not dry_run:
+        write_asset_build_cache(cache_name, fingerprint)
     return True
 
 
@@ -740,6 +916,7 @@ def execute_compile_sass(args):
         options += " --theme-dirs " + " ".join(args.theme_dirs) if args.theme_dirs else ""
         options += " --themes " + " ".join(args.themes) if args.themes else ""
         options += " --debug" if args.debug else ""
+        options += " --force" if args.force else ""
 
         sh(
             django_cmd(
@@ -757,13 +934,17 @@ def execute_compile_sass(args):
 @cmdopts([
     ('settings=', 's', "Django settings (defaults to devstack)"),
     ('watch', 'w', "Watch file system and rebuild on change (defaults to off)"),
+    ('force', 'f', "Build even if the sources haven't changed since the last build"),
 ])
 @timed
 def webpack(options):
     """
-    Run a Webpack build.
+    Run a Webpack build, unless its sources and options haven't changed since
+    the last build and the bundles it built are still there.
     """
     settings = getattr(options, 'settings', Env.DEVSTACK_SETTINGS)
+    force = getattr(options, 'force', False)
+    dry_run = tasks.environment.dry_run
     static_root_lms = Env.get_django_setting("STATIC_ROOT", "lms", settings=settings)
     static_root_cms = Env.get_django_setting("STATIC_ROOT", "cms", settings=settings)
     lms_root_url = Env.get_django_setting("LMS_ROOT_URL", "lms", settings=settings)
@@ -788,6 +969,23 @@ def webpack(options):
                       jwt_auth_cookie_header_payload_name=jwt_auth_cookie_header_payload_name,
                       user_info_cookie_name=user_info_cookie_name,
                   )
+
+    if not dry_run:
+        fingerprint = compute_assets_fingerprint(
+            WEBPACK_SOURCE_PATHS,
+            WEBPACK_SOURCE_EXTENSIONS,
+            exclude=[WEBPACK_BUNDLES_DIR],
+            options=[environment, config_path],
+        )
+        built = all(output.exists() for output in (
+            WEBPACK_BUNDLES_DIR,
+            path(static_root_lms) / 'webpack-stats.json',
+            path(static_root_cms) / 'webpack-stats.json',
+        ))
+        if not force and built and read_asset_build_cache('webpack') == fingerprint:
+            print("Webpack sources unchanged, skipping...")
+            return
+
     sh(
         cmd(
             u'{environment} $(npm bin)/webpack --config={config_path}'.format(
@@ -797,6 +995,9 @@ def webpack(options):
         )
     )
 
+    if not dry_run:
+        write_asset_build_cache('webpack', fingerprint)
+
 
 def execute_webpack_watch(settings=None):
     """
@@ -911,7 +1112,7 @@ def watch_assets(options):
 @timed
 def update_assets(args):
     """
-    Compile Sass, then collect static assets.
+    Compile Sass, then collect static assets, and print how long each step took.
     """
     parser = argparse.ArgumentParser(prog='paver update_assets')
     parser.add_argument(
@@ -954,17 +1155,26 @@ def update_assets(args):
         '--wait', type=float, default=0.0,
         help="How long to pause between filesystem scans"
     )
+    parser.add_argument(
+        '--force', action='store_true', default=False,
+        help="Run Webpack and compile Sass even if their sources haven't changed",
+    )
     args = parser.parse_args(args)
     collect_log_args = {}
+    step_timings = []
 
-    process_xmodule_assets()
-    process_npm_assets()
+    with timed_step('process xmodule assets', step_timings):
+        process_xmodule_assets()
+    with timed_step('process npm assets', step_timings):
+        process_npm_assets()
 
     # Build Webpack
-    call_task('pavelib.assets.webpack', options={'settings': args.settings})
+    with timed_step('webpack', step_timings):
+        call_task('pavelib.assets.webpack', options={'settings': args.settings, 'force': args.force})
 
     # Compile sass for themes and system
-    execute_compile_sass(args)
+    with timed_step('compile sass', step_timings):
+        execute_compile_sass(args)
 
     if args.collect:
         if args.debug or args.debug_collect:
@@ -973,7 +1183,12 @@ def update_assets(args):
         if args.collect_log_dir:
             collect_log_args.update({COLLECTSTATIC_LOG_DIR_ARG: args.collect_log_dir})
 
-        collect_assets(args.system, args.settings, **collect_log_args)
+        with timed_step('collect assets', step_timings):
+            collect_assets(args.system, args.settings, **collect_log_args)
+
+    print("\t\tUpdated assets:")
+    for step, duration in step_timings:
+        print(u">> {} in {:.1f}s".format(step, duration.total_seconds()))
 
     if args.watch:
         call_task(
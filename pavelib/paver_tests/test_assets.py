@@ -1,16 +1,21 @@
 """Unit tests for the Paver asset tasks."""
 
 
+import io
 import os
+import re
+import shutil
+import tempfile
 from unittest import TestCase
 
 import ddt
 import paver.tasks
 import six
-from mock import patch
+from mock import Mock, patch
 from paver.easy import call_task, path
 from watchdog.observers import Observer
 
+from pavelib import assets
 from pavelib.assets import COLLECTSTATIC_LOG_DIR_ARG, collect_assets
 
 from ..utils.envs import Env
@@ -198,6 +203,121 @@ class TestPaverThemeAssetTasks(PaverTestCase):
         six.assertCountEqual(self, self.task_messages, expected_messages)
 
 
+class TestAssetBuildCache(TestCase):
+    """
+    Test skipping the compilation of sass whose sources haven't changed.
+    """
+    def setUp(self):
+        super(TestAssetBuildCache, self).setUp()
+        self.temp_dir = path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+
+        self.sass_dir = self.temp_dir / 'sass'
+        self.css_dir = self.temp_dir / 'css'
+        self.sass_dir.makedirs_p()
+        self.css_dir.makedirs_p()
+        (self.sass_dir / '_partial.scss').write_text(u'$color: red;')
+        (self.sass_dir / 'main-rtl.scss').write_text(u'@import "partial";')
+        (self.css_dir / 'main-rtl.css').write_text(u'')
+
+        patcher = patch.object(assets, 'ASSET_BUILD_CACHE_DIR', self.temp_dir / 'cache')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(assets, 'get_common_sass_directories', return_value=[{
+            'sass_source_dir': self.sass_dir,
+            'css_destination_dir': self.css_dir,
+            'lookup_paths': [],
+        }])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.mock_sass = Mock(__version__='3.6.0')
+        patcher = patch.dict('sys.modules', sass=self.mock_sass)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        paver.tasks.environment = paver.tasks.Environment()
+
+    def compile_sass(self, debug=False, force=False):
+        """
+        Compile the sass in the temporary directory, and return how many times
+        it was compiled in total.
+        """
+        assets._compile_sass('common', None, debug, force, [])
+        return self.mock_sass.compile.call_count
+
+    def test_find_asset_sources(self):
+        (self.sass_dir / 'vendor').makedirs_p()
+        (self.sass_dir / 'vendor' / 'lib.css').write_text(u'')
+        (self.sass_dir / 'script.js').write_text(u'')
+        (self.sass_dir / 'node_modules').makedirs_p()
+        (self.sass_dir / 'node_modules' / 'module.scss').write_text(u'')
+
+        self.assertEqual(
+            assets.find_asset_sources([self.sass_dir, self.sass_dir / '_partial.scss'], ('.scss', '.css')),
+            [self.sass_dir / '_partial.scss', self.sass_dir / 'main-rtl.scss', self.sass_dir / 'vendor' / 'lib.css'],
+        )
+        self.assertEqual(
+            assets.find_asset_sources([self.sass_dir], ('.scss',), exclude=[self.sass_dir / 'vendor']),
+            [self.sass_dir / '_partial.scss', self.sass_dir / 'main-rtl.scss'],
+        )
+
+    def test_compile_unchanged_sass(self):
+        self.assertEqual(self.compile_sass(), 1)
+        self.assertEqual(self.compile_sass(), 1)
+
+        # The compiled css isn't part of the fingerprint
+        (self.css_dir / 'main-rtl.css').write_text(u'body{color:red}')
+        self.assertEqual(self.compile_sass(), 1)
+
+    def test_compile_changed_sass(self):
+        self.assertEqual(self.compile_sass(), 1)
+        (self.sass_dir / '_partial.scss').write_text(u'$color: blue;')
+        self.assertEqual(self.compile_sass(), 2)
+        self.assertEqual(self.compile_sass(debug=True), 3)
+        self.assertEqual(self.compile_sass(force=True), 4)
+
+    def test_compile_missing_css(self):
+        self.assertEqual(self.compile_sass(), 1)
+        (self.css_dir / 'main-rtl.css').remove()
+        self.assertEqual(self.compile_sass(), 2)
+
+
+class TestWebpackSourcePaths(TestCase):
+    """
+    Test that the Webpack build is fingerprinted with every source it names.
+    """
+    def get_config_sources(self):
+        """
+        Return the entries, resolved files and module directories of the Webpack configs, relative to the
+        repository root.
+        """
+        sources = []
+        with io.open(ROOT_PATH / 'webpack.common.config.js', encoding='utf-8') as config_file:
+            config = config_file.read()
+        sources.extend(re.findall(r"'\./([^']+)'", config))
+        sources.extend(re.findall(r"path\.resolve\(__dirname, '([^']+)'\)", config))
+        modules = re.search(r"modules: \[([^\]]+)\]", config).group(1)
+        sources.extend(module for module in re.findall(r"'([^']+)'", modules) if module != 'node_modules')
+        with io.open(ROOT_PATH / 'webpack-config' / 'file-lists.js', encoding='utf-8') as file_lists:
+            sources.extend(re.findall(r"path\.resolve\(__dirname, '\.\./([^']+)'\)", file_lists.read()))
+        return [os.path.normpath(source) for source in sources]
+
+    def test_sources_are_fingerprinted(self):
+        roots = [os.path.normpath(root) for root in assets.WEBPACK_SOURCE_PATHS]
+        sources = self.get_config_sources()
+        self.assertIn('lms/djangoapps/support/static/support/jsx/entitlements/index.jsx', sources)
+        for source in sources:
+            if source.split(os.sep)[0] == 'node_modules':
+                # Installed packages are fingerprinted by the NPM lock file.
+                continue
+            self.assertTrue(
+                any(source == root or source.startswith(root + os.sep) for root in roots),
+                u"{} isn't in WEBPACK_SOURCE_PATHS".format(source),
+            )
+
+
 class TestPaverWatchAssetTasks(TestCase):
     """
     Test the Paver watch asset tasks.
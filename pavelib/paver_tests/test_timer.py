@@ -188,3 +188,25 @@ class TimedDecoratorTests(TestCase):
 
         self.assertIn('ended_at', messages[1])
         self.assertEqual(parent_end.isoformat(' '), messages[1]['ended_at'])
+
+
+class TimedStepTests(TestCase):
+    """
+    Tests of the pavelib.utils.timer:timed_step context manager.
+    """
+    @patch.object(timer, 'datetime', autospec=True)
+    def test_timed_step(self, mock_datetime):
+        start = datetime(2016, 7, 20, 10, 56, 19)
+        mock_datetime.utcnow.side_effect = [start, start + timedelta(seconds=12), start, start + timedelta(seconds=3)]
+
+        step_timings = []
+        with timer.timed_step('webpack', step_timings):
+            pass
+        with self.assertRaises(ValueError):
+            with timer.timed_step('compile sass', step_timings):
+                raise ValueError()
+
+        self.assertEqual(
+            step_timings,
+            [('webpack', timedelta(seconds=12)), ('compile sass', timedelta(seconds=3))],
+        )
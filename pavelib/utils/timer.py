@@ -8,6 +8,7 @@ import logging
 import os
 import sys
 import traceback
+from contextlib import contextmanager
 from datetime import datetime
 from os.path import dirname, exists
 
@@ -81,3 +82,16 @@ def timed(wrapped, instance, args, kwargs):  # pylint: disable=unused-argument
                 # Squelch OSErrors, because we expect them and they shouldn't
                 # interrupt the rest of the process.
                 LOGGER.exception("Unable to write timing logs")
+
+
+@contextmanager
+def timed_step(name, step_timings):
+    """
+    Append the name and duration of the step run in this context to the
+    `step_timings` list, whether or not it succeeds.
+    """
+    start = datetime.utcnow()
+    try:
+        yield
+    finally:
+        step_timings.append((name, datetime.utcnow() - start))